@@ -15,16 +15,21 @@ import bentoml
 # pylint: disable=E0401
 import pendulum
 from airflow.operators.bash import BashOperator
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 
 from airflow import DAG
 
 sys.path.append("src")
 
 # pylint: disable=C0413
-from ingestion.download import articles_download, convert_pdf_to_text_in_parallel
-from preparation.convert import create_text_corpus
-from training import train_and_track_experiment
+from ingestion.download import download_and_convert_shard, shard_article_list
+from preparation.convert import create_text_corpus_from_shards
+from preparation.dedup import deduplicate_text_files
+from training import (
+    find_trained_model,
+    train_and_track_experiment,
+    train_and_track_incremental,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -73,51 +78,128 @@ with DAG(
     )
     validate_env_task.doc_md = dedent("""#### Validate the environment variables""")
 
-    # Downaload articles task (pdf) from arXiv
-    download_task = PythonOperator(
-        task_id="download_articles_pdf",
-        python_callable=articles_download,
+    # Split the list of articles into shards, one mapped task per shard
+    shard_task = PythonOperator(
+        task_id="shard_article_list",
+        python_callable=shard_article_list,
         op_kwargs={
             "urls_file_path": os.getenv("ARXIV_ARTICLE_LIST_SMALL10"),
-            "pdf_output_directory": os.getenv("PDF_DATADIR"),
+            "shard_directory": os.path.join(os.getenv("PDF_DATADIR"), "shards"),
         },
     )
-    download_task.doc_md = dedent("""#### Download PDF article from arXiv""")
+    shard_task.doc_md = dedent("""#### Split the list of arXiv articles into shards""")
 
-    # Convert pdf to text task (sequential), for more speed use the mp.pool implementation
-    convert_task = PythonOperator(
-        task_id="pdf_to_text",
-        python_callable=convert_pdf_to_text_in_parallel,
+    # Download the articles (pdf) of each shard from arXiv and convert them to text, on any free worker
+    download_convert_task = PythonOperator.partial(
+        task_id="download_and_convert_shard",
+        python_callable=download_and_convert_shard,
         op_kwargs={
-            "pdf_input_directory": os.getenv("PDF_DATADIR"),
+            "pdf_output_directory": os.getenv("PDF_DATADIR"),
             "txt_output_directory": os.getenv("TXT_DATADIR"),
         },
+    ).expand(op_args=shard_task.output.map(lambda shard_file_path: [shard_file_path]))
+    download_convert_task.doc_md = dedent(
+        """#### Download the PDF articles of a shard from arXiv and convert them to text"""
+    )
+
+    # Find the near-duplicate articles (e.g. new versions) among the text files of the shards
+    deduplicate_task = PythonOperator(
+        task_id="deduplicate",
+        python_callable=deduplicate_text_files,
+        op_kwargs={
+            "txt_input_directories": download_convert_task.output,
+        },
+    )
+    deduplicate_task.doc_md = dedent(
+        """#### Find the near-duplicate articles to leave out of the corpus"""
     )
-    convert_task.doc_md = dedent("""#### Convert pdf to text task""")
 
-    # Create a single text corpus
+    # Create a single text corpus from the text directories of the shards
     create_corpus_task = PythonOperator(
         task_id="create_corpus",
-        python_callable=create_text_corpus,
+        python_callable=create_text_corpus_from_shards,
         op_kwargs={
             "text_corpus_datadir": os.getenv("TEXT_CORPUS_DATADIR"),
             "text_outfile_path": os.getenv("TEXT_CORPUS_FNAME"),
-            "txt_input_directory": os.getenv("TXT_DATADIR"),
+            "txt_input_directories": download_convert_task.output,
+            "excluded_files": deduplicate_task.output,
         },
     )
     create_corpus_task.doc_md = dedent("""#### Create a single text corpus""")
 
+    # Fingerprint the training inputs and look up a previous run trained on the same inputs
+    fingerprint_task = PythonOperator(
+        task_id="fingerprint",
+        python_callable=find_trained_model,
+        op_kwargs={
+            "text_corpus": os.getenv("TEXT_CORPUS_DATADIR")
+            + os.getenv("TEXT_CORPUS_FNAME"),
+            "domain_keywords": os.getenv("DOMAIN_KEYWORDS"),
+        },
+    )
+    fingerprint_task.doc_md = dedent(
+        """#### Fingerprint the corpus, the keywords, the hyperparameters and the code version"""
+    )
+
+    def training_inputs_changed(**kwargs):
+        """
+        Returns False, skipping the training and the build of the model, if a previous run was trained on the same
+        inputs; its model URI is in the XCom of the fingerprint task.
+        """
+
+        trained_model = kwargs["ti"].xcom_pull(task_ids="fingerprint")
+        if trained_model["model_uri"] is not None:
+            logger.info(f"Reusing the model {trained_model['model_uri']}")
+            return False
+        return True
+
+    # Skip the training and the build steps when the training inputs did not change
+    check_changed_task = ShortCircuitOperator(
+        task_id="check_training_inputs_changed",
+        python_callable=training_inputs_changed,
+    )
+    check_changed_task.doc_md = dedent(
+        """#### Skip the training and the build if a model was trained on the same inputs"""
+    )
+
+    # Wrapper for training a model from scratch or incrementally
+    def training_wrapper(**kwargs):
+        """
+        Trains a model from scratch, or continues the training of the model of the MLflow run given by the
+        TRAINING_PARENT_RUN_ID environment variable on the documents added since.
+        """
+
+        parent_run_id = os.getenv("TRAINING_PARENT_RUN_ID")
+        if parent_run_id:
+            return train_and_track_incremental(
+                model_uri=kwargs["model_uri"],
+                parent_run_id=parent_run_id,
+                txt_input_directory=kwargs["txt_input_directory"],
+                domain_keywords=kwargs["domain_keywords"],
+                fingerprint=kwargs["fingerprint"],
+            )
+
+        return train_and_track_experiment(
+            model_uri=kwargs["model_uri"],
+            text_corpus=kwargs["text_corpus"],
+            domain_keywords=kwargs["domain_keywords"],
+            fingerprint=kwargs["fingerprint"],
+            txt_input_directory=kwargs["txt_input_directory"],
+        )
+
     # Training task for training a model and tracking the experiment
 
     training_task = PythonOperator(
         task_id="training",
-        python_callable=train_and_track_experiment,
+        python_callable=training_wrapper,
         provide_context=True,
         op_kwargs={
             "model_uri": str(uuid.uuid4().hex)[:8],
             "text_corpus": os.getenv("TEXT_CORPUS_DATADIR")
             + os.getenv("TEXT_CORPUS_FNAME"),
+            "txt_input_directory": os.getenv("TXT_DATADIR"),
             "domain_keywords": os.getenv("DOMAIN_KEYWORDS"),
+            "fingerprint": "{{ ti.xcom_pull(task_ids='fingerprint')['fingerprint'] }}",
         },
     )
 
@@ -168,9 +250,12 @@ with DAG(
     # pylint: disable=W0104
     (
         validate_env_task
-        >> download_task
-        >> convert_task
+        >> shard_task
+        >> download_convert_task
+        >> deduplicate_task
         >> create_corpus_task
+        >> fingerprint_task
+        >> check_changed_task
         >> training_task
         >> model_import_task
         >> model_build
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""Benchmarks the speed of the PDF text extraction backends and their agreement with pypdf."""
+
+import argparse
+import os
+import sys
+import timeit
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import PDF_BACKEND_CLASSES, PdfBackendError
+from preparation.clean import combined_text_cleaning
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the speed and the quality of the PDF text extraction backends."
+)
+
+parser.add_argument(
+    "-d",
+    "--directory",
+    default="resources/benchmark",
+    help="The directory of the PDF files, searched recursively",
+)
+parser.add_argument(
+    "-b",
+    "--backends",
+    nargs="+",
+    default=list(PDF_BACKEND_CLASSES),
+    help="The backends to benchmark",
+)
+parser.add_argument(
+    "-r", "--repeat", type=int, default=3, help="The number of runs of each benchmark"
+)
+
+args = parser.parse_args()
+
+
+def token_agreement(text: str, reference: str) -> float:
+    """The F1 score of the cleaned tokens of a text against the ones of a reference text, 1.0 if both are empty."""
+
+    tokens = Counter(combined_text_cleaning(text).split())
+    reference_tokens = Counter(combined_text_cleaning(reference).split())
+    total = sum(tokens.values()) + sum(reference_tokens.values())
+    if total == 0:
+        return 1.0
+    return 2 * sum((tokens & reference_tokens).values()) / total
+
+
+pdf_files = {}
+for pdf_file_path in sorted(Path(args.directory).rglob("*.pdf")):
+    with open(pdf_file_path, "rb") as filehandle:
+        pdf_files[pdf_file_path] = filehandle.read()
+print(f"{len(pdf_files)} PDF files in {args.directory}")
+
+reference = {}
+for pdf_file_path, buffer in pdf_files.items():
+    try:
+        reference[pdf_file_path] = "".join(
+            PDF_BACKEND_CLASSES["pypdf"]().extract_pages(buffer)
+        )
+    except PdfBackendError:
+        pass
+
+for name in args.backends:
+    backend = PDF_BACKEND_CLASSES[name]()
+    if not backend.is_available():
+        print(f"{name}: not installed")
+        continue
+
+    pages, seconds, failed, agreements = 0, 0.0, 0, []
+    for pdf_file_path, buffer in pdf_files.items():
+        try:
+            text_pages = backend.extract_pages(buffer)
+        except PdfBackendError:
+            failed += 1
+            continue
+
+        pages += len(text_pages)
+        seconds += min(
+            timeit.repeat(
+                lambda: backend.extract_pages(buffer),  # pylint: disable=W0640
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        if pdf_file_path in reference:
+            agreements.append(
+                token_agreement("".join(text_pages), reference[pdf_file_path])
+            )
+
+    agreement = sum(agreements) / len(agreements) if agreements else float("nan")
+    print(
+        f"{name}: {pages} pages in {seconds:.3f} seconds, {pages / max(seconds, 1e-9):.1f} pages/second, "
+        f"token agreement with pypdf {agreement:.3f}, {failed} failed"
+    )
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""Benchmarks the sequential and the multiprocess preprocessing of a text corpus."""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from preparation.clean import (
+    clean_stopwords_str,
+    get_bigram_from_vocabulary,
+    substitute_and_clean_in_parallel,
+)
+from preparation.convert import get_file_contents
+from training import get_domain_keywords
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the sequential and the multiprocess corpus preprocessing."
+)
+
+parser.add_argument(
+    "-c",
+    "--corpus",
+    default="resources/corpus/article-from-2021-08-01-to-2022-08-31-first-10-corpus.txt.bz2",
+    help="The text corpus",
+)
+parser.add_argument(
+    "-k",
+    "--keywords",
+    default=os.getenv("DOMAIN_KEYWORDS", "resources/keywords/keywords.txt"),
+    help="The domain keywords file",
+)
+parser.add_argument(
+    "-p",
+    "--processes",
+    type=int,
+    nargs="+",
+    default=[2, 4, 8],
+    help="The numbers of processes to benchmark",
+)
+parser.add_argument(
+    "-r", "--repeat", type=int, default=3, help="The number of runs of each benchmark"
+)
+
+args = parser.parse_args()
+
+vocabulary = get_domain_keywords(args.keywords)
+text = get_file_contents(args.corpus)
+print(f"Corpus: {args.corpus}, {len(text)} characters")
+
+expected = clean_stopwords_str(get_bigram_from_vocabulary(vocabulary, text))
+sequential = min(
+    timeit.repeat(
+        lambda: clean_stopwords_str(get_bigram_from_vocabulary(vocabulary, text)),
+        number=1,
+        repeat=args.repeat,
+    )
+)
+print(f"sequential: {sequential:.3f} seconds")
+
+for processes in args.processes:
+    assert substitute_and_clean_in_parallel(vocabulary, text, processes) == expected
+    parallel = min(
+        timeit.repeat(
+            lambda: substitute_and_clean_in_parallel(vocabulary, text, processes),
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+    print(
+        f"{processes} processes: {parallel:.3f} seconds, speedup {sequential / parallel:.2f}x"
+    )
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+"""Builds the corpus-wide document embedding index used by the similar-papers endpoint."""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import (
+    DocumentIndex,
+    IVFDocumentIndex,
+    get_domain_keywords,
+    load_word2vec_model,
+)
+
+parser = argparse.ArgumentParser(
+    description="Build the corpus-wide document embedding index."
+)
+
+parser.add_argument(
+    "-m", "--model", required=True, help="The Word2Vec model of the corpus"
+)
+parser.add_argument(
+    "-t",
+    "--txt-dir",
+    dest="txt_dir",
+    required=True,
+    help="The directory of the cleaned text files of the corpus",
+)
+parser.add_argument(
+    "-k",
+    "--keywords",
+    default=os.getenv("DOMAIN_KEYWORDS", "resources/keywords/keywords.txt"),
+    help="The domain keywords file",
+)
+parser.add_argument(
+    "-o", "--output", required=True, help="The output directory of the index"
+)
+parser.add_argument(
+    "-l",
+    "--lists",
+    type=int,
+    default=0,
+    help="The number of inverted lists of an approximate index (0 for an exact index)",
+)
+
+args = parser.parse_args()
+
+model = load_word2vec_model(args.model)
+index = DocumentIndex.build(model.wv, args.txt_dir, get_domain_keywords(args.keywords))
+
+if args.lists > 0:
+    index = IVFDocumentIndex.from_index(index, n_lists=args.lists)
+
+index.save(args.output)
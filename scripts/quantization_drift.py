@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+"""Reports the score drift of the quantized model exports on the benchmark PDFs."""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning
+from training import load_word2vec_model, score_quantization_drift
+
+parser = argparse.ArgumentParser(
+    description="Report the score drift of the quantized model exports."
+)
+
+parser.add_argument(
+    "-m", "--model", required=True, help="The Word2Vec model of the corpus"
+)
+parser.add_argument(
+    "-k",
+    "--keywords",
+    default=os.getenv("DOMAIN_KEYWORDS", "resources/keywords/keywords.txt"),
+    help="The domain keywords file",
+)
+parser.add_argument(
+    "-b",
+    "--benchmark",
+    default="resources/benchmark",
+    help="The directory of the benchmark PDFs",
+)
+
+args = parser.parse_args()
+
+documents = {}
+for pdf_file_path in sorted(Path(args.benchmark).glob("**/*.pdf")):
+    pdf_file = Pdf(str(pdf_file_path))
+    pdf_file.to_text()
+    documents[str(pdf_file_path)] = combined_text_cleaning(pdf_file.content)
+
+report = score_quantization_drift(
+    load_word2vec_model(args.model), args.keywords, documents
+)
+print(json.dumps(report, indent=2))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""Scores a directory or a manifest of PDF files offline, e.g. to re-score the archive after a keyword change."""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from serving.batch import list_pdf_files, score_pdf_files
+
+logging.basicConfig(level=logging.INFO)
+
+parser = argparse.ArgumentParser(
+    description="Score PDF files offline in a process pool, resuming a partially written output."
+)
+
+parser.add_argument(
+    "-i",
+    "--input",
+    required=True,
+    help="A directory of PDF files, or a manifest with one PDF path per line",
+)
+parser.add_argument(
+    "-m",
+    "--model",
+    required=True,
+    help="A Word2Vec model file, or the path or URI of an MLflow model",
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    required=True,
+    help="The output: a .jsonl file or a .parquet directory",
+)
+parser.add_argument(
+    "-k",
+    "--keywords",
+    default=os.getenv("DOMAIN_KEYWORDS"),
+    help="The domain keywords file, by default the one of the MLflow model",
+)
+parser.add_argument(
+    "-p",
+    "--processes",
+    type=int,
+    default=None,
+    help="The number of worker processes, by default the number of CPUs",
+)
+
+args = parser.parse_args()
+
+summary = score_pdf_files(
+    list_pdf_files(args.input),
+    args.model,
+    args.output,
+    domain_keywords=args.keywords,
+    processes=args.processes,
+)
+print(json.dumps(summary, indent=2))
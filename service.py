@@ -2,24 +2,45 @@
 
 from __future__ import annotations
 
+import hmac
 import io
 import logging
 import os
 import sys
+import time
 from typing import Any
 
 import bentoml
-from bentoml.exceptions import BentoMLException
+from bentoml.exceptions import BentoMLException, ServiceUnavailable
 from bentoml.io import JSON, File
-from pypdf import PdfReader
-from pypdf.errors import PdfReadError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
 
-sys.path.append(os.path.abspath("src"))
-sys.path.append(os.path.abspath("src/training"))
+sys.path.insert(0, os.path.abspath("src"))
 
-from preparation.clean import combined_text_cleaning
-
-from training import *
+# pylint: disable=C0413
+from preparation.keywords import KeywordSetCache
+from serving.hotswap import (
+    MODEL_POLL_INTERVAL,
+    MODEL_SYNC_INTERVAL,
+    ModelMarker,
+    ModelSlot,
+)
+from serving.inference import (
+    clean_text,
+    encode_document,
+    load_index,
+    open_pdf,
+    read_domain_keywords,
+    read_keyword_set,
+    read_pdf,
+    screen_document,
+)
+from serving.progressive import score_progressively
+from serving.warmup import WarmUp, warm_up_document
+from training.admission import AdmissionRejected, is_rejection
 
 ch = logging.StreamHandler()
 formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -34,39 +55,360 @@ if "BENTO_MODEL" in os.environ:
 else:
     bentoml_logger.info("The BENTO_MODEL environment variable does not exist.")
 
-runner = bentoml.mlflow.get(BENTO_MODEL).to_runner()
+DOMAIN_KEYWORDS = os.getenv("DOMAIN_KEYWORDS", "resources/keywords/keywords.txt")
+CORPUS_INDEX = os.getenv("CORPUS_INDEX")
+SIMILAR_TOP_K = os.getenv("SIMILAR_TOP_K", "10")
+WARMUP_DOCUMENT = os.getenv(
+    "WARMUP_DOCUMENT", "resources/benchmark/valid/2103.01035.pdf"
+)
+# the token of the admin endpoints, which are disabled without one
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def resolve_model(tag: str) -> str:
+    """Returns the full tag of a model of the local model store, e.g. of `<name>:latest`."""
+    return str(bentoml.models.get(tag).tag)
+
+
+def load_model(tag: str):
+    """Loads an MLflow model of the local model store."""
+    return bentoml.mlflow.load_model(tag)
+
+
+def warm_up_model(model):
+    """
+    Warms up a loaded model before it serves requests, see `GensimWord2VecModel.warm_up`, and compiles the domain
+    keywords of the service, which the requests are scored against.
+    """
+    python_model = model.unwrap_python_model()
+    if hasattr(python_model, "warm_up"):
+        python_model.warm_up()
+    if hasattr(python_model, "get_keyword_set"):
+        python_model.get_keyword_set(domain_keywords)
+
+
+bento_model = bentoml.models.get(BENTO_MODEL)
+# the version served by the runner workers, written by the admin endpoint or on a new version of the store
+model_marker = ModelMarker(str(bento_model.tag))
+
+
+class SwappableModelRunnable(bentoml.Runnable):
+    """
+    Serves the MLflow model of BENTO_MODEL, which can be swapped for another version of the local model store
+    without restarting the service, see `serving.hotswap.ModelSlot`.
+
+    Each runner worker has its own slot, and swaps it to the version of the model marker, which it reads every
+    MODEL_SYNC_INTERVAL seconds: the marker is written by the admin endpoint, and by the workers when the store has
+    a new version of the model if MODEL_POLL_INTERVAL is positive. A worker started after a swap loads the version
+    of the marker.
+    """
+
+    SUPPORTED_RESOURCES = ("cpu",)
+
+    def __init__(self):
+        version = model_marker.read() or str(bento_model.tag)
+        self.slot = ModelSlot(load_model(version), version)
+        self.latest = self.latest_version()
+        self.next_poll = time.monotonic() + float(MODEL_POLL_INTERVAL)
+        self.slot.watch(
+            self.target_version,
+            load_model,
+            warm_up_model,
+            interval=float(MODEL_SYNC_INTERVAL),
+        )
+
+    @staticmethod
+    def latest_version() -> str | None:
+        """Returns the latest version of the model in the store if it is polled."""
+        if float(MODEL_POLL_INTERVAL) > 0:
+            return resolve_model(f"{bento_model.tag.name}:latest")
+        return None
+
+    def target_version(self) -> str:
+        """
+        Returns the version of the model marker, after writing to it the latest version of the store if it is
+        polled and changed since the last poll.
+        """
+        if self.latest is not None and time.monotonic() >= self.next_poll:
+            self.next_poll = time.monotonic() + float(MODEL_POLL_INTERVAL)
+            latest = self.latest_version()
+            if latest != self.latest:
+                # the workers write the same version
+                model_marker.write(latest)
+                self.latest = latest
+        return model_marker.read() or self.slot.version
+
+    @bentoml.Runnable.method(batchable=False)
+    def predict(self, model_input):
+        """Scores a document with the current model, or returns the rejection of the document, see `run_model`."""
+        with self.slot.use() as model:
+            try:
+                return model.predict(model_input)
+            except AdmissionRejected as rejection:
+                return rejection.as_result()
+
+    @bentoml.Runnable.method(batchable=False)
+    def status(self) -> dict:
+        """Returns the current model version of a runner worker and the status of its last swap."""
+        return self.slot.status()
+
+
+runner = bentoml.Runner(
+    SwappableModelRunnable, name=bento_model.tag.name, models=[bento_model]
+)
+
+vocabulary = read_domain_keywords(DOMAIN_KEYWORDS)
+domain_keywords = vocabulary[0]
+
+# the keyword sets of the requests, compiled once per distinct set
+keyword_sets = KeywordSetCache()
+
+corpus_index = None
 
 svc = bentoml.Service("ppml_rr", runners=[runner])
 
+warm_up = WarmUp(
+    lambda: warm_up_document(
+        WARMUP_DOCUMENT,
+        domain_keywords,
+        lambda payload: runner.predict.async_run(
+            runner_input(payload, keyword_sets.get(domain_keywords))
+        ),
+    )
+)
+
+
+async def ready(_request) -> JSONResponse:
+    """
+    Reports whether the warm-up of this API server process completed, starting it if needed, with the warm-up
+    time. The status code is 503 until the service is warm, so that the route can be used as a readiness probe.
+    """
+    warm_up.start()
+    return JSONResponse(warm_up.status(), status_code=200 if warm_up.is_ready else 503)
+
+
+svc.mount_asgi_app(Starlette(routes=[Route("/ready", ready)]), path="/warmup")
+
+
+def is_admin(request: Request) -> bool:
+    """Checks the `Authorization: Bearer <ADMIN_TOKEN>` header of an admin request."""
+    if not ADMIN_TOKEN:
+        return False
+    # compare_digest only compares ASCII strings, a header can have other characters
+    return hmac.compare_digest(
+        request.headers.get("Authorization", "").encode("utf-8"),
+        f"Bearer {ADMIN_TOKEN}".encode("utf-8"),
+    )
+
+
+async def admin_model(request: Request) -> JSONResponse:
+    """
+    Reports the version of the model marker, and the model version and the status of the last swap of a runner
+    worker (GET), or swaps the model of the runner workers for the model of the `model` tag of the JSON body by
+    writing it to the marker (POST), with status 202, or 409 if the model is already the one of the marker. The
+    workers swap within MODEL_SYNC_INTERVAL seconds, and their current model keeps serving until the new one is
+    loaded and warmed up.
+    """
+    if not is_admin(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    target = model_marker.read() or str(bento_model.tag)
+    if request.method == "GET":
+        return JSONResponse(dict(await runner.status.async_run(), target=target))
+
+    body = await request.json()
+    if not isinstance(body, dict) or not body.get("model"):
+        return JSONResponse({"error": "The model tag is required."}, status_code=400)
+    try:
+        version = resolve_model(body["model"])
+    except BentoMLException as exception:
+        return JSONResponse({"error": str(exception)}, status_code=404)
+    if version == target:
+        return JSONResponse({"target": target, "started": False}, status_code=409)
+    model_marker.write(version)
+    return JSONResponse({"target": version, "started": True}, status_code=202)
+
+
+svc.mount_asgi_app(
+    Starlette(routes=[Route("/model", admin_model, methods=["GET", "POST"])]),
+    path="/admin",
+)
+
+# the services of BentoML versions with lifecycle hooks warm up at startup, the others at the first readiness check
+if hasattr(svc, "on_startup"):
+
+    @svc.on_startup
+    async def start_warm_up(_context):
+        """Starts the warm-up in the event loop of the API server."""
+        warm_up.start()
+
+
+def read_upload(stream: io.BytesIO[Any]):
+    """
+    Converts an uploaded PDF file to text.
+
+    Raises:
+        BentoMLException: If the input file is not a PDF file.
+    """
+    with stream as pdf_stream:
+        pdf = read_pdf(pdf_stream, filename="upload")
+
+    if not pdf.is_valid:
+        raise BentoMLException("The file is not a PDF file.")
+    bentoml_logger.info(f"Processed {pdf.number_of_pages} pages")
+
+    return pdf
+
+
+def request_keyword_set(ctx: bentoml.Context):
+    """
+    Returns the compiled keyword set of a request: the named keyword set of the `X-Keyword-Set` header (see
+    `read_keyword_set`), the comma-separated keywords of the `X-Keywords` header, or else the domain keywords.
+
+    Raises:
+        BentoMLException: If the keyword set does not exist or is empty.
+    """
+    headers = ctx.request.headers
+    if "X-Keyword-Set" in headers:
+        try:
+            keywords = read_keyword_set(headers["X-Keyword-Set"])[0]
+        except ValueError as exception:
+            raise BentoMLException(str(exception)) from exception
+    elif "X-Keywords" in headers:
+        keywords = [
+            keyword.strip()
+            for keyword in headers["X-Keywords"].split(",")
+            if keyword.strip()
+        ]
+    else:
+        keywords = domain_keywords
+
+    if not keywords:
+        raise BentoMLException("The keyword set is empty.")
+    return keyword_sets.get(keywords)
+
+
+def runner_input(payload, keyword_set):
+    """
+    Returns the input of the runner for a token payload: the payload with the keywords it was encoded with, also for
+    the domain keywords, as the model served can be swapped for a model with other domain keywords.
+    """
+    return {"document": payload, "keywords": keyword_set.keywords}
+
+
+def run_model(model_input) -> float:
+    """
+    Scores a document with the runner.
+
+    Raises:
+        ServiceUnavailable: If the model rejected the document because its training queue is full (see
+            `training.admission.CpuBudget`), so that the client retries later.
+    """
+    result = runner.predict.run(model_input)
+    if is_rejection(result):
+        raise ServiceUnavailable(
+            f"The model is busy, retry later ({result['rejected']})."
+        )
+    return result
+
 
 @svc.api(input=File(), output=JSON())
-def classify(stream: io.BytesIO[Any]) -> str:
+def classify(stream: io.BytesIO[Any], ctx: bentoml.Context) -> str:
     """
     Classifies the text content of a PDF file using a pre-trained model.
 
     Args:
         stream (io.BytesIO): A byte stream containing the contents of the PDF file to classify.
+        ctx (bentoml.Context): The request context, whose headers can select the keyword set, see
+            `request_keyword_set`.
     Returns:
-        json: A score between the text content of the PDF file vs the training corpus.
+        json: A score between the text content of the PDF file vs the training corpus. Documents rejected by the
+        pre-screening get a score of 0.0, `"rejected": true` and the screening result.
 
     Raises:
-        BentoMLException: If the input file is not a PDF file.
+        BentoMLException: If the input file is not a PDF file or the keyword set does not exist.
+        ServiceUnavailable: If the model is busy, see `run_model`.
     """
-    content = ""
-    reader = ""
-    with stream as pdf:
-        try:
-            reader = PdfReader(pdf)
-        except PdfReadError as exc:
-            raise BentoMLException("The file is not a PDF file.") from exc
+    keyword_set = request_keyword_set(ctx)
+    pdf = read_upload(stream)
+
+    tokens = clean_text(pdf.content)
 
-        for page_num, page in enumerate(reader.pages):
-            bentoml_logger.info(f"Processing page {page_num+1}...")
-            content += page.extract_text()
+    screening = screen_document(tokens, keyword_set.keywords, pdf.number_of_pages)
+    if not screening["passed"]:
+        bentoml_logger.info(f"Document rejected by screening: {screening['reason']}")
+        return {"value": 0.0, "rejected": True, "screening": screening}
 
-    tokens = combined_text_cleaning(content)
-    # add ngrams
-    similarity_score = runner.predict.run(tokens)
+    # the document is tokenized once, here, and sent to the runner as a compact array of keyword ids
+    payload = encode_document(tokens, keyword_set.vocabulary, keyword_set.phrases)
+    similarity_score = run_model(runner_input(payload, keyword_set))
 
     bentoml_logger.info(f"Similarity score: {similarity_score}")
     return {"value": similarity_score}
+
+
+@svc.api(input=File(), output=JSON())
+def classify_progressive(stream: io.BytesIO[Any], ctx: bentoml.Context) -> str:
+    """
+    Classifies a PDF file like `classify`, extracting and scoring its pages in increments of doubling size and
+    stopping as soon as the score is stable or clearly above or below the decision threshold.
+
+    Args:
+        stream (io.BytesIO): A byte stream containing the contents of the PDF file to classify.
+        ctx (bentoml.Context): The request context, see `classify`.
+    Returns:
+        json: The score, the number of pages used, the early-exit status, the score of each increment, and whether
+            the pages after a corrupt page were left out (`partial`).
+
+    Raises:
+        BentoMLException: If the input file is not a PDF file or the keyword set does not exist.
+        ServiceUnavailable: If the model is busy, see `run_model`.
+    """
+    keyword_set = request_keyword_set(ctx)
+    with stream as pdf_stream:
+        pdf = open_pdf(pdf_stream, filename="upload")
+
+    result = score_progressively(
+        pdf.iter_pages(),
+        keyword_set.vocabulary,
+        lambda payload: run_model(runner_input(payload, keyword_set)),
+        phrases=keyword_set.phrases,
+    )
+    if not pdf.is_valid:
+        raise BentoMLException("The file is not a PDF file.")
+    # the pages after a page the backend could not parse are not scored
+    result["partial"] = pdf.partial
+
+    bentoml_logger.info(
+        f"Similarity score: {result['value']} on {result['pages']} pages "
+        f"(early exit: {result['exit_reason']})"
+    )
+    return result
+
+
+@svc.api(input=File(), output=JSON())
+def similar(stream: io.BytesIO[Any]) -> str:
+    """
+    Finds the papers of the training corpus most similar to a PDF file.
+
+    Args:
+        stream (io.BytesIO): A byte stream containing the contents of the PDF file.
+    Returns:
+        json: The ids of the most similar corpus papers with their cosine similarity, most similar first.
+
+    Raises:
+        BentoMLException: If the input file is not a PDF file or no corpus index is configured.
+    """
+    global corpus_index  # pylint: disable=W0603
+
+    if CORPUS_INDEX is None:
+        raise BentoMLException("The CORPUS_INDEX environment variable does not exist.")
+    if corpus_index is None:
+        corpus_index = load_index(CORPUS_INDEX)
+
+    pdf = read_upload(stream)
+    tokens = clean_text(pdf.content)
+    embedding = corpus_index.embed(tokens, vocabulary)
+    results = corpus_index.search(embedding, k=int(SIMILAR_TOP_K))
+
+    return {"similar": [{"id": paper, "score": score} for paper, score in results]}
@@ -1,10 +1,46 @@
 """Module for arXiv article download and pdf processing."""
 
+import importlib
 import logging
 
-from .arxiv_client import *
-from .pdf import *
-from .download import *
+# the submodules are imported on first access, so that using one of them (e.g. the pdf conversion when serving)
+# does not import the dependencies of the others (arxiv, parfive, requests)
+_SUBMODULES = ("store", "arxiv_client", "pdf", "download")
+
+_EXPORTS = {
+    "ArticleStore": "store",
+    "ArxivClient": "arxiv_client",
+    "ParfiveClientError": "arxiv_client",
+    "parse_arxiv_feed": "arxiv_client",
+    "BufferReader": "pdf",
+    "Pdf": "pdf",
+    "PdfBackend": "pdf",
+    "PdfBackendError": "pdf",
+    "get_pdf_backends": "pdf",
+    "ConversionTimeoutError": "download",
+    "articles_download": "download",
+    "articles_download_to_text": "download",
+    "convert_pdf_to_text": "download",
+    "convert_pdf_to_text_in_parallel": "download",
+    "convert_pdf_to_text_in_sequential": "download",
+    "convert_pdf_to_text_scheduled": "download",
+    "download_and_convert_shard": "download",
+    "shard_article_list": "download",
+}
+
+__all__ = list(_EXPORTS)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    submodules = [_EXPORTS[name]] if name in _EXPORTS else _SUBMODULES
+    for submodule in submodules:
+        module = importlib.import_module(f"{__name__}.{submodule}")
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,15 +2,44 @@
 
 import logging
 import os
+import re
+import time
+import xml.etree.ElementTree as ET
 
 import arxiv
+import requests
 import smart_open
 from parfive import Downloader
+from requests.adapters import HTTPAdapter
 from retry import retry
+from urllib3.util.retry import Retry
+
+from .store import ArticleStore
 
 PARFIVE_DELAY = os.getenv("PARFIVE_DELAY", "5")
 PARFIVE_BACKOFF = os.getenv("PARFIVE_BACKOFF", "2")
 
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_PAGE_SIZE = os.getenv("ARXIV_PAGE_SIZE", "100")
+ARXIV_PAGE_DELAY = os.getenv("ARXIV_PAGE_DELAY", "3")
+
+ATOM_NAMESPACE = {"atom": "http://www.w3.org/2005/Atom"}
+# the upper bound of the open-ended date ranges of the arXiv queries
+ARXIV_MAX_DATE = "999912312359"
+
+
+def arxiv_date(timestamp: str) -> str:
+    """
+    Converts an ISO-8601 timestamp of an arXiv feed to the date format of the arXiv query ranges, to the minute.
+
+    :param timestamp: The timestamp, e.g. ``2023-01-07T10:42:00Z``.
+    :type timestamp: str
+    :return: The date, e.g. ``202301071042``.
+    :rtype: str
+    """
+
+    return re.sub(r"\D", "", timestamp)[:12]
+
 
 class ParfiveClientError(Exception):
     """
@@ -27,28 +56,56 @@ class ArxivClient:
     :param max_connection: The maximum number of connections to use for downloading articles.
     :type max_connection: int
     :param max_results: The maximum number of search results to retrieve from arXiv.
-    :type max_results: float
+    :type max_results: int
     """
 
     max_connection: int
     urls: list
-    max_results: float
+    max_results: int
 
-    def __init__(self, max_connection: int, max_results: float):
+    def __init__(self, max_connection: int, max_results: int):
         """
         Initializes the ArxivClient object with the given max_connection and max_results values.
 
         :param max_connection: The maximum number of connections to use for downloading articles.
         :type max_connection: int
         :param max_results: The maximum number of search results to retrieve from arXiv.
-        :type max_results: float
+        :type max_results: int
         """
 
         self.max_connection = max_connection
         self.max_results = max_results
         self.urls = []
+        self.session = None
         self.logger = logging.getLogger(__name__)
 
+    def get_session(self) -> requests.Session:
+        """
+        Returns the HTTP session shared by all the requests of this client, creating it on first use.
+
+        The session keeps up to ``max_connection`` pooled connections alive and retries transient errors, so paging
+        through the arXiv API does not pay a new TCP/TLS handshake for every batch.
+
+        :return: The shared HTTP session.
+        :rtype: requests.Session
+        """
+
+        if self.session is None:
+            adapter = HTTPAdapter(
+                pool_connections=self.max_connection,
+                pool_maxsize=self.max_connection,
+                max_retries=Retry(
+                    total=int(PARFIVE_BACKOFF) + 1,
+                    backoff_factor=float(PARFIVE_BACKOFF),
+                    status_forcelist=(429, 500, 502, 503, 504),
+                ),
+            )
+            self.session = requests.Session()
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+        return self.session
+
     def query(self, query: str):
         """
         Executes a query to arXiv and appends the URLs of the resulting articles to the object's list of URLs.
@@ -65,6 +122,104 @@ class ArxivClient:
         for article in arxiv_client.results():
             self.urls.append(article.pdf_url + ".pdf")
 
+    def query_incremental(
+        self,
+        query: str,
+        store: ArticleStore,
+        page_size: int = int(ARXIV_PAGE_SIZE),
+        page_delay: float = float(ARXIV_PAGE_DELAY),
+        api_url: str = ARXIV_API_URL,
+    ) -> int:
+        """
+        Executes a query to arXiv requesting only the entries updated since the watermark recorded in the store for the
+        same query, and appends the URLs of the new or revised articles to the object's list of URLs.
+
+        Entries are requested in pages of ``page_size`` sorted by last update date, oldest first, with a
+        ``lastUpdatedDate`` range starting at the minute of the watermark, so that a harvest truncated by
+        ``max_results`` still advances the watermark to the last entry it harvested and the next harvest resumes from
+        there. The entries updated in the minute of the watermark are harvested again, as the store skips the versions
+        it already has.
+
+        :param query: The query to execute on arXiv.
+        :type query: str
+        :param store: The local store of harvested articles and watermarks.
+        :type store: ArticleStore
+        :param page_size: The number of entries requested per page.
+        :type page_size: int
+        :param page_delay: The delay in seconds between two page requests, as required by the arXiv API terms of use.
+        :type page_delay: float
+        :param api_url: The URL of the arXiv API query endpoint.
+        :type api_url: str
+        :return: The number of new or revised articles.
+        :rtype: int
+        """
+
+        watermark = store.get_watermark(query)
+        self.logger.info(f"Harvesting arXiv query {query!r} after watermark {watermark}")
+
+        search_query = query
+        if watermark is not None:
+            search_query = f"({query}) AND lastUpdatedDate:[{arxiv_date(watermark)} TO {ARXIV_MAX_DATE}]"
+
+        session = self.get_session()
+        harvested = []
+        start = 0
+        complete = False
+        while not complete and start < self.max_results:
+            if start > 0 and page_delay > 0:
+                time.sleep(page_delay)
+
+            requested = min(page_size, self.max_results - start)
+            response = session.get(
+                api_url,
+                params={
+                    "search_query": search_query,
+                    "start": start,
+                    "max_results": requested,
+                    "sortBy": "lastUpdatedDate",
+                    "sortOrder": "ascending",
+                },
+                timeout=30,
+            )
+            response.raise_for_status()
+
+            entries = parse_arxiv_feed(response.content)
+            harvested.extend(entries)
+            complete = len(entries) < requested
+            start += len(entries)
+
+        changed = store.upsert_articles(harvested)
+        for article in changed:
+            self.urls.append(article["pdf_url"] + ".pdf")
+
+        if harvested:
+            store.set_watermark(query, max(entry["updated"] for entry in harvested))
+        if not complete:
+            self.logger.warning(
+                f"Harvest truncated at {self.max_results} results, the next harvest resumes from the watermark "
+                f"{store.get_watermark(query)}"
+            )
+
+        self.logger.info(
+            f"Harvested {len(harvested)} entries in {start} results, {len(changed)} new or revised articles"
+        )
+        return len(changed)
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Downloads a single article from arXiv into memory using the shared HTTP session.
+
+        :param url: The URL of the article PDF.
+        :type url: str
+        :return: The content of the PDF.
+        :rtype: bytes
+        """
+
+        self.logger.info(f"Fetching arXiv article from URL {url}")
+        response = self.get_session().get(url, timeout=60)
+        response.raise_for_status()
+        return response.content
+
     @retry(ParfiveClientError, delay=PARFIVE_DELAY, backoff=PARFIVE_BACKOFF)
     def get(self, path: str) -> list:
         """
@@ -131,3 +286,37 @@ class ArxivClient:
             self.logger.exception(
                 f"Unable to read article list on {path}", exc_info=exception
             )
+
+
+def parse_arxiv_feed(content: bytes) -> list:
+    """
+    Parses an Atom feed returned by the arXiv API into a list of article metadata.
+
+    :param content: The raw Atom feed.
+    :type content: bytes
+    :return: A list of dictionaries with the keys ``article_id``, ``version``, ``pdf_url``, ``published`` and
+        ``updated``.
+    :rtype: list
+    """
+
+    articles = []
+    for entry in ET.fromstring(content).findall("atom:entry", ATOM_NAMESPACE):
+        entry_id = entry.findtext("atom:id", "", ATOM_NAMESPACE).rsplit("/abs/", 1)[-1]
+        match = re.match(r"^(.+?)(?:v(\d+))?$", entry_id)
+
+        pdf_url = ""
+        for link in entry.findall("atom:link", ATOM_NAMESPACE):
+            if link.get("title") == "pdf":
+                pdf_url = link.get("href").replace("http://", "https://", 1)
+
+        articles.append(
+            {
+                "article_id": match.group(1),
+                "version": int(match.group(2) or 1),
+                "pdf_url": pdf_url,
+                "published": entry.findtext("atom:published", "", ATOM_NAMESPACE),
+                "updated": entry.findtext("atom:updated", "", ATOM_NAMESPACE),
+            }
+        )
+
+    return articles
@@ -0,0 +1,72 @@
+"""
+Zstandard compression of the text files and of the corpus. The ".zst" extension is optional: it needs the zstandard
+package, which is not a dependency of the project.
+"""
+
+import importlib.util
+import logging
+import sys
+
+import smart_open
+import smart_open.compression
+
+logger = logging.getLogger(__name__)
+
+
+def zstd_compress(data: bytes) -> bytes:
+    """Compresses data to one zstd frame."""
+
+    import zstandard  # pylint: disable=C0415
+
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def zstd_decompress(data: bytes) -> bytes:
+    """Decompresses zstd data, made of one or more frames."""
+
+    import zstandard  # pylint: disable=C0415
+
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _handle_zstd(file_obj, mode: str, **kwargs):
+    """Opens a zstd stream with the zstandard package, for the versions of smart_open without zstd support."""
+
+    import zstandard  # pylint: disable=C0415
+
+    if "r" in mode:
+        # a block-compressed file is a sequence of frames
+        return zstandard.ZstdDecompressor().stream_reader(
+            file_obj, read_across_frames=True, closefd=True
+        )
+    return zstandard.ZstdCompressor().stream_writer(file_obj, closefd=True)
+
+
+def _has_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _native_zstd_available() -> bool:
+    """Whether the zstd module of the standard library, or its backport, used by recent smart_open is installed."""
+
+    if sys.version_info >= (3, 14):
+        return _has_module("compression.zstd")
+    return _has_module("backports.zstd")
+
+
+def register_zstd():
+    """
+    Registers the ".zst" compressor of smart_open with the zstandard package, unless smart_open supports the
+    extension with a zstd module that is installed.
+    """
+
+    if (
+        ".zst" in smart_open.compression.get_supported_extensions()
+        and _native_zstd_available()
+    ):
+        return
+    smart_open.register_compressor(".zst", _handle_zstd)
+    logger.debug("Registered the zstandard compressor of smart_open")
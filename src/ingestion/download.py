@@ -1,23 +1,48 @@
 """Download and conversion module."""
 
+import json
 import logging
 import multiprocessing as mp
 import os
+import resource
+import shutil
+import signal
 import timeit
 from collections import UserList
-from itertools import repeat
 from pathlib import Path
 
-from ingestion import ArxivClient, Pdf
+import smart_open
+
+from ingestion import ArticleStore, ArxivClient, Pdf
+from ingestion.pdf import TEXT_COMPRESSION
 from preparation.clean import combined_text_cleaning
 
+CONVERSION_TIMEOUT = os.getenv("CONVERSION_TIMEOUT", "300")
+CONVERSION_MAX_MEMORY = os.getenv("CONVERSION_MAX_MEMORY", "2048")
+CONVERSION_MAX_TASKS_PER_CHILD = os.getenv("CONVERSION_MAX_TASKS_PER_CHILD", "25")
+CONVERSION_GRACE = os.getenv("CONVERSION_GRACE", "60")
+INGESTION_SHARDS = os.getenv("INGESTION_SHARDS", "8")
+
 logger = logging.getLogger(__name__)
 
+# the queue where a conversion worker reports the files it starts, set by `_init_conversion_worker`
+_started_files = None
+
+
+class ConversionTimeoutError(BaseException):
+    """
+    An exception class that is raised inside a conversion worker when a PDF file exceeds its wall-clock timeout.
+
+    It derives from BaseException so that the generic exception handlers inside the PDF parser cannot swallow it.
+    """
+
 
 def articles_download(
     urls_file_path: str,
     pdf_output_directory: str,
     arxiv_query: str = "",
+    max_results: int = 10,
+    store_path: str = None,
 ) -> UserList:
     """
     Downloads a list of articles from arXiv and saves their PDF files to the given output directory.
@@ -28,6 +53,11 @@ def articles_download(
     :type pdf_output_directory: str
     :param arxiv_query: An optional query string to use when downloading articles from arXiv.
     :type arxiv_query: str
+    :param max_results: The maximum number of search results to retrieve from arXiv.
+    :type max_results: int
+    :param store_path: An optional path of the local article store; when given, the arXiv query is harvested
+        incrementally and only the articles newer than the last harvest are downloaded.
+    :type store_path: str
     :return: A list of Parfive download results.
     :rtype: UserList
     """
@@ -35,9 +65,21 @@ def articles_download(
     if not os.path.exists(pdf_output_directory):
         os.makedirs(pdf_output_directory)
 
-    arxiv_client = ArxivClient(max_connection=2, max_results=10)
+    arxiv_client = ArxivClient(max_connection=2, max_results=max_results)
+
+    if store_path is not None and arxiv_query:
+        logger.info("Incremental download from arXiv with an arXiv query")
+        with ArticleStore(store_path) as store:
+            arxiv_client.query_incremental(arxiv_query, store)
+            harvested_urls = [url + ".pdf" for url in store.pdf_urls()]
+
+        # the article list keeps every harvested article, only the new ones are downloaded
+        new_urls = arxiv_client.urls
+        arxiv_client.urls = harvested_urls
+        arxiv_client.save_article_url_to_file(urls_file_path)
+        arxiv_client.urls = new_urls
 
-    if os.path.exists(urls_file_path):
+    elif os.path.exists(urls_file_path):
         logger.info("Download from arXiv with a list of article from file")
         arxiv_client.load_article_url_from_file(urls_file_path)
 
@@ -51,25 +93,62 @@ def articles_download(
     arxiv_client.get(pdf_output_directory)
 
 
-def convert_pdf_to_text(pdf_file_path: str, txt_output_directory: str):
+def convert_pdf_to_text(
+    pdf_file_path, txt_output_directory: str, filename: str = None
+):
     """
     Converts a PDF file into text and saves it to a file in the given output directory.
 
-    :param pdf_file_path: The path of the PDF file to convert.
+    :param pdf_file_path: The path of the PDF file to convert, or its content as bytes or an open buffer.
     :type pdf_file_path: str
     :param txt_output_directory: The directory where the output text file should be saved.
     :type txt_output_directory: str
+    :param filename: The name of the output text file without extension, by default the name of the PDF file.
+    :type filename: str
     """
 
     if not os.path.exists(txt_output_directory):
         os.makedirs(txt_output_directory)
 
-    pdf_file = Pdf(pdf_file_path)
+    pdf_file = Pdf(pdf_file_path, filename=filename)
     pdf_file.to_text()
     pdf_file.content = combined_text_cleaning(pdf_file.content)
     pdf_file.save(destination_path=txt_output_directory)
 
 
+def articles_download_to_text(urls_file_path: str, txt_output_directory: str):
+    """
+    Downloads a list of articles from arXiv and converts them straight from memory to text files in the given output
+    directory, without writing the PDF files to disk. Articles whose text file already exists are skipped.
+
+    :param urls_file_path: The path of the file containing the list of article URLs.
+    :type urls_file_path: str
+    :param txt_output_directory: The directory where the output text files should be saved.
+    :type txt_output_directory: str
+    """
+
+    arxiv_client = ArxivClient(max_connection=2, max_results=10)
+    arxiv_client.load_article_url_from_file(urls_file_path)
+
+    start = timeit.default_timer()
+    for url in arxiv_client.urls:
+        filename = Path(url).stem
+        if os.path.exists(
+            os.path.join(txt_output_directory, filename + ".txt" + TEXT_COMPRESSION)
+        ):
+            continue
+
+        try:
+            content = arxiv_client.fetch(url)
+        except OSError as exception:
+            logger.exception(f"Unable to download {url}", exc_info=exception)
+            continue
+
+        convert_pdf_to_text(content, txt_output_directory, filename=filename)
+    stop = timeit.default_timer()
+    logger.info(f"Elapsed time for download and conversion: {stop - start}")
+
+
 def convert_pdf_to_text_in_sequential(
     pdf_input_directory: str, txt_output_directory: str
 ):
@@ -90,26 +169,330 @@ def convert_pdf_to_text_in_sequential(
     logger.info(f"Elapsed time for conversion: {stop - start}")
 
 
-def convert_pdf_to_text_in_parallel(
-    pdf_input_directory: str, txt_output_directory: str
-):
+def _raise_conversion_timeout(signum, frame):
+    """Signal handler for the per-file wall-clock timeout."""
+
+    # pylint: disable=W0613
+    raise ConversionTimeoutError()
+
+
+def _address_space_size() -> int:
+    """Returns the current virtual address space size of the process in bytes, or 0 when it is not available."""
+
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        return 0
+
+
+def _init_conversion_worker(max_memory: int, started=None):
     """
-    Converts all PDF files in a given input directory to text files in the given output directory, in parallel mode.
+    Initializes a conversion worker: installs the timeout handler and caps the memory the worker can allocate.
+
+    :param max_memory: The memory, in MB, that the worker can allocate on top of its size at startup (0 for no cap).
+    :type max_memory: int
+    :param started: The queue where the worker reports the files it starts converting.
+    :type started: multiprocessing.SimpleQueue
+    """
+
+    global _started_files  # pylint: disable=W0603
+
+    _started_files = started
+    signal.signal(signal.SIGALRM, _raise_conversion_timeout)
+
+    if max_memory > 0:
+        limit = _address_space_size() + max_memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _convert_pdf_to_text_with_limits(
+    pdf_file_path: str, txt_output_directory: str, timeout: float
+) -> dict:
+    """
+    Converts a PDF file into text within a wall-clock timeout, reporting failures instead of raising them.
+
+    :param pdf_file_path: The path of the PDF file to convert.
+    :type pdf_file_path: str
+    :param txt_output_directory: The directory where the output text file should be saved.
+    :type txt_output_directory: str
+    :param timeout: The wall-clock timeout in seconds (0 for no timeout).
+    :type timeout: float
+    :return: The conversion report of the file.
+    :rtype: dict
+    """
+
+    status = "converted"
+    error = None
+    start = timeit.default_timer()
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        convert_pdf_to_text(pdf_file_path, txt_output_directory)
+    except ConversionTimeoutError:
+        status = "timeout"
+        error = f"Conversion exceeded {timeout} seconds"
+    except MemoryError:
+        status = "memory"
+        error = "Conversion exceeded the memory cap"
+    # pylint: disable=W0718
+    except Exception as exception:
+        status = "failed"
+        error = repr(exception)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    stop = timeit.default_timer()
+
+    return {
+        "file": pdf_file_path,
+        "size": os.path.getsize(pdf_file_path),
+        "status": status,
+        "seconds": stop - start,
+        "error": error,
+    }
+
+
+def _convert_pdf_to_text_task(task: tuple) -> dict:
+    """Unpacks a conversion task for `Pool.imap_unordered`, reporting the start of the conversion."""
+
+    if _started_files is not None:
+        _started_files.put(task[0])
+    return _convert_pdf_to_text_with_limits(*task)
+
+
+def _run_conversion_pool(
+    pdfs: list,
+    txt_output_directory: str,
+    processes: int,
+    timeout: float,
+    max_memory: int,
+    max_tasks_per_child: int,
+) -> tuple:
+    """
+    Converts PDF files in a pool of workers until they are all converted or no conversion completes in time.
+
+    :return: The conversion reports of the completed files by file, and the files started but not completed.
+    :rtype: tuple
+    """
+
+    files = {}
+    started = mp.SimpleQueue()
+    with mp.Pool(
+        processes,
+        initializer=_init_conversion_worker,
+        initargs=(max_memory, started),
+        maxtasksperchild=max_tasks_per_child,
+    ) as pool:
+        results = pool.imap_unordered(
+            _convert_pdf_to_text_task,
+            [(pdf, txt_output_directory, timeout) for pdf in pdfs],
+            chunksize=1,
+        )
+        watchdog = timeout + float(CONVERSION_GRACE) if timeout > 0 else None
+        for _ in pdfs:
+            try:
+                # a worker killed by the OS loses its task: stop waiting once no file completes in time
+                file_report = results.next(timeout=watchdog)
+            except mp.TimeoutError:
+                logger.error("No conversion completed within the timeout, stopping")
+                break
+            files[file_report["file"]] = file_report
+
+        running = set()
+        while not started.empty():
+            running.add(started.get())
+    return files, sorted(running - files.keys())
+
+
+def convert_pdf_to_text_scheduled(
+    pdf_input_directory: str,
+    txt_output_directory: str,
+    quarantine_directory: str = None,
+    report_path: str = None,
+    processes: int = None,
+    timeout: float = float(CONVERSION_TIMEOUT),
+    max_memory: int = int(CONVERSION_MAX_MEMORY),
+    max_tasks_per_child: int = int(CONVERSION_MAX_TASKS_PER_CHILD),
+) -> dict:
+    """
+    Converts all PDF files in a given input directory to text files in the given output directory, with a pool of
+    workers that never lets a single file stall or abort the whole batch.
+
+    Files are dispatched largest first so that the longest conversions do not start last and stretch the tail, each
+    file runs under a wall-clock timeout and a memory cap, and workers are recycled after a fixed number of files.
+    Files that fail are moved to the quarantine directory, if any, so that the next run does not retry them.
+
+    When no conversion completes within the timeout, e.g. because a worker was killed by the OS, the pool is stopped:
+    the files that were being converted are reported as lost, and the files not started yet are converted in a new
+    pool.
 
     :param pdf_input_directory: The directory containing the PDF files to convert.
     :type pdf_input_directory: str
     :param txt_output_directory: The directory where the output text files should be saved.
     :type txt_output_directory: str
+    :param quarantine_directory: The directory where the PDF files that fail to convert are moved.
+    :type quarantine_directory: str
+    :param report_path: The path of the JSON file where the conversion report should be saved.
+    :type report_path: str
+    :param processes: The number of worker processes, by default the number of CPUs.
+    :type processes: int
+    :param timeout: The wall-clock timeout in seconds for the conversion of a single file.
+    :type timeout: float
+    :param max_memory: The memory in MB a worker can allocate on top of its size at startup (0 for no cap).
+    :type max_memory: int
+    :param max_tasks_per_child: The number of files a worker converts before being replaced by a fresh one.
+    :type max_tasks_per_child: int
+    :return: The conversion report, with the per-file timings sorted by dispatch order.
+    :rtype: dict
     """
 
-    pdfs = []
-    for file in Path(pdf_input_directory).glob("*.pdf"):
-        pdfs.append(str(file.absolute()))
+    pdfs = sorted(
+        (str(file.absolute()) for file in Path(pdf_input_directory).glob("*.pdf")),
+        key=os.path.getsize,
+        reverse=True,
+    )
 
+    files = {}
+    pending = pdfs
     start = timeit.default_timer()
-    with mp.Pool() as pool:
-        pool.starmap(
-            convert_pdf_to_text, zip(pdfs, repeat(txt_output_directory)), chunksize=1
+    while pending:
+        completed, running = _run_conversion_pool(
+            pending,
+            txt_output_directory,
+            processes,
+            timeout,
+            max_memory,
+            max_tasks_per_child,
         )
+        files.update(completed)
+        for pdf in running:
+            files[pdf] = {
+                "file": pdf,
+                "size": os.path.getsize(pdf),
+                "status": "lost",
+                "seconds": None,
+                "error": "The conversion did not complete or the worker converting the file exited",
+            }
+
+        pending = [pdf for pdf in pending if pdf not in files]
+        if pending and not running:
+            # a new pool would stall the same way
+            logger.error(f"Stopping with {len(pending)} files not converted")
+            break
+        if pending:
+            logger.info(f"Converting the {len(pending)} files not started in a new pool")
     stop = timeit.default_timer()
-    logger.info(f"Elapsed time for conversion: {stop - start}")
+
+    report = {"elapsed": stop - start, "files": []}
+    for pdf in pdfs:
+        file_report = files.get(pdf) or {
+            "file": pdf,
+            "size": os.path.getsize(pdf),
+            "status": "skipped",
+            "seconds": None,
+            "error": None,
+        }
+        report["files"].append(file_report)
+        report[file_report["status"]] = report.get(file_report["status"], 0) + 1
+
+        # the files not started are left in place for the next run
+        if file_report["status"] not in ("converted", "skipped"):
+            logger.error(f"Conversion of {pdf} failed: {file_report['error']}")
+            if quarantine_directory is not None:
+                if not os.path.exists(quarantine_directory):
+                    os.makedirs(quarantine_directory)
+                file_report["quarantine"] = os.path.join(
+                    quarantine_directory, os.path.basename(pdf)
+                )
+                shutil.move(pdf, file_report["quarantine"])
+
+    logger.info(
+        f"Elapsed time for conversion: {report['elapsed']}, converted {report.get('converted', 0)} of {len(pdfs)}"
+    )
+
+    if report_path is not None:
+        with smart_open.open(report_path, "w", encoding="utf-8") as filehandle:
+            json.dump(report, filehandle, indent=2)
+
+    return report
+
+
+def convert_pdf_to_text_in_parallel(
+    pdf_input_directory: str, txt_output_directory: str
+) -> dict:
+    """
+    Converts all PDF files in a given input directory to text files in the given output directory, in parallel mode.
+
+    :param pdf_input_directory: The directory containing the PDF files to convert.
+    :type pdf_input_directory: str
+    :param txt_output_directory: The directory where the output text files should be saved.
+    :type txt_output_directory: str
+    :return: The conversion report, see `convert_pdf_to_text_scheduled`.
+    :rtype: dict
+    """
+
+    return convert_pdf_to_text_scheduled(pdf_input_directory, txt_output_directory)
+
+
+def shard_article_list(
+    urls_file_path: str, shard_directory: str, num_shards: int = int(INGESTION_SHARDS)
+) -> list:
+    """
+    Splits a list of article URLs into shards of (almost) the same size, one file per shard, so that each shard can be
+    downloaded and converted by a different worker.
+
+    Articles are dealt round-robin, so shards of a list sorted by date get articles of every period.
+
+    :param urls_file_path: The path of the file with the list of article URLs.
+    :type urls_file_path: str
+    :param shard_directory: The directory where the shard files should be saved.
+    :type shard_directory: str
+    :param num_shards: The maximum number of shards; no shard is created without articles.
+    :type num_shards: int
+    :return: The paths of the shard files.
+    :rtype: list
+    """
+
+    with smart_open.open(urls_file_path, "r", encoding="utf-8") as filehandle:
+        urls = [url for url in filehandle.read().splitlines() if url.strip()]
+
+    if not os.path.exists(shard_directory):
+        os.makedirs(shard_directory)
+
+    shard_paths = []
+    for shard in range(min(num_shards, len(urls))):
+        shard_path = os.path.join(shard_directory, f"shard-{shard:04d}.txt")
+        with smart_open.open(shard_path, "w", encoding="utf-8") as filehandle:
+            for url in urls[shard::num_shards]:
+                filehandle.write(url + "\n")
+        shard_paths.append(shard_path)
+
+    logger.info(f"Split {len(urls)} articles into {len(shard_paths)} shards")
+    return shard_paths
+
+
+def download_and_convert_shard(
+    shard_file_path: str, pdf_output_directory: str, txt_output_directory: str
+) -> str:
+    """
+    Downloads the articles of a shard and converts them to text, in a subdirectory named after the shard of both the PDF
+    and the text output directories.
+
+    :param shard_file_path: The path of the shard file, see `shard_article_list`.
+    :type shard_file_path: str
+    :param pdf_output_directory: The directory where the shard PDF subdirectory should be created.
+    :type pdf_output_directory: str
+    :param txt_output_directory: The directory where the shard text subdirectory should be created.
+    :type txt_output_directory: str
+    :return: The directory of the text files of the shard.
+    :rtype: str
+    """
+
+    shard_name = Path(shard_file_path).stem
+    pdf_shard_directory = os.path.join(pdf_output_directory, shard_name) + "/"
+    txt_shard_directory = os.path.join(txt_output_directory, shard_name) + "/"
+
+    articles_download(shard_file_path, pdf_shard_directory)
+    report = convert_pdf_to_text_scheduled(pdf_shard_directory, txt_shard_directory)
+    logger.info(f"Shard {shard_name} converted in {report['elapsed']:.2f} seconds")
+
+    return txt_shard_directory
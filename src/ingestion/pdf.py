@@ -1,21 +1,215 @@
 """Pdf validation and conversion module."""
 
+import abc
+import functools
 import hashlib
+import importlib.util
+import io
 import logging
+import os
 from pathlib import Path
 
 import smart_open
 from pypdf import PdfReader
 from pypdf.errors import PdfReadError
 
+from ingestion.compression import register_zstd
+
+PDF_BACKENDS = os.getenv("PDF_BACKENDS", "pypdf")
+# the compression extension of the text files (".gz", or ".zst" with the zstandard package), empty to write plain text
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "")
+
+logger = logging.getLogger(__name__)
+
+
+class BufferReader(io.RawIOBase):
+    """
+    A read-only, seekable binary stream over a memoryview, so that a PDF held in any buffer can be parsed without
+    copying it into a BytesIO first.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.view = memoryview(buffer).cast("B")
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self.view[self.position : self.position + len(b)]
+        b[: len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = len(self.view) + offset
+        else:
+            raise ValueError(f"Invalid whence value: {whence}")
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+class PdfBackendError(Exception):
+    """Raised when a backend cannot extract the text of a PDF file."""
+
+
+class PdfBackend(abc.ABC):
+    """
+    A PDF text extraction backend: it turns the content of a PDF file into the text of its pages.
+    """
+
+    name: str = None
+    """name (str): The name of the backend, as used in the `PDF_BACKENDS` environment variable."""
+
+    def is_available(self) -> bool:
+        """
+        Checks if the library of the backend is installed.
+        """
+        return True
+
+    @abc.abstractmethod
+    def iter_pages(self, buffer):
+        """
+        Extracts the text of the pages of a PDF file one page at a time, raising a `PdfBackendError` if the file
+        cannot be parsed.
+
+        :param buffer: The content of the PDF file.
+        :type buffer: bytes, bytearray or memoryview
+        :return: An iterator over the text of the pages.
+        :rtype: iterator
+        """
+
+    def extract_pages(self, buffer) -> list:
+        """
+        Extracts the text of all the pages of a PDF file, see `iter_pages`.
+
+        :param buffer: The content of the PDF file.
+        :type buffer: bytes, bytearray or memoryview
+        :return: The text of each page.
+        :rtype: list
+        """
+        return list(self.iter_pages(buffer))
+
+
+class PypdfBackend(PdfBackend):
+    """
+    The default backend, based on the pure-Python pypdf library in strict mode.
+    """
+
+    name = "pypdf"
+
+    def iter_pages(self, buffer):
+        # BytesIO shares the memory of an immutable bytes object, other buffers are wrapped in a memoryview
+        if isinstance(buffer, bytes):
+            stream = io.BytesIO(buffer)
+        else:
+            stream = io.BufferedReader(BufferReader(buffer))
+
+        try:
+            pdf_file_obj = PdfReader(stream, strict=True)
+            for page in pdf_file_obj.pages:
+                yield page.extract_text()
+        except (OSError, PdfReadError) as error:
+            raise PdfBackendError(str(error)) from error
+
+
+class PymupdfBackend(PdfBackend):
+    """
+    A faster backend based on the MuPDF library, used only if the optional `pymupdf` package is installed.
+    """
+
+    name = "pymupdf"
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec("pymupdf") is not None
+
+    @staticmethod
+    def parse_errors(pymupdf) -> tuple:
+        """
+        Returns the exceptions raised by pymupdf on corrupt files: `FileDataError` (and `EmptyFileError`) when
+        opening them, and the `FzErrorBase` errors of MuPDF, which do not derive from `RuntimeError`, when reading
+        their pages.
+        """
+        errors = (pymupdf.FileDataError, RuntimeError, ValueError)
+        mupdf = getattr(pymupdf, "mupdf", None)
+        if hasattr(mupdf, "FzErrorBase"):
+            errors += (mupdf.FzErrorBase,)
+        return errors
+
+    def iter_pages(self, buffer):
+        import pymupdf  # pylint: disable=C0415
+
+        try:
+            with pymupdf.open(stream=buffer, filetype="pdf") as document:
+                for page in document:
+                    yield page.get_text()
+        except self.parse_errors(pymupdf) as error:
+            raise PdfBackendError(str(error)) from error
+
+
+PDF_BACKEND_CLASSES = {
+    backend_class.name: backend_class
+    for backend_class in (PypdfBackend, PymupdfBackend)
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_pdf_backends(names: tuple) -> tuple:
+    backends = []
+    for name in names:
+        if name not in PDF_BACKEND_CLASSES:
+            raise ValueError(
+                f"Unknown PDF backend: {name}, expected one of {', '.join(PDF_BACKEND_CLASSES)}"
+            )
+        backend = PDF_BACKEND_CLASSES[name]()
+        if backend.is_available():
+            backends.append(backend)
+        else:
+            logger.warning(f"Skipping the PDF backend {name}: it is not installed")
+
+    if not backends:
+        raise ValueError(f"None of the PDF backends {', '.join(names)} is available")
+    return tuple(backends)
+
+
+def get_pdf_backends(names=None) -> tuple:
+    """
+    Returns the chain of PDF backends to try in order, skipping the ones that are not installed.
+
+    :param names: The names of the backends, as a list or a comma-separated string, by default `PDF_BACKENDS`.
+    :type names: str or list
+    :return: The available backends, in the given order.
+    :rtype: tuple
+    """
+
+    if names is None:
+        names = PDF_BACKENDS
+    if isinstance(names, str):
+        names = names.split(",")
+    return _get_pdf_backends(tuple(name.strip() for name in names if name.strip()))
+
 
 class Pdf:
     """
     Represents a PDF file and provides methods for validation and conversion to text.
+
+    The PDF can be given as a path (local or any URI supported by smart_open), as bytes, bytearray or memoryview, or
+    as an open binary buffer. The document is read once and the same buffer is used for hashing and parsing.
     """
 
     path: str
-    """path (str): The path to the PDF file."""
+    """path (str): The path to the PDF file, None if the PDF was given as a buffer."""
     filename: str
     """filename (str): The name of the PDF file."""
     hash: str
@@ -24,45 +218,135 @@ class Pdf:
     """content (str): The text content of the PDF file."""
     number_of_pages: int
     """number_of_pages (int): The number of pages in the PDF file."""
+    is_valid: bool
+    """is_valid (bool): Whether the PDF file could be parsed."""
+    backend: str
+    """backend (str): The name of the backend that extracted the text, None if no backend could parse the file."""
+    partial: bool
+    """partial (bool): Whether `iter_pages` stopped on a page the backend could not parse."""
+
+    def __init__(self, source, filename: str = None):
+        self.path = None
+        self.buffer = None
+        if isinstance(source, (str, os.PathLike)):
+            self.path = source
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self.buffer = source
+        else:
+            # reading a whole BytesIO from the start returns its internal bytes object without copying
+            self.buffer = source.read()
 
-    def __init__(self, path):
-        self.path = path
+        if filename is None:
+            filename = Path(self.path or "document").stem
+        self.filename = filename
+        self.is_valid = False
+        self.partial = False
         self.logger = logging.getLogger(__name__)
 
-    def to_text(self):
+    def read(self):
         """
-        Convert the PDF to text and store the text content in the content attribute.
+        Returns the content of the PDF file, reading it only the first time.
         """
-        self.content = ""
-        with smart_open.open(self.path, "rb") as filehandle:
-            file_content = filehandle.read()
+        if self.buffer is None:
+            with smart_open.open(self.path, "rb") as filehandle:
+                self.buffer = filehandle.read()
 
-            self.hash = hashlib.sha256(file_content).hexdigest()
-            self.filename = Path(self.path).stem
-            self.content = ""
+        return self.buffer
 
-            try:
-                pdf_file_obj = PdfReader(filehandle, strict=True)
-            except OSError:
-                self.logger.error(f"The PDF file may be corrupt: {self.filename}.pdf")
+    def to_text(self, backends=None):
+        """
+        Convert the PDF to text and store the text content in the content attribute.
 
-            except PdfReadError:
-                self.logger.error(f"The PDF file may be corrupt: {self.filename}.pdf ")
+        The backends are tried in order until one of them parses the file.
 
+        :param backends: The names of the backends, as a list or a comma-separated string, by default `PDF_BACKENDS`.
+        :type backends: str or list
+        """
+        buffer = self.read()
+
+        self.hash = hashlib.sha256(buffer).hexdigest()
+        self.content = ""
+        self.is_valid = False
+        self.backend = None
+
+        for backend in get_pdf_backends(backends):
+            try:
+                pages = backend.extract_pages(buffer)
+            except PdfBackendError:
+                self.logger.error(
+                    f"The PDF file may be corrupt: {self.filename}.pdf ({backend.name})"
+                )
             else:
-                self.number_of_pages = len(pdf_file_obj.pages)
+                self.is_valid = True
+                self.backend = backend.name
+                self.number_of_pages = len(pages)
                 self.logger.info(
                     f"{self.filename}.pdf contains {self.number_of_pages} pages"
                 )
-                for i in range(self.number_of_pages):
-                    page = pdf_file_obj.pages[i]
-                    self.content += page.extract_text()
+                self.content = "".join(pages)
+                break
+
+    def iter_pages(self, backends=None):
+        """
+        Extracts the text of the PDF one page at a time, e.g. to score the first pages of a long document without
+        extracting the others. The backends are tried in order until one of them opens the file; `is_valid` and
+        `backend` are set once the first page is extracted. If the backend fails on a later page, the iteration stops
+        there and `partial` is set.
 
-    def save(self, destination_path: str):
+        :param backends: The names of the backends, as a list or a comma-separated string, by default `PDF_BACKENDS`.
+        :type backends: str or list
+        :return: An iterator over the text of the pages, empty if no backend could open the file.
+        :rtype: iterator
         """
-        Save the text content of the PDF file to a text file in the given destination directory.
+        buffer = self.read()
+
+        self.hash = hashlib.sha256(buffer).hexdigest()
+        self.is_valid = False
+        self.partial = False
+        self.backend = None
+
+        for backend in get_pdf_backends(backends):
+            try:
+                pages = iter(backend.iter_pages(buffer))
+                first_page = next(pages, None)
+            except PdfBackendError:
+                self.logger.error(
+                    f"The PDF file may be corrupt: {self.filename}.pdf ({backend.name})"
+                )
+                continue
+
+            self.is_valid = True
+            self.backend = backend.name
+            if first_page is None:
+                return
+            yield first_page
+            number_of_pages = 1
+            try:
+                for page in pages:
+                    yield page
+                    number_of_pages += 1
+            except PdfBackendError as error:
+                # the pages already yielded may have been used, the next backend would start over
+                self.partial = True
+                self.logger.error(
+                    f"The PDF file may be corrupt after page {number_of_pages}: {self.filename}.pdf "
+                    f"({backend.name}: {error})"
+                )
+            return
+
+    def save(self, destination_path: str, compression: str = TEXT_COMPRESSION):
+        """
+        Save the text content of the PDF file to a text file in the given destination directory, compressed by
+        smart_open according to the extension of the file.
+
+        :param destination_path: The destination directory.
+        :type destination_path: str
+        :param compression: The compression extension appended to `.txt`, e.g. `.gz` or `.zst`.
+        :type compression: str
         """
-        txt_file_path = destination_path + self.filename + ".txt"
+        txt_file_path = destination_path + self.filename + ".txt" + compression
+        if compression == ".zst":
+            register_zstd()
         self.logger.info(f"Saving text to file: {txt_file_path}")
 
         with smart_open.open(txt_file_path, "w", encoding="utf-8") as filehandle:
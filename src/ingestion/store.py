@@ -0,0 +1,165 @@
+"""Local SQLite store for harvested arXiv article metadata and harvest watermarks."""
+
+import logging
+import os
+import sqlite3
+
+
+class ArticleStore:
+    """
+    A local SQLite store of the arXiv articles seen by previous harvests, so that a new harvest only needs to request
+    entries newer than the last watermark recorded for the same query.
+
+    :param path: The path of the SQLite database file, created if it does not exist.
+    :type path: str
+    """
+
+    path: str
+    """path (str): The path of the SQLite database file."""
+
+    def __init__(self, path: str):
+        """
+        Opens (or creates) the SQLite database at the given path and makes sure the schema exists.
+
+        :param path: The path of the SQLite database file.
+        :type path: str
+        """
+
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS articles (
+                    article_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    pdf_url TEXT NOT NULL,
+                    published TEXT NOT NULL,
+                    updated TEXT NOT NULL
+                )
+                """
+            )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    query TEXT PRIMARY KEY,
+                    watermark TEXT NOT NULL
+                )
+                """
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connection to the SQLite database.
+        """
+
+        self.connection.close()
+
+    def upsert_articles(self, articles: list) -> list:
+        """
+        Inserts new articles and updates the ones for which a newer version has been harvested.
+
+        :param articles: A list of dictionaries with the keys ``article_id``, ``version``, ``pdf_url``, ``published``
+            and ``updated``.
+        :type articles: list
+        :return: The articles that were not in the store or that have a newer version than the stored one.
+        :rtype: list
+        """
+
+        changed = []
+        with self.connection:
+            for article in articles:
+                row = self.connection.execute(
+                    "SELECT version FROM articles WHERE article_id = ?",
+                    (article["article_id"],),
+                ).fetchone()
+                if row is not None and row[0] >= article["version"]:
+                    continue
+
+                self.connection.execute(
+                    """
+                    INSERT INTO articles (article_id, version, pdf_url, published, updated)
+                    VALUES (:article_id, :version, :pdf_url, :published, :updated)
+                    ON CONFLICT(article_id) DO UPDATE SET
+                        version = excluded.version,
+                        pdf_url = excluded.pdf_url,
+                        published = excluded.published,
+                        updated = excluded.updated
+                    """,
+                    article,
+                )
+                changed.append(article)
+
+        self.logger.info(
+            f"Stored {len(changed)} new or updated articles out of {len(articles)}"
+        )
+        return changed
+
+    def get_watermark(self, query: str):
+        """
+        Returns the watermark (the most recent ``updated`` timestamp harvested) for the given query.
+
+        :param query: The arXiv query the watermark refers to.
+        :type query: str
+        :return: The ISO-8601 watermark, or None if the query was never harvested.
+        :rtype: str
+        """
+
+        row = self.connection.execute(
+            "SELECT watermark FROM watermarks WHERE query = ?", (query,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_watermark(self, query: str, watermark: str):
+        """
+        Records the watermark for the given query.
+
+        :param query: The arXiv query the watermark refers to.
+        :type query: str
+        :param watermark: The ISO-8601 timestamp of the most recent harvested entry.
+        :type watermark: str
+        """
+
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO watermarks (query, watermark) VALUES (?, ?)
+                ON CONFLICT(query) DO UPDATE SET watermark = excluded.watermark
+                """,
+                (query, watermark),
+            )
+
+    def pdf_urls(self) -> list:
+        """
+        Returns the PDF URLs of all the articles in the store, most recently updated first.
+
+        :return: A list of PDF URLs.
+        :rtype: list
+        """
+
+        rows = self.connection.execute(
+            "SELECT pdf_url FROM articles ORDER BY updated DESC"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        """
+        Returns the number of articles in the store.
+
+        :return: The number of articles.
+        :rtype: int
+        """
+
+        return self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
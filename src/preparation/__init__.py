@@ -1,9 +1,50 @@
 """Module for cleaning, n-gramming and text conversion."""
 
+import importlib
 import logging
 
-from .clean import *
-from .convert import *
+# the submodules are imported on first access, so that the screening does not import the dependencies of the
+# cleaning (cleantext, gensim)
+_SUBMODULES = ("clean", "convert", "screening", "cache", "dedup", "payload", "keywords")
+
+_EXPORTS = {
+    "clean_stopwords_str": "clean",
+    "compile_phrases": "clean",
+    "combined_text_cleaning": "clean",
+    "get_bigram": "clean",
+    "get_bigram_from_vocabulary": "clean",
+    "iter_substitute_and_clean": "clean",
+    "split_text": "clean",
+    "substitute_and_clean_in_parallel": "clean",
+    "tokenize_for_training": "clean",
+    "create_text_corpus": "convert",
+    "create_text_corpus_from_shards": "convert",
+    "get_file_contents": "convert",
+    "screen_document": "screening",
+    "TokenizedCorpus": "cache",
+    "get_or_build_tokenized_corpus": "cache",
+    "MinHashIndex": "dedup",
+    "deduplicate_text_files": "dedup",
+    "decode_tokens": "payload",
+    "encode_tokens": "payload",
+    "KeywordSet": "keywords",
+    "KeywordSetCache": "keywords",
+    "keywords_digest": "keywords",
+}
+
+__all__ = list(_EXPORTS)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    submodules = [_EXPORTS[name]] if name in _EXPORTS else _SUBMODULES
+    for submodule in submodules:
+        module = importlib.import_module(f"{__name__}.{submodule}")
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
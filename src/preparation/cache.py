@@ -0,0 +1,154 @@
+"""Cache of tokenized corpora as memory-mapped integer arrays."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+VOCABULARY_FNAME = "vocabulary.json"
+TOKENS_FNAME = "tokens.npy"
+OFFSETS_FNAME = "offsets.npy"
+
+logger = logging.getLogger(__name__)
+
+
+class TokenizedCorpus:
+    """
+    A tokenized corpus stored as a vocabulary plus the `int32` ids of all the tokens, document after document, and the
+    offsets of the documents in the ids.
+
+    Iterating over the corpus yields the token lists of the documents, so it can be given as the sentences of
+    `Word2Vec.train` and iterated once per epoch.
+    """
+
+    vocabulary: list
+    """vocabulary (list): The tokens, in the order of their ids."""
+    tokens: np.ndarray
+    """tokens (np.ndarray): The int32 ids of the tokens of all the documents."""
+    offsets: np.ndarray
+    """offsets (np.ndarray): The int64 start of each document in `tokens`, followed by the number of tokens."""
+
+    def __init__(self, vocabulary: list, tokens: np.ndarray, offsets: np.ndarray):
+        self.vocabulary = vocabulary
+        self.tokens = tokens
+        self.offsets = offsets
+        self._words = np.array(vocabulary, dtype=object)
+
+    @classmethod
+    def build(cls, documents):
+        """
+        Builds a tokenized corpus.
+
+        Args:
+            documents (iterable): The token lists of the documents.
+
+        Returns:
+            TokenizedCorpus: The tokenized corpus.
+        """
+
+        token_to_id = {}
+        ids = []
+        offsets = [0]
+        for document in documents:
+            ids.extend(token_to_id.setdefault(token, len(token_to_id)) for token in document)
+            offsets.append(len(ids))
+
+        return cls(
+            list(token_to_id),
+            np.array(ids, dtype=np.int32),
+            np.array(offsets, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, document: int) -> list:
+        start, end = self.offsets[document], self.offsets[document + 1]
+        return self._words[self.tokens[start:end]].tolist()
+
+    def __iter__(self):
+        for document in range(len(self)):
+            yield self[document]
+
+    @property
+    def total_words(self) -> int:
+        """The number of tokens of the corpus."""
+        return int(self.offsets[-1])
+
+    def save(self, path: str):
+        """
+        Saves the corpus into a directory: the ids and offsets as .npy arrays and the vocabulary as JSON.
+
+        Args:
+            path (str): The path to the directory where the corpus will be saved.
+        """
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        np.save(os.path.join(path, TOKENS_FNAME), self.tokens)
+        np.save(os.path.join(path, OFFSETS_FNAME), self.offsets)
+        with open(os.path.join(path, VOCABULARY_FNAME), "w", encoding="utf-8") as outfile:
+            json.dump(self.vocabulary, outfile)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "r"):
+        """
+        Loads a corpus saved with `save`.
+
+        Args:
+            path (str): The path to the directory of the corpus.
+            mmap_mode (str): The numpy memory-map mode of the ids, None to load them in memory.
+
+        Returns:
+            TokenizedCorpus: The loaded corpus.
+        """
+
+        tokens = np.load(os.path.join(path, TOKENS_FNAME), mmap_mode=mmap_mode)
+        offsets = np.load(os.path.join(path, OFFSETS_FNAME))
+        with open(os.path.join(path, VOCABULARY_FNAME), "r", encoding="utf-8") as infile:
+            vocabulary = json.load(infile)
+        return cls(vocabulary, tokens, offsets)
+
+
+def get_or_build_tokenized_corpus(
+    cache_directory: str, key: str, tokenize
+) -> TokenizedCorpus:
+    """
+    Returns the tokenized corpus cached under a key, tokenizing and caching it on a miss.
+
+    Args:
+        cache_directory (str): The directory of the cache, one subdirectory per key.
+        key (str): The key of the corpus, e.g. a hash of the corpus and of the preprocessing configuration.
+        tokenize (callable): A function without arguments returning the token lists of the documents.
+
+    Returns:
+        TokenizedCorpus: The tokenized corpus, memory-mapped from the cache.
+    """
+
+    path = os.path.join(cache_directory, key)
+    if os.path.exists(path):
+        logger.info(f"Loading the tokenized corpus from the cache: {path}")
+        return TokenizedCorpus.load(path)
+
+    corpus = TokenizedCorpus.build(tokenize())
+
+    # the entry is written aside and renamed, so that an interrupted run never leaves a partial entry
+    os.makedirs(cache_directory, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=key + ".", dir=cache_directory)
+    try:
+        corpus.save(tmp_path)
+        os.rename(tmp_path, path)
+    except OSError:
+        # another run cached the same corpus in the meantime
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(path):
+            raise
+
+    logger.info(
+        f"Cached the tokenized corpus ({len(corpus)} documents, {corpus.total_words} tokens) in {path}"
+    )
+    return TokenizedCorpus.load(path)
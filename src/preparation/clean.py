@@ -1,6 +1,7 @@
 """Preparations functions."""
 
 import logging
+import multiprocessing as mp
 import re
 from functools import reduce
 
@@ -99,13 +100,40 @@ def get_bigram(tokens: list) -> list:
     return texts
 
 
-def get_bigram_from_vocabulary(vocabulary: list, text: str):
+# the characters that make a keyword a regular expression rather than a literal
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+
+def compile_phrases(vocabulary: list) -> list:
+    """
+    Compiles the substitutions of `get_bigram_from_vocabulary`, so that a keyword set used for many documents is
+    compiled once. The keywords whose substitution leaves any text unchanged (literal unigrams) are left out.
+
+    Args:
+        vocabulary (list): A list of n-grams, as given to `get_bigram_from_vocabulary`.
+
+    Returns:
+        list: The (compiled pattern, replacement) pairs, in the order of the vocabulary.
+    """
+
+    phrases = []
+    for word in [item for sublist in vocabulary for item in sublist]:
+        old_token = re.sub("_", " ", word)
+        if old_token == word and REGEX_METACHARACTERS.isdisjoint(word):
+            continue
+        phrases.append((re.compile(old_token), word))
+    return phrases
+
+
+def get_bigram_from_vocabulary(vocabulary: list, text: str, phrases: list = None):
     """
     Replaces unigrams in the given text with their corresponding bigrams from the vocabulary.
 
     Args:
         vocabulary (list): A list of n-grams
         text (str): The input text where unigrams will be replaced with bigrams.
+        phrases (list): The substitutions of the vocabulary compiled by `compile_phrases`, compiled on each call if
+            None.
 
     Returns:
         str: The input text with unigrams replaced by n-grams from the vocabulary.
@@ -116,13 +144,146 @@ def get_bigram_from_vocabulary(vocabulary: list, text: str):
         get_bigram_from_vocabulary(vocabulary, text)
     """
 
-    vocabulary_words = [item for sublist in vocabulary for item in sublist]
-
-    replace = []
-    for word in vocabulary_words:
-        replace.append((re.sub("_", " ", word), word))
+    if phrases is None:
+        phrases = compile_phrases(vocabulary)
 
-    for old_token, new_token in replace:
-        text = re.sub(old_token, new_token, text)
+    for pattern, new_token in phrases:
+        text = pattern.sub(new_token, text)
 
     return text
+
+
+def _covers(pattern: re.Pattern, text: str, position: int) -> bool:
+    """Checks if a match of a pattern starting anywhere in a text covers the given position."""
+
+    for start in range(position + 1):
+        match = pattern.match(text, start)
+        if match is not None and match.end() > position:
+            return True
+    return False
+
+
+def split_text(text: str, vocabulary: list, n_chunks: int) -> list:
+    """
+    Splits a text into chunks of about the same size at whitespace that no n-gram of the vocabulary can span, so that
+    `get_bigram_from_vocabulary` and `clean_stopwords_str` give the same tokens on the chunks as on the whole text.
+
+    Args:
+        vocabulary (list): A list of n-grams, as given to `get_bigram_from_vocabulary`.
+        text (str): The text to split.
+        n_chunks (int): The number of chunks; fewer are returned for texts without enough split points.
+
+    Returns:
+        list: The chunks, whose concatenation is the text.
+    """
+
+    patterns = [
+        re.compile(re.sub("_", " ", word))
+        for sublist in vocabulary
+        for word in sublist
+        if "_" in word
+    ]
+    width = max((len(pattern.pattern) for pattern in patterns), default=0)
+    whitespace = re.compile(r"\s")
+
+    chunks = []
+    start = 0
+    for chunk in range(1, n_chunks):
+        match = whitespace.search(text, max(start, len(text) * chunk // n_chunks))
+        while match is not None:
+            window_start = max(0, match.start() - width)
+            window = text[window_start : match.start() + width]
+            offset = match.start() - window_start
+            if not any(_covers(pattern, window, offset) for pattern in patterns):
+                break
+            match = whitespace.search(text, match.end())
+
+        if match is None:
+            break
+        if match.start() > start:
+            chunks.append(text[start : match.start()])
+            start = match.start()
+
+    chunks.append(text[start:])
+    return chunks
+
+
+def _substitute_and_clean(task: tuple) -> list:
+    """Joins the n-grams of the vocabulary and removes the stop words of a chunk, in a worker process."""
+
+    vocabulary, text = task
+    return clean_stopwords_str(get_bigram_from_vocabulary(vocabulary, text))[0]
+
+
+def iter_substitute_and_clean(
+    vocabulary: list, text: str, processes: int = None, chunks_per_process: int = 4
+):
+    """
+    Joins the n-grams of the vocabulary and removes the stop words of a text in a pool of processes, yielding the
+    tokens of the chunks of the text in order as soon as they are ready.
+
+    Args:
+        vocabulary (list): A list of n-grams, as given to `get_bigram_from_vocabulary`.
+        text (str): The text to preprocess.
+        processes (int): The number of worker processes, by default the number of CPUs.
+        chunks_per_process (int): The number of chunks per process, to balance the work between the processes.
+
+    Yields:
+        list: The tokens of each chunk.
+    """
+
+    processes = processes or mp.cpu_count()
+    chunks = split_text(text, vocabulary, processes * chunks_per_process)
+    logger.info(f"Preprocessing {len(chunks)} chunks with {processes} processes")
+
+    with mp.Pool(processes) as pool:
+        yield from pool.imap(
+            _substitute_and_clean, ((vocabulary, chunk) for chunk in chunks)
+        )
+
+
+def substitute_and_clean_in_parallel(
+    vocabulary: list, text: str, processes: int = None
+) -> list:
+    """
+    Parallel equivalent of `clean_stopwords_str(get_bigram_from_vocabulary(vocabulary, text))`.
+
+    Args:
+        vocabulary (list): A list of n-grams, as given to `get_bigram_from_vocabulary`.
+        text (str): The text to preprocess.
+        processes (int): The number of worker processes, by default the number of CPUs.
+
+    Returns:
+        list: A list with the list of tokens of the text.
+    """
+
+    tokens = []
+    for chunk_tokens in iter_substitute_and_clean(vocabulary, text, processes):
+        tokens.extend(chunk_tokens)
+    return [tokens]
+
+
+def tokenize_for_training(
+    text: str, vocabulary: list, processes: int = 1, phrases: list = None
+) -> list:
+    """
+    Tokenizes a cleaned document for training: joins the n-grams of the vocabulary, removes the stop words and adds
+    the bigrams detected in the document.
+
+    Args:
+        text (str): The cleaned text of the document.
+        vocabulary (list): A list of domain-specific keywords, as returned by `get_domain_keywords`.
+        processes (int): The number of processes joining the n-grams and removing the stop words, on chunks of the
+        document; the tokens are the same as with one process. The bigram detection is sequential.
+        phrases (list): The n-grams of the vocabulary compiled by `compile_phrases`, for a single process.
+
+    Returns:
+        list: A list with the list of tokens of the document.
+    """
+
+    if processes > 1:
+        tokens = substitute_and_clean_in_parallel(vocabulary, text, processes)
+    else:
+        text = get_bigram_from_vocabulary(vocabulary, text, phrases)
+        tokens = clean_stopwords_str(text)
+    return get_bigram(tokens)
@@ -1,20 +1,168 @@
 """Module for reading text files and converting them to a corpus of text documents."""
 
+import gzip
+import io
+import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import smart_open
 
+from ingestion.compression import register_zstd, zstd_compress, zstd_decompress
+
+CORPUS_BLOCK_SIZE = os.getenv("CORPUS_BLOCK_SIZE", str(16 << 20))
+
+# the text files can be compressed, the compression is chosen by smart_open from the extension
+TEXT_EXTENSIONS = (".txt", ".txt.gz", ".txt.zst", ".txt.bz2")
+BLOCK_INDEX_SUFFIX = ".blocks.json"
+
 logger = logging.getLogger(__name__)
 
 
-def get_file_contents(file_path: str) -> str:
+register_zstd()
+
+# the formats whose concatenated streams (gzip members, zstd frames) decompress to the concatenated data
+BLOCK_CODECS = {
+    ".gz": (gzip.compress, gzip.decompress),
+    ".zst": (zstd_compress, zstd_decompress),
+}
+
+
+def list_text_files(directory: str, recursive: bool = False) -> list:
+    """
+    Lists the text files of a directory, compressed or not.
+
+    Args:
+        directory (str): The path to the directory.
+        recursive (bool): Whether to list the text files of the subdirectories too.
+
+    Returns:
+        list: The paths of the text files, sorted.
+    """
+
+    files = Path(directory).rglob("*") if recursive else Path(directory).glob("*")
+    return sorted(file for file in files if file.name.endswith(TEXT_EXTENSIONS))
+
+
+def text_file_stem(file_path) -> str:
+    """
+    Returns the name of a text file without the text and the compression extensions, e.g. `2103.01035` for
+    `2103.01035.txt.zst`.
+    """
+
+    name = Path(file_path).name
+    for extension in TEXT_EXTENSIONS:
+        if name.endswith(extension):
+            return name[: -len(extension)]
+    return Path(file_path).stem
+
+
+class BlockCompressedWriter:
+    """
+    A binary writer compressing its data in independent blocks (gzip members or zstd frames), with a JSON index of the
+    offsets of the blocks next to the file, so that the blocks can be decompressed in parallel by
+    `read_block_compressed`. The file itself is a regular compressed file, readable by any decompressor.
+    """
+
+    def __init__(self, file_path: str, block_size: int = int(CORPUS_BLOCK_SIZE)):
+        self.file_path = str(file_path)
+        self.compress = BLOCK_CODECS[Path(self.file_path).suffix][0]
+        self.block_size = block_size
+        self.blocks = []
+        self._buffer = bytearray()
+        self._offset = 0
+        self._file = smart_open.open(self.file_path, "wb", compression="disable")
+
+    def write(self, data: bytes):
+        """Writes data, compressing the full blocks."""
+
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._write_block(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+
+    def _write_block(self, data: bytes):
+        block = self.compress(data)
+        self._file.write(block)
+        self.blocks.append([self._offset, len(block)])
+        self._offset += len(block)
+
+    def close(self):
+        """Compresses the last block and writes the index."""
+
+        if self._buffer or not self.blocks:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+        self._file.close()
+
+        with smart_open.open(
+            self.file_path + BLOCK_INDEX_SUFFIX, "w", encoding="utf-8"
+        ) as outfile:
+            json.dump({"size": self._offset, "blocks": self.blocks}, outfile)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def _read_block(file_path: str, offset: int, length: int, decompress) -> bytes:
+    with smart_open.open(file_path, "rb", compression="disable") as file:
+        file.seek(offset)
+        return decompress(file.read(length))
+
+
+def read_block_compressed(file_path: str, threads: int) -> bytes:
+    """
+    Decompresses a file written by `BlockCompressedWriter`, decompressing its blocks in parallel threads (the
+    decompressors release the GIL).
+
+    Args:
+        file_path (str): The path to the compressed file.
+        threads (int): The number of threads.
+
+    Returns:
+        bytes: The decompressed data, None if the file has no up-to-date block index.
+    """
+
+    try:
+        with smart_open.open(
+            file_path + BLOCK_INDEX_SUFFIX, "r", encoding="utf-8"
+        ) as infile:
+            index = json.load(infile)
+        with smart_open.open(file_path, "rb", compression="disable") as file:
+            size = file.seek(0, io.SEEK_END)
+    except OSError:
+        return None
+
+    # an index left by a previous version of the file is ignored
+    if size != index["size"]:
+        logger.warning(f"Ignoring the outdated block index of {file_path}")
+        return None
+
+    decompress = BLOCK_CODECS[Path(file_path).suffix][1]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        blocks = executor.map(
+            lambda block: _read_block(file_path, block[0], block[1], decompress),
+            index["blocks"],
+        )
+        return b"".join(blocks)
+
+
+def get_file_contents(file_path: str, threads: int = 1) -> str:
     """
-    Returns the contents of a file as a string.
+    Returns the contents of a file as a string, decompressing it according to its extension.
 
     Args:
         file_path (str): The path to the file to read.
+        threads (int): The number of threads decompressing a block-compressed file (see `BlockCompressedWriter`),
+            1 to stream and decompress the file sequentially.
 
     Returns:
         str: A string containing the contents of the file.
@@ -22,6 +170,11 @@ def get_file_contents(file_path: str) -> str:
     Raises:
         FileNotFoundError: If the file specified by `file_path` does not exist.
     """
+    if threads > 1 and Path(file_path).suffix in BLOCK_CODECS:
+        data = read_block_compressed(file_path, threads)
+        if data is not None:
+            return data.decode("utf-8").rstrip()
+
     with smart_open.open(file_path, "r", encoding="utf-8") as file:
         text = file.read().rstrip()
     return text
@@ -50,13 +203,54 @@ def create_text_corpus(
 
     """
 
+    create_text_corpus_from_shards(
+        text_corpus_datadir, text_outfile_path, [txt_input_directory]
+    )
+
+
+def create_text_corpus_from_shards(
+    text_corpus_datadir: str,
+    text_outfile_path: str,
+    txt_input_directories: list,
+    excluded_files: list = None,
+    block_size: int = int(CORPUS_BLOCK_SIZE),
+):
+    """
+    Creates a corpus of text documents by concatenating the contents of all text files in several directories, e.g. the
+    outputs of the shards of a distributed conversion.
+
+    The corpus is compressed according to the extension of its name. A gzip or zstd corpus is compressed in blocks, so
+    that the trainer can decompress it with several threads.
+
+    Args:
+        text_corpus_datadir (str): The path to the directory where the output corpus file will be saved.
+        text_outfile_path (str): The name of the output corpus file.
+        txt_input_directories (list): The paths to the directories containing the input text files, concatenated in
+            sorted order so that the corpus does not depend on the order in which the shards completed.
+        excluded_files (list): The paths of the text files to leave out, e.g. the near-duplicates found by
+            `deduplicate_text_files`.
+        block_size (int): The size in bytes of the uncompressed blocks of a gzip or zstd corpus, 0 to compress it as a
+            single stream.
+
+    Returns:
+        None
+    """
+
     if not os.path.exists(text_corpus_datadir):
         os.makedirs(text_corpus_datadir)
 
-    with smart_open.open(
-        text_corpus_datadir + text_outfile_path, "w", encoding="utf-8"
-    ) as outfile:
-        for file in Path(txt_input_directory).glob("*.txt"):
-            with smart_open.open(file, "r", encoding="utf-8") as infile:
-                outfile.write(infile.read())
-    logger.info(f"Generated corpus in: {text_corpus_datadir}{text_outfile_path}")
+    excluded_files = {Path(file) for file in excluded_files or []}
+    text_outfile_path = text_corpus_datadir + text_outfile_path
+    if block_size and Path(text_outfile_path).suffix in BLOCK_CODECS:
+        outfile = BlockCompressedWriter(text_outfile_path, block_size)
+    else:
+        outfile = smart_open.open(text_outfile_path, "wb")
+
+    with outfile:
+        for txt_input_directory in sorted(txt_input_directories):
+            for file in list_text_files(txt_input_directory):
+                if file in excluded_files:
+                    continue
+                with smart_open.open(file, "rb") as infile:
+                    outfile.write(infile.read())
+    logger.info(f"Generated corpus in: {text_outfile_path}")
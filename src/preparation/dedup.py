@@ -0,0 +1,330 @@
+"""Near-duplicate detection of text documents with MinHash signatures and locality-sensitive hashing."""
+
+import json
+import logging
+import os
+import zlib
+
+import numpy as np
+import smart_open
+
+from preparation.convert import list_text_files, text_file_stem
+
+DEDUP_SIGNATURES_DIR = os.getenv("DEDUP_SIGNATURES_DIR", "tmp/dedup_signatures")
+DEDUP_THRESHOLD = os.getenv("DEDUP_THRESHOLD", "0.8")
+DEDUP_NUM_PERM = os.getenv("DEDUP_NUM_PERM", "128")
+DEDUP_BANDS = os.getenv("DEDUP_BANDS", "32")
+DEDUP_SHINGLE_SIZE = os.getenv("DEDUP_SHINGLE_SIZE", "5")
+
+SIGNATURES_FNAME = "signatures.npy"
+INDEX_FNAME = "index.json"
+
+# the shingles are hashed in blocks, to bound the memory of the (num_perm, block) matrix of permuted hashes
+SHINGLE_BLOCK_SIZE = 4096
+
+logger = logging.getLogger(__name__)
+
+
+def shingle_hashes(
+    text: str, shingle_size: int = int(DEDUP_SHINGLE_SIZE)
+) -> np.ndarray:
+    """
+    Hashes the word shingles (sequences of consecutive words) of a text.
+
+    Each distinct word is hashed once with CRC-32, so that the hashes do not depend on the process, and the hashes of
+    the shingles are combined from the hashes of their words with vectorized polynomial hashing.
+
+    Args:
+        text (str): The text, with words separated by whitespace.
+        shingle_size (int): The number of words of a shingle.
+
+    Returns:
+        np.ndarray: The distinct uint64 hashes of the shingles, a single shingle for texts shorter than `shingle_size`.
+    """
+
+    words = text.split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+
+    vocabulary, inverse = np.unique(np.array(words, dtype=object), return_inverse=True)
+    word_hashes = np.array(
+        [zlib.crc32(word.encode("utf-8")) for word in vocabulary], dtype=np.uint64
+    )[inverse]
+
+    shingle_size = min(shingle_size, len(words))
+    n_shingles = len(words) - shingle_size + 1
+    hashes = np.zeros(n_shingles, dtype=np.uint64)
+    # the products overflow and wrap around, which is the arithmetic modulo 2**64 of the polynomial hash
+    with np.errstate(over="ignore"):
+        for offset in range(shingle_size):
+            hashes = (
+                hashes * np.uint64(0x100000001B3)
+                + word_hashes[offset : offset + n_shingles]
+            )
+    return np.unique(hashes)
+
+
+class MinHashIndex:
+    """
+    A persistent index of the MinHash signatures of documents, with locality-sensitive hashing of the signatures in
+    bands to find the candidate near-duplicates of a document without comparing it to all the others.
+
+    The signature of a document has one uint32 value per hash function: the minimum over its shingles of a
+    multiply-shift hash of the shingle hash. The fraction of equal values of two signatures estimates the Jaccard
+    similarity of the shingle sets of the documents.
+    """
+
+    ids: list
+    """ids (list): The ids of the documents, in the order of their signatures."""
+    duplicate_of: list
+    """duplicate_of (list): The id of the document each document is a near-duplicate of, None for the originals."""
+
+    def __init__(
+        self,
+        num_perm: int = int(DEDUP_NUM_PERM),
+        bands: int = int(DEDUP_BANDS),
+        shingle_size: int = int(DEDUP_SHINGLE_SIZE),
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(
+                f"The number of hash functions ({num_perm}) is not a multiple of the number of bands ({bands})"
+            )
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        # odd multipliers, as required by multiply-shift hashing
+        self._multipliers = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+        self._multipliers = self._multipliers * np.uint64(2) + np.uint64(1)
+        self._increments = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+
+        self.ids = []
+        self._signatures = []
+        self.duplicate_of = []
+        self._positions = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._positions
+
+    @property
+    def signatures(self) -> np.ndarray:
+        """The uint32 signatures of the documents, one row per document."""
+        return np.array(self._signatures, dtype=np.uint32).reshape(-1, self.num_perm)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Computes the MinHash signature of a text.
+
+        Args:
+            text (str): The text, with words separated by whitespace.
+
+        Returns:
+            np.ndarray: The uint32 signature, the maximum value everywhere for an empty text.
+        """
+
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        hashes = shingle_hashes(text, self.shingle_size)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(hashes), SHINGLE_BLOCK_SIZE):
+                block = hashes[start : start + SHINGLE_BLOCK_SIZE]
+                permuted = (block * self._multipliers + self._increments) >> np.uint64(
+                    32
+                )
+                signature = np.minimum(
+                    signature, permuted.min(axis=1).astype(np.uint32)
+                )
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [band.tobytes() for band in np.split(signature, self.bands)]
+
+    def query(
+        self, signature: np.ndarray, threshold: float = float(DEDUP_THRESHOLD)
+    ) -> list:
+        """
+        Finds the original documents (not the near-duplicates) of the index similar to a signature.
+
+        Args:
+            signature (np.ndarray): The signature of the document, see `signature`.
+            threshold (float): The minimum estimated Jaccard similarity.
+
+        Returns:
+            list: The (id, similarity) pairs of the similar documents, most similar first.
+        """
+
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        if not candidates:
+            return []
+
+        positions = sorted(candidates)
+        similarities = (
+            np.array([self._signatures[position] for position in positions])
+            == signature
+        ).mean(axis=1)
+        order = np.argsort(-similarities, kind="stable")
+        return [
+            (self.ids[positions[i]], float(similarities[i]))
+            for i in order
+            if similarities[i] >= threshold
+        ]
+
+    def add(self, document_id: str, signature: np.ndarray, duplicate_of: str = None):
+        """
+        Adds the signature of a document; only the original documents are added to the buckets of the bands.
+
+        Args:
+            document_id (str): The id of the document.
+            signature (np.ndarray): The signature of the document, see `signature`.
+            duplicate_of (str): The id of the document it is a near-duplicate of, None for an original document.
+        """
+
+        if document_id in self._positions:
+            raise ValueError(f"The document {document_id} is already in the index")
+
+        position = len(self.ids)
+        self.ids.append(document_id)
+        self._signatures.append(np.asarray(signature, dtype=np.uint32))
+        self.duplicate_of.append(duplicate_of)
+        self._positions[document_id] = position
+        if duplicate_of is None:
+            for band, key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(key, []).append(position)
+
+    def get_duplicate_of(self, document_id: str) -> str:
+        """
+        Returns the id of the document a document is a near-duplicate of, None for an original document.
+        """
+        return self.duplicate_of[self._positions[document_id]]
+
+    def save(self, path: str):
+        """
+        Saves the index into a directory: the signatures as a .npy array, the ids and the parameters as JSON.
+
+        Args:
+            path (str): The path to the directory where the index will be saved.
+        """
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        np.save(os.path.join(path, SIGNATURES_FNAME), self.signatures)
+        with open(os.path.join(path, INDEX_FNAME), "w", encoding="utf-8") as outfile:
+            json.dump(
+                {
+                    "num_perm": self.num_perm,
+                    "bands": self.bands,
+                    "shingle_size": self.shingle_size,
+                    "seed": self.seed,
+                    "ids": self.ids,
+                    "duplicate_of": self.duplicate_of,
+                },
+                outfile,
+            )
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Loads an index saved with `save`.
+
+        Args:
+            path (str): The path to the directory of the index.
+
+        Returns:
+            MinHashIndex: The loaded index.
+        """
+
+        with open(os.path.join(path, INDEX_FNAME), "r", encoding="utf-8") as infile:
+            metadata = json.load(infile)
+        signatures = np.load(os.path.join(path, SIGNATURES_FNAME))
+
+        index = cls(
+            metadata["num_perm"],
+            metadata["bands"],
+            metadata["shingle_size"],
+            metadata["seed"],
+        )
+        for document_id, signature, duplicate_of in zip(
+            metadata["ids"], signatures, metadata["duplicate_of"]
+        ):
+            index.add(document_id, signature, duplicate_of)
+        return index
+
+
+def deduplicate_text_files(
+    txt_input_directories: list,
+    signatures_directory: str = DEDUP_SIGNATURES_DIR,
+    threshold: float = float(DEDUP_THRESHOLD),
+) -> list:
+    """
+    Finds the near-duplicate text files of several directories, e.g. the new versions of an article or overlapping
+    preprints, so that they can be left out of the corpus.
+
+    The files are identified by their name without extension. The signatures are kept in `signatures_directory`, so
+    that only the files not seen by a previous run are read and compared to the index. A file is a duplicate if a file
+    it is similar to is also among the input files; otherwise it is the only copy of the document in the corpus.
+
+    The empty files, e.g. failed conversions, all have the same signature: they are not indexed nor reported as
+    duplicates, but logged, and read again by the next run.
+
+    Args:
+        txt_input_directories (list): The paths to the directories containing the text files. New files are compared
+            in the sorted order of their names, so that the first version of an article (e.g. `v1`) is the one kept.
+        signatures_directory (str): The directory of the persisted `MinHashIndex`.
+        threshold (float): The minimum estimated Jaccard similarity of two near-duplicate documents.
+
+    Returns:
+        list: The paths of the near-duplicate text files to leave out.
+    """
+
+    if os.path.exists(os.path.join(signatures_directory, INDEX_FNAME)):
+        index = MinHashIndex.load(signatures_directory)
+    else:
+        index = MinHashIndex()
+
+    files = {}
+    for txt_input_directory in sorted(txt_input_directories):
+        for file in list_text_files(txt_input_directory):
+            files.setdefault(text_file_stem(file), str(file))
+
+    new_documents = 0
+    empty_files = []
+    for document_id in sorted(files):
+        if document_id in index:
+            continue
+
+        with smart_open.open(files[document_id], "r", encoding="utf-8") as infile:
+            text = infile.read()
+        if not text.split():
+            empty_files.append(files[document_id])
+            continue
+
+        signature = index.signature(text)
+        similar = index.query(signature, threshold)
+        index.add(document_id, signature, similar[0][0] if similar else None)
+        new_documents += 1
+
+    if new_documents:
+        index.save(signatures_directory)
+
+    if empty_files:
+        logger.warning(f"Skipped {len(empty_files)} empty text files: {empty_files}")
+
+    duplicates = [
+        files[document_id]
+        for document_id in sorted(files)
+        if document_id in index and index.get_duplicate_of(document_id) in files
+    ]
+    logger.info(
+        f"Found {len(duplicates)} near-duplicates among {len(files)} text files ({new_documents} new)"
+    )
+    return duplicates
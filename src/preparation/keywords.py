@@ -0,0 +1,120 @@
+"""
+Keyword sets: the lists of domain keywords a document can be scored against, compiled once per distinct list and
+kept in a bounded LRU cache keyed by the hash of their content.
+
+The text cleaning (cleantext, gensim) is imported on the first compilation, so that the serving endpoints can import
+this module at startup.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+
+KEYWORD_SET_CACHE_SIZE = os.getenv("KEYWORD_SET_CACHE_SIZE", "8")
+
+logger = logging.getLogger(__name__)
+
+
+def keywords_digest(keywords: list) -> str:
+    """
+    Returns the SHA-256 of a keyword list, in order: two lists with the same keywords in another order are two
+    keyword sets, as the order is part of the token payload.
+    """
+
+    return hashlib.sha256("\n".join(keywords).encode("utf-8")).hexdigest()
+
+
+class KeywordSet:
+    """
+    A keyword list with what the tokenization and the scoring derive from it on each document: the compiled n-gram
+    substitutions and the number of occurrences of each keyword. A scoring model adds its own compiled state, e.g.
+    the keyword vectors of its corpus model.
+    """
+
+    keywords: list
+    """keywords (list): The domain-specific keywords."""
+    digest: str
+    """digest (str): The hash of the keywords, see `keywords_digest`."""
+    phrases: list
+    """phrases (list): The compiled n-gram substitutions, see `preparation.clean.compile_phrases`."""
+    counts: Counter
+    """counts (Counter): The number of occurrences of each keyword in the list."""
+
+    def __init__(self, keywords: list):
+        from preparation.clean import compile_phrases  # pylint: disable=C0415
+
+        self.keywords = list(keywords)
+        self.digest = keywords_digest(self.keywords)
+        self.phrases = compile_phrases([self.keywords])
+        self.counts = Counter(self.keywords)
+
+    @property
+    def vocabulary(self) -> list:
+        """The keywords in the format of `get_domain_keywords`: a list with the list of keywords."""
+        return [self.keywords]
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+
+class KeywordSetCache:
+    """
+    A thread-safe LRU cache of compiled keyword sets, keyed by the hash of the keywords, so that the keyword sets of
+    many tenants can be served by one model with a bounded memory footprint.
+    """
+
+    def __init__(self, build=KeywordSet, maxsize: int = int(KEYWORD_SET_CACHE_SIZE)):
+        """
+        Args:
+            build (callable): A function compiling a keyword set from a list of keywords.
+            maxsize (int): The maximum number of compiled keyword sets kept, the least recently used are evicted.
+        """
+        self.build = build
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, keywords: list) -> bool:
+        return keywords_digest(keywords) in self._entries
+
+    def get(self, keywords: list):
+        """
+        Returns the compiled keyword set of a keyword list, compiling it on the first use.
+
+        Args:
+            keywords (list): The domain-specific keywords.
+
+        Returns:
+            KeywordSet: The compiled keyword set, as returned by `build`.
+        """
+
+        digest = keywords_digest(keywords)
+        with self._lock:
+            if digest in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(digest)
+                return self._entries[digest]
+
+            self.misses += 1
+            keyword_set = self.build(keywords)
+            self._entries[digest] = keyword_set
+            if len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.info(f"Evicted the keyword set {evicted[:12]}")
+            logger.info(
+                f"Compiled the keyword set {digest[:12]} of {len(keywords)} keywords"
+            )
+            return keyword_set
+
+    def clear(self):
+        """Removes all the compiled keyword sets, e.g. when the model they were compiled for changes."""
+
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,77 @@
+"""
+Compact encoding of a tokenized document, sent by the API server to the model runner in place of its text.
+
+The document model is trained with the domain keywords as its only vocabulary, so the other tokens of a document are
+ignored by the training: a document is encoded as the int32 ids of its keyword tokens against the keyword list, in
+order, with the number of the other tokens.
+"""
+
+import zlib
+
+import numpy as np
+
+PAYLOAD_VERSION = 1
+# version, hash of the keyword list, number of unknown tokens
+PAYLOAD_HEADER_SIZE = 3
+
+
+def keywords_hash(keywords: list) -> int:
+    """
+    Returns the CRC-32 of a keyword list, as a signed int32 so that it fits in a payload.
+    """
+
+    crc = zlib.crc32("\n".join(keywords).encode("utf-8"))
+    return int(np.array(crc, dtype=np.uint32).view(np.int32))
+
+
+def encode_tokens(tokens: list, keywords: list) -> np.ndarray:
+    """
+    Encodes the tokens of a document.
+
+    Args:
+        tokens (list): The tokens of the document, see `tokenize_for_training`.
+        keywords (list): The domain-specific keywords.
+
+    Returns:
+        np.ndarray: The int32 payload: the version, the hash of the keyword list, the number of unknown tokens, then
+        the ids of the keyword tokens.
+    """
+
+    keyword_ids = {}
+    for keyword in keywords:
+        keyword_ids.setdefault(keyword, len(keyword_ids))
+
+    ids = [keyword_ids[token] for token in tokens if token in keyword_ids]
+    header = [PAYLOAD_VERSION, keywords_hash(keywords), len(tokens) - len(ids)]
+    return np.array(header + ids, dtype=np.int32)
+
+
+def decode_tokens(payload: np.ndarray, keywords: list) -> tuple:
+    """
+    Decodes the tokens of a document encoded with `encode_tokens`.
+
+    Args:
+        payload (np.ndarray): The int32 payload.
+        keywords (list): The domain-specific keywords, the same as the encoding ones.
+
+    Returns:
+        tuple: The keyword tokens of the document, in order, and the number of unknown tokens.
+
+    Raises:
+        ValueError: If the payload version is not supported, the payload was encoded with other keywords, or a token
+            id is not the id of a keyword.
+    """
+
+    payload = np.asarray(payload, dtype=np.int32).ravel()
+    if len(payload) < PAYLOAD_HEADER_SIZE or payload[0] != PAYLOAD_VERSION:
+        raise ValueError("Unsupported token payload")
+    if payload[1] != keywords_hash(keywords):
+        raise ValueError("The token payload was encoded with another keyword list")
+
+    unique_keywords = list(dict.fromkeys(keywords))
+    ids = payload[PAYLOAD_HEADER_SIZE:]
+    # a negative id would index the keywords from the end
+    if len(ids) and (ids.min() < 0 or ids.max() >= len(unique_keywords)):
+        raise ValueError("The token payload contains an invalid keyword id")
+    tokens = np.array(unique_keywords, dtype=object)[ids]
+    return tokens.tolist(), int(payload[2])
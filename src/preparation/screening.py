@@ -0,0 +1,78 @@
+"""Cheap pre-screening of documents before similarity scoring."""
+
+import logging
+import os
+
+SCREENING_MIN_PAGES = os.getenv("SCREENING_MIN_PAGES", "1")
+SCREENING_MIN_CHARS_PER_PAGE = os.getenv("SCREENING_MIN_CHARS_PER_PAGE", "200")
+SCREENING_MIN_KEYWORD_HITS = os.getenv("SCREENING_MIN_KEYWORD_HITS", "1")
+
+logger = logging.getLogger(__name__)
+
+
+def screen_document(
+    text: str,
+    keywords,
+    number_of_pages: int = None,
+    min_pages: int = int(SCREENING_MIN_PAGES),
+    min_chars_per_page: int = int(SCREENING_MIN_CHARS_PER_PAGE),
+    min_keyword_hits: int = int(SCREENING_MIN_KEYWORD_HITS),
+) -> dict:
+    """
+    Decides in a single pass over a cleaned text whether a document can get a meaningful similarity score, so that
+    empty or clearly irrelevant documents can skip cleaning and per-document training.
+
+    Args:
+        text (str): The cleaned text of the document (see `combined_text_cleaning`).
+        keywords (list): The domain-specific keywords, with n-grams joined by underscores.
+        number_of_pages (int): The number of pages of the document, if known.
+        min_pages (int): The minimum number of pages.
+        min_chars_per_page (int): The minimum number of characters of text per page (per document if the number of
+            pages is not known).
+        min_keyword_hits (int): The minimum number of occurrences of domain keywords, unigrams or bigrams.
+
+    Returns:
+        dict: The screening result, with the keys `passed`, `reason` (None if the document passed), `pages`,
+        `density`, `tokens` and `keyword_hits`.
+
+    Example:
+        screen_document("causal inference with backdoor adjustment", ["causal_inference", "backdoor"])
+    """
+
+    keywords = set(keywords)
+
+    chars = 0
+    tokens = 0
+    keyword_hits = 0
+    previous = None
+    for token in text.split():
+        chars += len(token)
+        tokens += 1
+        if token in keywords:
+            keyword_hits += 1
+        if previous is not None and previous + "_" + token in keywords:
+            keyword_hits += 1
+        previous = token
+
+    pages = number_of_pages if number_of_pages is not None else 1
+    density = chars / pages if pages > 0 else 0.0
+
+    reason = None
+    if number_of_pages is not None and number_of_pages < min_pages:
+        reason = "too_few_pages"
+    elif density < min_chars_per_page:
+        reason = "low_text_density"
+    elif keyword_hits < min_keyword_hits:
+        reason = "too_few_keyword_hits"
+
+    result = {
+        "passed": reason is None,
+        "reason": reason,
+        "pages": number_of_pages,
+        "density": density,
+        "tokens": tokens,
+        "keyword_hits": keyword_hits,
+    }
+    logger.info(f"Screening result: {result}")
+
+    return result
@@ -0,0 +1,11 @@
+"""Module for the lean inference path of the serving endpoints."""
+
+import logging
+
+from .hotswap import *
+from .inference import *
+from .progressive import *
+from .warmup import *
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
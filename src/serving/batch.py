@@ -0,0 +1,321 @@
+"""
+Bulk offline scoring of PDF files, e.g. to re-score an archive of papers when the domain keywords change.
+
+The documents are scored in a process pool, with the model loaded once per worker process, and the results are
+streamed to a JSONL file or to a Parquet dataset, so that an interrupted run resumes where it stopped.
+"""
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+
+import smart_open
+
+PARQUET_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+# the model of a worker process, loaded once by `_init_worker`, or the error of its loading
+_model = None
+_model_error = None
+
+
+def list_pdf_files(source: str) -> list:
+    """
+    Lists the PDF files to score.
+
+    Args:
+        source (str): A directory, searched recursively, or a manifest file with one PDF path or URI per line.
+
+    Returns:
+        list: The paths of the PDF files, sorted for a directory and in the manifest order otherwise.
+    """
+
+    if os.path.isdir(source):
+        return [str(path) for path in sorted(Path(source).rglob("*.pdf"))]
+
+    with smart_open.open(source, "r", encoding="utf-8") as manifest:
+        return [line.strip() for line in manifest if line.strip()]
+
+
+def load_scoring_model(model_path: str, domain_keywords: str = None):
+    """
+    Loads a model for scoring.
+
+    Args:
+        model_path (str): A Word2Vec model file, or the path or URI of a model logged with MLflow.
+        domain_keywords (str): The path to the domain keywords file, by default the one of the MLflow model. It is
+            required with a Word2Vec model file.
+
+    Returns:
+        GensimWord2VecModel: The model.
+    """
+
+    # pylint: disable=C0415
+    from training.training import GensimWord2VecModel, load_word2vec_model
+
+    if os.path.isfile(model_path):
+        if domain_keywords is None:
+            raise ValueError("The domain keywords are required with a Word2Vec model")
+        return GensimWord2VecModel(load_word2vec_model(model_path), domain_keywords)
+
+    import mlflow.pyfunc  # pylint: disable=C0415
+
+    model = mlflow.pyfunc.load_model(model_path).unwrap_python_model()
+    if domain_keywords is not None:
+        model.domain_keywords_path = domain_keywords
+    return model
+
+
+def _init_worker(model_path: str, domain_keywords: str, processes: int = 1):
+    """
+    Loads the model of a worker process and compiles its domain keywords. An error is kept for `_score_pdf` to raise:
+    the pool would restart a worker whose initializer raised, forever.
+
+    The CPUs are split between the `processes` workers, so that their per-document training threads do not
+    oversubscribe the machine.
+    """
+
+    global _model, _model_error  # pylint: disable=W0603
+
+    # pylint: disable=C0415
+    from training.admission import available_cpus, set_cpu_budget
+
+    set_cpu_budget(max(1, available_cpus() // processes))
+    try:
+        _model = load_scoring_model(model_path, domain_keywords)
+        _model.get_keyword_set()
+    except Exception as exception:  # pylint: disable=W0718
+        _model_error = f"{type(exception).__name__}: {exception}"
+        logger.error(f"Loading the model {model_path} failed: {_model_error}")
+
+
+def _score_pdf(pdf_file_path: str) -> dict:
+    """Converts and scores a PDF file with the model of the worker process."""
+
+    # pylint: disable=C0415
+    from ingestion.pdf import Pdf
+    from preparation.clean import combined_text_cleaning
+
+    if _model_error is not None:
+        # stops the run instead of failing every document
+        raise RuntimeError(f"The scoring model could not be loaded: {_model_error}")
+
+    start = time.perf_counter()
+    result = {
+        "path": pdf_file_path,
+        "id": Path(pdf_file_path).stem,
+        "score": None,
+        "pages": None,
+        "error": None,
+    }
+    try:
+        pdf = Pdf(pdf_file_path)
+        pdf.to_text()
+        conversion = time.perf_counter()
+        if pdf.is_valid:
+            result["pages"] = pdf.number_of_pages
+            result["score"] = _model.predict(None, combined_text_cleaning(pdf.content))
+        else:
+            result["error"] = "invalid_pdf"
+    except Exception as exception:  # pylint: disable=W0718
+        # a single document must not stop a run of thousands
+        conversion = time.perf_counter()
+        result["error"] = f"{type(exception).__name__}: {exception}"
+
+    end = time.perf_counter()
+    result["conversion_seconds"] = conversion - start
+    result["scoring_seconds"] = end - conversion
+    result["seconds"] = end - start
+    return result
+
+
+class JsonlResultWriter:
+    """Appends the results to a JSONL file, one line per document."""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+
+    def read_done(self) -> set:
+        """
+        Returns the paths of the documents already in the output, truncating a last line left incomplete by an
+        interrupted run.
+        """
+
+        done = set()
+        if not os.path.exists(self.output_path):
+            return done
+
+        valid_size = 0
+        with open(self.output_path, "rb") as infile:
+            for line in infile:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    break
+                valid_size += len(line)
+
+        if valid_size < os.path.getsize(self.output_path):
+            logger.warning(f"Truncating an incomplete result in {self.output_path}")
+            with open(self.output_path, "r+b") as outfile:
+                outfile.truncate(valid_size)
+        return done
+
+    def __enter__(self):
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # pylint: disable=R1732
+        self._file = open(self.output_path, "a", encoding="utf-8")
+        return self
+
+    def write(self, result: dict):
+        """Writes a result, flushed so that it survives an interruption."""
+
+        self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes the results to a Parquet dataset: a directory of part files of `batch_size` results, each written to a
+    temporary file and renamed, so that an interrupted run loses at most the results of the last part.
+    """
+
+    def __init__(self, output_path: str, batch_size: int = PARQUET_BATCH_SIZE):
+        self.output_path = output_path
+        self.batch_size = batch_size
+        self._batch = []
+
+    def _parts(self) -> list:
+        return sorted(Path(self.output_path).glob("part-*.parquet"))
+
+    def read_done(self) -> set:
+        """Returns the paths of the documents already in the output."""
+
+        import pyarrow.parquet as pq  # pylint: disable=C0415
+
+        done = set()
+        for part in self._parts():
+            done.update(
+                pq.read_table(part, columns=["path"]).column("path").to_pylist()
+            )
+        return done
+
+    def __enter__(self):
+        os.makedirs(self.output_path, exist_ok=True)
+        self._part = len(self._parts())
+        return self
+
+    def write(self, result: dict):
+        """Writes a result, in the next part file once `batch_size` results are collected."""
+
+        self._batch.append(result)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa  # pylint: disable=C0415
+        import pyarrow.parquet as pq  # pylint: disable=C0415
+
+        if not self._batch:
+            return
+        part_path = os.path.join(self.output_path, f"part-{self._part:05d}.parquet")
+        schema = pa.schema(
+            [
+                ("path", pa.string()),
+                ("id", pa.string()),
+                ("score", pa.float64()),
+                ("pages", pa.int64()),
+                ("error", pa.string()),
+                ("conversion_seconds", pa.float64()),
+                ("scoring_seconds", pa.float64()),
+                ("seconds", pa.float64()),
+            ]
+        )
+        pq.write_table(
+            pa.Table.from_pylist(self._batch, schema=schema), part_path + ".tmp"
+        )
+        os.replace(part_path + ".tmp", part_path)
+        self._part += 1
+        self._batch = []
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._flush()
+
+
+def score_pdf_files(
+    pdf_file_paths: list,
+    model_path: str,
+    output_path: str,
+    domain_keywords: str = None,
+    processes: int = None,
+    progress_every: int = 100,
+) -> dict:
+    """
+    Scores PDF files in a process pool and streams the results to the output, skipping the files already scored in
+    the output by a previous run.
+
+    Args:
+        pdf_file_paths (list): The paths or URIs of the PDF files, see `list_pdf_files`.
+        model_path (str): The model, see `load_scoring_model`.
+        output_path (str): A `.jsonl` file, or a `.parquet` directory of part files.
+        domain_keywords (str): The path to the domain keywords file, see `load_scoring_model`.
+        processes (int): The number of worker processes, by default the number of CPUs.
+        progress_every (int): The number of documents between two progress logs.
+
+    Returns:
+        dict: The throughput summary: the number of `documents` scored, `skipped` (already scored) and `failed`, the
+        `pages`, the `elapsed` seconds, and the `documents_per_second` and `pages_per_second`.
+
+    Raises:
+        RuntimeError: If the model or the domain keywords cannot be loaded by the worker processes.
+    """
+
+    if output_path.endswith(".parquet"):
+        writer = ParquetResultWriter(output_path)
+    else:
+        writer = JsonlResultWriter(output_path)
+
+    done = writer.read_done()
+    todo = [path for path in pdf_file_paths if path not in done]
+    logger.info(
+        f"Scoring {len(todo)} PDF files ({len(pdf_file_paths) - len(todo)} already scored)"
+    )
+
+    summary = {
+        "documents": 0,
+        "skipped": len(pdf_file_paths) - len(todo),
+        "failed": 0,
+        "pages": 0,
+    }
+    start = time.perf_counter()
+    processes = processes or mp.cpu_count()
+    with writer, mp.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(model_path, domain_keywords, processes),
+    ) as pool:
+        for result in pool.imap_unordered(_score_pdf, todo):
+            writer.write(result)
+            summary["documents"] += 1
+            summary["failed"] += result["error"] is not None
+            summary["pages"] += result["pages"] or 0
+            if summary["documents"] % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                logger.info(
+                    f"Scored {summary['documents']}/{len(todo)} PDF files, "
+                    f"{summary['documents'] / elapsed:.2f} documents/second"
+                )
+
+    summary["elapsed"] = time.perf_counter() - start
+    summary["documents_per_second"] = summary["documents"] / summary["elapsed"]
+    summary["pages_per_second"] = summary["pages"] / summary["elapsed"]
+    logger.info(f"Scoring summary: {summary}")
+    return summary
@@ -0,0 +1,277 @@
+"""
+Hot-swap of the served model: a new model version is loaded and warmed up in the background while the current one
+keeps serving, the reference is switched atomically, and the old model is released once its in-flight requests
+drained, so that deploying a new model does not restart the service. The processes serving a model each have a
+slot, and swap it to the version of a shared marker file.
+"""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+MODEL_DRAIN_TIMEOUT = os.getenv("MODEL_DRAIN_TIMEOUT", "300")
+MODEL_POLL_INTERVAL = os.getenv("MODEL_POLL_INTERVAL", "0")
+MODEL_SYNC_INTERVAL = os.getenv("MODEL_SYNC_INTERVAL", "1")
+MODEL_MARKER_DIR = os.getenv(
+    "MODEL_MARKER_DIR", os.path.join(tempfile.gettempdir(), "model_markers")
+)
+
+__all__ = ["ModelMarker", "ModelSlot"]
+
+logger = logging.getLogger(__name__)
+
+
+class _Generation:
+    """A model version with the number of requests using it."""
+
+    def __init__(self, model, version: str):
+        self.model = model
+        self.version = version
+        self.in_flight = 0
+        self.retired = False
+        self.drained = threading.Event()
+
+
+class ModelSlot:
+    """
+    The model serving the requests of a process. A request uses the model of the slot with `use`, and keeps the
+    model it started with even if the slot is swapped meanwhile.
+
+    A swap runs in a background thread: the new model is loaded and warmed up, then becomes the model of the slot,
+    and the old model is released once the requests using it completed, or after `drain_timeout` seconds. One swap
+    runs at a time.
+    """
+
+    def __init__(
+        self,
+        model,
+        version: str,
+        drain_timeout: float = float(MODEL_DRAIN_TIMEOUT),
+    ):
+        """
+        Args:
+            model (object): The current model.
+            version (str): The version of the current model, e.g. its tag in the model store.
+            drain_timeout (float): The maximum wait in seconds for the requests of an old model.
+        """
+        self.drain_timeout = drain_timeout
+        self._current = _Generation(model, version)
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._status = {"state": "idle", "version": version}
+        self._watcher = None
+
+    @property
+    def version(self) -> str:
+        """The version of the current model."""
+        return self._current.version
+
+    @property
+    def is_swapping(self) -> bool:
+        """Whether a swap is running."""
+        return self._swap_lock.locked()
+
+    @contextmanager
+    def use(self):
+        """
+        Holds the current model for the duration of a request.
+
+        Yields:
+            object: The model.
+        """
+
+        with self._lock:
+            generation = self._current
+            generation.in_flight += 1
+        try:
+            yield generation.model
+        finally:
+            with self._lock:
+                generation.in_flight -= 1
+                if generation.retired and generation.in_flight == 0:
+                    generation.drained.set()
+
+    def status(self) -> dict:
+        """
+        Returns:
+            dict: The `state` of the last swap (`idle`, `loading`, `warming`, `draining`, `completed` or `failed`),
+            the current `version` and `in_flight` requests, and the timings or the error of the last swap.
+        """
+
+        with self._lock:
+            return dict(
+                self._status, version=self.version, in_flight=self._current.in_flight
+            )
+
+    def _set_status(self, **status):
+        with self._lock:
+            self._status.update(status)
+
+    def start_swap(self, load, version: str, warm_up=None) -> bool:
+        """
+        Starts swapping the model in a background thread.
+
+        Args:
+            load (callable): A function loading the model of a version.
+            version (str): The version of the new model.
+            warm_up (callable): A function warming up a loaded model before it serves requests.
+
+        Returns:
+            bool: False if a swap is already running or the version is the current one.
+        """
+
+        if version == self.version or not self._swap_lock.acquire(blocking=False):
+            return False
+
+        thread = threading.Thread(
+            target=self._swap, args=(load, version, warm_up), daemon=True
+        )
+        thread.start()
+        return True
+
+    def swap(self, load, version: str, warm_up=None) -> dict:
+        """
+        Swaps the model, waiting for the end of the swap; see `start_swap`.
+
+        Returns:
+            dict: The status of the swap, see `status`.
+
+        Raises:
+            RuntimeError: If a swap is already running.
+        """
+
+        if not self._swap_lock.acquire(blocking=False):
+            raise RuntimeError("A model swap is already running")
+        self._swap(load, version, warm_up)
+        return self.status()
+
+    def _swap(self, load, version: str, warm_up):
+        """Runs a swap, with the swap lock held."""
+
+        try:
+            start = time.perf_counter()
+            with self._lock:
+                self._status = {"state": "loading", "target": version}
+            logger.info(f"Loading the model {version}")
+            model = load(version)
+            loaded = time.perf_counter()
+
+            if warm_up is not None:
+                self._set_status(state="warming")
+                warm_up(model)
+            warmed = time.perf_counter()
+
+            with self._lock:
+                old = self._current
+                self._current = _Generation(model, version)
+                old.retired = True
+                if old.in_flight == 0:
+                    old.drained.set()
+                self._status.update(state="draining", previous=old.version)
+            logger.info(
+                f"Switched from the model {old.version} to {version}, draining {old.in_flight} requests"
+            )
+
+            drained = old.drained.wait(self.drain_timeout)
+            if not drained:
+                logger.warning(
+                    f"The requests of the model {old.version} did not drain in {self.drain_timeout} seconds"
+                )
+            # the requests still running keep their own reference to the old model
+            old.model = None
+
+            self._set_status(
+                state="completed",
+                drained=drained,
+                load_seconds=loaded - start,
+                warm_up_seconds=warmed - loaded,
+                drain_seconds=time.perf_counter() - warmed,
+            )
+        except Exception as exception:  # pylint: disable=W0718
+            # the current model keeps serving
+            self._set_status(
+                state="failed", error=f"{type(exception).__name__}: {exception}"
+            )
+            logger.exception(f"Swap to the model {version} failed", exc_info=exception)
+        finally:
+            self._swap_lock.release()
+
+    def watch(
+        self,
+        latest_version,
+        load,
+        warm_up=None,
+        interval: float = float(MODEL_POLL_INTERVAL),
+    ):
+        """
+        Polls for a new model version in a background thread, and swaps the model when one is found. A version is
+        swapped to once: if its swap fails, the slot keeps its model until another version is found.
+
+        Args:
+            latest_version (callable): A function returning the latest version, e.g. from the local model store.
+            load (callable): A function loading the model of a version.
+            warm_up (callable): A function warming up a loaded model.
+            interval (float): The polling interval in seconds.
+        """
+
+        def poll():
+            swapped = self.version
+            while True:
+                time.sleep(interval)
+                try:
+                    version = latest_version()
+                except Exception as exception:  # pylint: disable=W0718
+                    logger.warning(f"Polling for a new model failed: {exception}")
+                    continue
+                # a version found during a swap is swapped to at a next poll
+                if version != swapped and self.start_swap(load, version, warm_up):
+                    swapped = version
+                    logger.info(f"Found the new model {version}")
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=poll, daemon=True)
+            self._watcher.start()
+
+
+class ModelMarker:
+    """
+    The version of the model to serve, shared by the processes serving a model through a file: a process writes the
+    marker to swap the model of all of them, and each process watches it with `ModelSlot.watch`.
+
+    The marker of a service is named after the model it started with, so that a marker left by a service with
+    another model is ignored.
+    """
+
+    def __init__(self, model: str, directory: str = MODEL_MARKER_DIR):
+        """
+        Args:
+            model (str): The version of the model the service started with.
+            directory (str): The directory of the markers.
+        """
+        self.path = os.path.join(directory, re.sub(r"[^\w.-]", "_", model))
+
+    def read(self) -> Optional[str]:
+        """
+        Returns:
+            str: The version to serve, or None if no version was written.
+        """
+
+        try:
+            with open(self.path, encoding="utf-8") as marker_file:
+                return marker_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def write(self, version: str):
+        """Writes the version to serve, atomically so that no process reads a partial version."""
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as marker_file:
+            marker_file.write(version)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,164 @@
+"""
+Inference helpers for the serving endpoints.
+
+Only the standard library and the pre-screening are imported with this module: the PDF parser, the text cleaning
+(cleantext, gensim) and the document index (numpy, gensim) are imported on first use, so that a serving container
+starts answering as soon as possible.
+"""
+
+import logging
+import os
+import re
+
+# pylint: disable=C0413
+from preparation.screening import screen_document
+
+__all__ = [
+    "clean_text",
+    "encode_document",
+    "load_index",
+    "open_pdf",
+    "read_domain_keywords",
+    "read_keyword_set",
+    "read_pdf",
+    "screen_document",
+]
+
+KEYWORD_SETS_DIR = os.getenv("KEYWORD_SETS_DIR", "resources/keywords")
+
+# the names of the keyword sets, which must not reach outside their directory
+KEYWORD_SET_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+logger = logging.getLogger(__name__)
+
+
+def read_domain_keywords(vocabulary_file_path: str) -> list:
+    """
+    Reads a local file containing a list of domain-specific keywords, in the same format as `get_domain_keywords` of
+    the training module, without importing it.
+
+    Args:
+        vocabulary_file_path (str): The path to the file containing the domain-specific keywords.
+
+    Returns:
+        list: A list with the list of domain-specific keywords.
+    """
+
+    with open(vocabulary_file_path, "r", encoding="utf-8") as file:
+        return [file.read().splitlines()]
+
+
+def read_keyword_set(name: str, directory: str = KEYWORD_SETS_DIR) -> list:
+    """
+    Reads a named keyword set, the file `<name>.txt` of the directory of keyword sets.
+
+    Args:
+        name (str): The name of the keyword set, made of letters, digits, `_` and `-`.
+        directory (str): The directory of the keyword sets.
+
+    Returns:
+        list: A list with the list of domain-specific keywords.
+
+    Raises:
+        ValueError: If the name is not valid or the keyword set does not exist.
+    """
+
+    if KEYWORD_SET_NAME.fullmatch(name) is None:
+        raise ValueError(f"Invalid keyword set name: {name}")
+
+    path = os.path.join(directory, name + ".txt")
+    if not os.path.isfile(path):
+        raise ValueError(f"Unknown keyword set: {name}")
+    return read_domain_keywords(path)
+
+
+def read_pdf(source, filename: str = None):
+    """
+    Reads and converts a PDF file to text.
+
+    Args:
+        source (str | bytes | io.BufferedIOBase): The PDF file, see `ingestion.pdf.Pdf`.
+        filename (str): The name of the document.
+
+    Returns:
+        Pdf: The converted document, with `is_valid` set to False if it could not be parsed.
+    """
+
+    from ingestion.pdf import Pdf  # pylint: disable=C0415
+
+    pdf = Pdf(source, filename=filename)
+    pdf.to_text()
+    return pdf
+
+
+def open_pdf(source, filename: str = None):
+    """
+    Reads a PDF file without converting it, so that its pages can be converted lazily with `Pdf.iter_pages`.
+
+    Args:
+        source (str | bytes | io.BufferedIOBase): The PDF file, see `ingestion.pdf.Pdf`.
+        filename (str): The name of the document.
+
+    Returns:
+        Pdf: The document.
+    """
+
+    from ingestion.pdf import Pdf  # pylint: disable=C0415
+
+    pdf = Pdf(source, filename=filename)
+    pdf.read()
+    return pdf
+
+
+def clean_text(text: str) -> str:
+    """
+    Cleans the text of a document as done for the training corpus.
+
+    Args:
+        text (str): The raw text of the document.
+
+    Returns:
+        str: The cleaned text.
+    """
+
+    from preparation.clean import combined_text_cleaning  # pylint: disable=C0415
+
+    return combined_text_cleaning(text)
+
+
+def encode_document(text: str, vocabulary: list, phrases: list = None):
+    """
+    Tokenizes a cleaned document as done for training and encodes its tokens in the compact payload of the model,
+    see `preparation.payload.encode_tokens`.
+
+    Args:
+        text (str): The cleaned text of the document.
+        vocabulary (list): A list with the list of domain-specific keywords.
+        phrases (list): The compiled n-grams of the keywords, see `preparation.keywords.KeywordSet`.
+
+    Returns:
+        np.ndarray: The int32 token payload.
+    """
+
+    # pylint: disable=C0415
+    from preparation.clean import tokenize_for_training
+    from preparation.payload import encode_tokens
+
+    tokens = tokenize_for_training(text, vocabulary, phrases=phrases)[0]
+    return encode_tokens(tokens, vocabulary[0])
+
+
+def load_index(path: str):
+    """
+    Loads a corpus document index, memory-mapped.
+
+    Args:
+        path (str): The path to the directory of the index.
+
+    Returns:
+        DocumentIndex: The loaded index.
+    """
+
+    from training.index import load_document_index  # pylint: disable=C0415
+
+    return load_document_index(path)
@@ -0,0 +1,119 @@
+"""
+Progressive scoring of long documents: the pages are extracted and scored in increments of doubling size, and the
+scoring stops as soon as the score is stable or clearly on one side of the decision threshold.
+"""
+
+import itertools
+import logging
+import os
+
+from .inference import clean_text, encode_document, screen_document
+
+PROGRESSIVE_INITIAL_PAGES = os.getenv("PROGRESSIVE_INITIAL_PAGES", "2")
+PROGRESSIVE_THRESHOLD = os.getenv("PROGRESSIVE_THRESHOLD", "0.85")
+PROGRESSIVE_TOLERANCE = os.getenv("PROGRESSIVE_TOLERANCE", "0.02")
+
+__all__ = ["score_progressively"]
+
+logger = logging.getLogger(__name__)
+
+
+def _exit_reason(scores: list, threshold: float, tolerance: float) -> str:
+    """
+    Decides whether the scores of the last two increments are enough: the interval they span, widened by the
+    tolerance, is the confidence interval of the score.
+    """
+
+    if len(scores) < 2:
+        return None
+
+    low, high = min(scores[-2:]), max(scores[-2:])
+    if high - low <= tolerance:
+        return "stable"
+    if low - tolerance > threshold:
+        return "above_threshold"
+    if high + tolerance < threshold:
+        return "below_threshold"
+    return None
+
+
+def score_progressively(
+    pages,
+    vocabulary: list,
+    predict,
+    initial_pages: int = int(PROGRESSIVE_INITIAL_PAGES),
+    threshold: float = float(PROGRESSIVE_THRESHOLD),
+    tolerance: float = float(PROGRESSIVE_TOLERANCE),
+    phrases: list = None,
+) -> dict:
+    """
+    Scores a document on its first `initial_pages` pages, then on twice as many pages, and so on, until the scores
+    of the last two increments differ by at most `tolerance`, or are both clearly (by more than `tolerance`) above or
+    below `threshold`, or all the pages are used. An increment rejected by the pre-screening is not scored, so a
+    document is rejected only if all its pages are.
+
+    Each page is cleaned once. The document model is trained again for each increment, but as the number of pages
+    doubles, all the increments together train on less than twice the pages of the last one.
+
+    Args:
+        pages (iterator): The text of the pages, extracted lazily, see `ingestion.pdf.Pdf.iter_pages`.
+        vocabulary (list): A list with the list of domain-specific keywords.
+        predict (callable): A function scoring a token payload, see `encode_document`.
+        initial_pages (int): The number of pages of the first increment.
+        threshold (float): The decision threshold of the score.
+        tolerance (float): The half-width of the confidence interval of the score.
+        phrases (list): The compiled n-grams of the keywords, see `encode_document`.
+
+    Returns:
+        dict: The `value` of the score (0.0 for a rejected document), the `pages` used, whether the scoring exited
+        early (`early_exit`, only if some pages were left unread) with the `exit_reason` (`stable`,
+        `above_threshold` or `below_threshold`), the `increments` with their pages and score, and the `screening`
+        of the last increment.
+    """
+
+    pages = iter(pages)
+    cleaned_pages = []
+    increments = []
+    screening = None
+    exit_reason = None
+    exhausted = False
+    size = initial_pages
+
+    while True:
+        new_pages = list(itertools.islice(pages, size - len(cleaned_pages)))
+        if not new_pages:
+            exhausted = True
+            break
+        cleaned_pages.extend(clean_text(page) for page in new_pages)
+        exhausted = len(cleaned_pages) < size
+
+        # the pages are separated, so that the last word of a page and the first of the next are not fused
+        tokens = " ".join(cleaned_pages)
+        screening = screen_document(tokens, vocabulary[0], len(cleaned_pages))
+        if screening["passed"]:
+            score = predict(encode_document(tokens, vocabulary, phrases))
+            increments.append({"pages": len(cleaned_pages), "score": score})
+            logger.info(f"Score {score} on the first {len(cleaned_pages)} pages")
+
+            exit_reason = _exit_reason(
+                [increment["score"] for increment in increments], threshold, tolerance
+            )
+            if exit_reason is not None:
+                if not exhausted:
+                    # the increment may have ended on the last page
+                    exhausted = next(pages, None) is None
+                break
+
+        if exhausted:
+            break
+        size *= 2
+
+    return {
+        "value": increments[-1]["score"] if increments else 0.0,
+        "rejected": not increments,
+        "pages": len(cleaned_pages),
+        "early_exit": exit_reason is not None and not exhausted,
+        "exit_reason": exit_reason,
+        "increments": increments,
+        "screening": screening,
+    }
@@ -0,0 +1,121 @@
+"""
+Warm-up of the serving endpoints: a synthetic document goes through the full scoring path before the service reports
+ready, so that the first request does not pay for the imports, the PDF parser, the text cleaning and the model.
+"""
+
+import asyncio
+import logging
+import time
+
+from .inference import clean_text, encode_document, read_pdf, screen_document
+
+__all__ = ["WarmUp", "warm_up_document"]
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_document(pdf_file_path: str, keywords: list, predict) -> dict:
+    """
+    Runs a PDF file through the scoring path of the `classify` endpoint.
+
+    Args:
+        pdf_file_path (str): The path to the PDF file, e.g. one of `resources/benchmark/valid`.
+        keywords (list): The domain-specific keywords.
+        predict (callable): An async function scoring the token payload, e.g. `runner.predict.async_run`.
+
+    Returns:
+        dict: The time in seconds of each stage: `conversion`, `cleaning`, `screening`, `tokenization` and
+        `scoring`.
+    """
+
+    stages = {}
+    start = time.perf_counter()
+
+    pdf = await asyncio.to_thread(read_pdf, pdf_file_path, "warmup")
+    if not pdf.is_valid:
+        raise ValueError(f"The warm-up document is not a valid PDF: {pdf_file_path}")
+    stages["conversion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokens = await asyncio.to_thread(clean_text, pdf.content)
+    stages["cleaning"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    screen_document(tokens, keywords, pdf.number_of_pages)
+    stages["screening"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    payload = await asyncio.to_thread(encode_document, tokens, [keywords])
+    stages["tokenization"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await predict(payload)
+    stages["scoring"] = time.perf_counter() - start
+
+    return stages
+
+
+class WarmUp:
+    """
+    The warm-up state of a service process: the warm-up runs as a task of the event loop of the server, started
+    at startup or by the first readiness check, and is started again by the next check if it failed.
+    """
+
+    state: str
+    """state (str): `pending`, `running`, `ready` or `failed`."""
+    seconds: float
+    """seconds (float): The duration of the last warm-up, None before its end."""
+
+    def __init__(self, warm_up):
+        """
+        Args:
+            warm_up (callable): An async function without arguments running the warm-up, returning the time of each
+                stage (see `warm_up_document`).
+        """
+        self.warm_up = warm_up
+        self.state = "pending"
+        self.seconds = None
+        self.stages = {}
+        self.error = None
+        self._task = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the warm-up completed."""
+        return self.state == "ready"
+
+    def start(self):
+        """Starts the warm-up in the running event loop, unless it is running or completed."""
+
+        if self.state in ("pending", "failed"):
+            self.state = "running"
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        start = time.perf_counter()
+        try:
+            self.stages = await self.warm_up()
+        except Exception as exception:  # pylint: disable=W0718
+            self.state = "failed"
+            self.error = f"{type(exception).__name__}: {exception}"
+            logger.exception("Warm-up failed", exc_info=exception)
+        else:
+            self.state = "ready"
+            self.error = None
+            logger.info(
+                f"Warm-up completed in {time.perf_counter() - start:.2f} seconds: {self.stages}"
+            )
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def status(self) -> dict:
+        """
+        Returns:
+            dict: The `state`, the warm-up `seconds` and `stages`, and the `error` of a failed warm-up.
+        """
+        return {
+            "state": self.state,
+            "seconds": self.seconds,
+            "stages": self.stages,
+            "error": self.error,
+        }
@@ -1,11 +1,67 @@
 """Module for generating embeddings and model training."""
 
+import importlib
 import logging
 import sys
 
-from .training import *
+# the submodules are imported on first access, so that using the exported vectors or the document index when serving
+# does not import the dependencies of the training (mlflow, requests)
+_SUBMODULES = ("training", "index", "vectors", "artifacts", "admission")
+
+_EXPORTS = {
+    "WORD2VEC_PARAMS": "training",
+    "GensimWord2VecModel": "training",
+    "Word2vecCallback": "training",
+    "code_version": "training",
+    "evaluate_similarity": "training",
+    "find_trained_model": "training",
+    "get_domain_keywords": "training",
+    "get_probe_pairs": "training",
+    "list_documents": "training",
+    "load_tokenized_corpus": "training",
+    "load_word2vec_model": "training",
+    "save_word2vec_model": "training",
+    "save_word_embbeddings": "training",
+    "score_quantization_drift": "training",
+    "tokenize_for_training": "training",
+    "train_and_track_experiment": "training",
+    "train_and_track_incremental": "training",
+    "train_word2vec": "training",
+    "train_word2vec_incremental": "training",
+    "training_fingerprint": "training",
+    "DocumentIndex": "index",
+    "IVFDocumentIndex": "index",
+    "embed_tokens": "index",
+    "load_document_index": "index",
+    "tokenize_document": "index",
+    "EmbeddingStore": "vectors",
+    "keyword_similarity_matrix": "vectors",
+    "keyword_vectors": "vectors",
+    "vocabulary_subset": "vectors",
+    "ArtifactStore": "artifacts",
+    "hash_file": "artifacts",
+    "AdmissionRejected": "admission",
+    "is_rejection": "admission",
+    "CpuBudget": "admission",
+    "get_cpu_budget": "admission",
+    "set_cpu_budget": "admission",
+}
+
+__all__ = list(_EXPORTS)
 
 sys.path.append("src")
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    submodules = [_EXPORTS[name]] if name in _EXPORTS else _SUBMODULES
+    for submodule in submodules:
+        module = importlib.import_module(f"{__name__}.{submodule}")
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,247 @@
+"""
+Admission control of the per-request training: a process-wide budget of CPU threads shared by the concurrent
+requests, so that a burst of requests queues instead of starting more training threads than there are cores.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRAINING_CPU_BUDGET = os.getenv("TRAINING_CPU_BUDGET", "")
+TRAINING_MAX_WORKERS = os.getenv("TRAINING_MAX_WORKERS", "4")
+TRAINING_QUEUE_SIZE = os.getenv("TRAINING_QUEUE_SIZE", "16")
+TRAINING_QUEUE_TIMEOUT = os.getenv("TRAINING_QUEUE_TIMEOUT", "30")
+
+logger = logging.getLogger(__name__)
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+class AdmissionRejected(RuntimeError):
+    """
+    Raised when a request is not admitted, because the queue is full or the wait timed out. The request can be retried
+    later.
+    """
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retryable = True
+
+    def as_result(self) -> dict:
+        """
+        Returns the rejection as the result of a scoring request, so that it crosses a process boundary (e.g. of a
+        BentoML runner) as a value, see `is_rejection`.
+        """
+        return {"rejected": self.reason, "message": str(self)}
+
+
+def is_rejection(result) -> bool:
+    """Whether the result of a scoring request is a rejection returned by `AdmissionRejected.as_result`."""
+
+    return isinstance(result, dict) and "rejected" in result
+
+
+def available_cpus() -> int:
+    """Returns the number of CPUs the process can run on, e.g. the CPUs of its container."""
+
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@functools.lru_cache(maxsize=None)
+def _prometheus_metrics() -> tuple:
+    """
+    Creates the queue depth gauge and the wait time histogram exported with the metrics of BentoML, when the model is
+    served by BentoML, or returns (None, None).
+    """
+
+    try:
+        import bentoml.metrics  # pylint: disable=C0415
+    except ImportError:
+        return (None, None)
+
+    queue_depth = bentoml.metrics.Gauge(
+        name="training_queue_depth",
+        documentation="Number of requests waiting for training threads",
+    )
+    wait_seconds = bentoml.metrics.Histogram(
+        name="training_admission_wait_seconds",
+        documentation="Time waited by the requests for training threads",
+    )
+    return (queue_depth, wait_seconds)
+
+
+class CpuBudget:
+    """
+    A budget of training threads shared by the requests of a process.
+
+    A request is granted up to `max_threads` threads, or the threads left if fewer, and waits in a FIFO queue while
+    all the threads are in use. A request is rejected with `AdmissionRejected` when `queue_size` requests are already
+    waiting, or when it waited more than `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        threads: int = None,
+        max_threads: int = int(TRAINING_MAX_WORKERS),
+        queue_size: int = int(TRAINING_QUEUE_SIZE),
+        timeout: float = float(TRAINING_QUEUE_TIMEOUT),
+    ):
+        """
+        Args:
+            threads (int): The number of threads of the budget, by default the number of available CPUs.
+            max_threads (int): The maximum number of threads granted to a request.
+            queue_size (int): The maximum number of requests waiting for threads.
+            timeout (float): The maximum wait of a request in seconds.
+        """
+        self.threads = threads or available_cpus()
+        self.max_threads = max(1, min(max_threads, self.threads))
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self._available = self.threads
+        self._queue = deque()
+        self._condition = threading.Condition()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _export(self, wait_seconds: float = None):
+        queue_depth, wait_histogram = _prometheus_metrics()
+        if queue_depth is not None:
+            queue_depth.set(len(self._queue))
+        if wait_histogram is not None and wait_seconds is not None:
+            wait_histogram.observe(wait_seconds)
+
+    def _wait_for_turn(self, start: float):
+        """Waits in the queue until the request is first and a thread is free, with the condition held."""
+
+        if len(self._queue) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"The training queue is full ({len(self._queue)} requests waiting)",
+                "queue_full",
+            )
+
+        ticket = object()
+        self._queue.append(ticket)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._export()
+        try:
+            while self._queue[0] is not ticket or self._available == 0:
+                remaining = start + self.timeout - time.perf_counter()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    raise AdmissionRejected(
+                        f"No training thread was free within {self.timeout} seconds",
+                        "timeout",
+                    )
+                self._condition.wait(remaining)
+        finally:
+            self._queue.remove(ticket)
+            self._export()
+            # the next request may now be first
+            self._condition.notify_all()
+
+    @contextmanager
+    def acquire(self, threads: int = None):
+        """
+        Waits for training threads and holds them until the end of the `with` block.
+
+        Args:
+            threads (int): The number of threads wanted, at most and by default `max_threads`.
+
+        Yields:
+            int: The number of threads granted, at least one.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out.
+        """
+
+        threads = min(threads or self.max_threads, self.max_threads)
+        start = time.perf_counter()
+        with self._condition:
+            if self._queue or self._available == 0:
+                self._wait_for_turn(start)
+
+            granted = min(threads, self._available)
+            self._available -= granted
+            self.admitted += 1
+            wait_seconds = time.perf_counter() - start
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        self._export(wait_seconds)
+
+        try:
+            yield granted
+        finally:
+            with self._condition:
+                self._available += granted
+                self._condition.notify_all()
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            dict: The `threads` of the budget and the `threads_in_use`, the current and maximum `queue_depth`, the
+            number of requests `admitted`, `rejected` (queue full) and `timed_out`, and the mean and maximum wait in
+            seconds of the admitted requests.
+        """
+
+        with self._condition:
+            return {
+                "threads": self.threads,
+                "threads_in_use": self.threads - self._available,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_seconds_mean": self.wait_seconds_total / max(self.admitted, 1),
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+def get_cpu_budget() -> CpuBudget:
+    """
+    Returns the CPU budget of the process, created on the first call with `TRAINING_CPU_BUDGET` threads (by default
+    the number of available CPUs).
+    """
+
+    global _budget  # pylint: disable=W0603
+
+    with _budget_lock:
+        if _budget is None:
+            _budget = CpuBudget(
+                threads=int(TRAINING_CPU_BUDGET) if TRAINING_CPU_BUDGET else None
+            )
+            logger.info(
+                f"Training CPU budget of {_budget.threads} threads, at most {_budget.max_threads} per request"
+            )
+        return _budget
+
+
+def set_cpu_budget(threads: int) -> CpuBudget:
+    """
+    Replaces the CPU budget of the process by a budget of `threads` threads, e.g. in the worker processes of a pool,
+    which share the CPUs of the machine.
+    """
+
+    global _budget  # pylint: disable=W0603
+
+    with _budget_lock:
+        _budget = CpuBudget(threads=threads)
+        logger.info(
+            f"Training CPU budget of {_budget.threads} threads, at most {_budget.max_threads} per request"
+        )
+        return _budget
@@ -0,0 +1,199 @@
+"""Content-addressed store of MLflow artifacts, so that identical files are uploaded only once."""
+
+import hashlib
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+
+import mlflow
+import smart_open
+from mlflow.tracking import MlflowClient
+
+HASH_CHUNK_SIZE = 1 << 20
+
+STORE_RUN_TAG = "artifact_store"
+STORE_RUN_NAME = "artifact-store"
+REFERENCE_SUFFIX = ".ref.json"
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(hasher, file_path: str, chunk_size: int = HASH_CHUNK_SIZE):
+    """
+    Feeds the raw bytes of a file (local or remote, not decompressed) to a hash object, chunk by chunk, so that large
+    files are never read fully in memory.
+
+    Args:
+        hasher: A hash object of `hashlib`.
+        file_path (str): The path or URI of the file.
+        chunk_size (int): The size in bytes of the chunks.
+    """
+
+    with smart_open.open(file_path, "rb", compression="disable") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+
+
+class ArtifactStore:
+    """
+    A content-addressed store of files kept in a dedicated MLflow run of an experiment, so that it works with any
+    artifact backend of MLflow (local directory, S3, proxied artifacts).
+
+    Each file is stored once under its SHA-256 digest (`<digest[:2]>/<digest>`); the runs logging it only record a small
+    JSON reference with the digest, the size and the URI of the stored file.
+    """
+
+    experiment_name: str
+    """experiment_name (str): The name of the experiment of the store run."""
+
+    def __init__(self, experiment_name: str, client: MlflowClient = None):
+        self.experiment_name = experiment_name
+        self.client = client or MlflowClient()
+        self._run_id = None
+
+    @property
+    def run_id(self) -> str:
+        """The id of the MLflow run holding the stored files, created on first use."""
+
+        if self._run_id is None:
+            experiment = self.client.get_experiment_by_name(self.experiment_name)
+            if experiment is None:
+                experiment_id = self.client.create_experiment(self.experiment_name)
+            else:
+                experiment_id = experiment.experiment_id
+
+            runs = self.client.search_runs(
+                [experiment_id],
+                filter_string=f"tags.{STORE_RUN_TAG} = 'true'",
+                order_by=["attributes.start_time ASC"],
+                max_results=1,
+            )
+            if runs:
+                self._run_id = runs[0].info.run_id
+            else:
+                run = self.client.create_run(
+                    experiment_id,
+                    tags={STORE_RUN_TAG: "true"},
+                    run_name=STORE_RUN_NAME,
+                )
+                self.client.set_terminated(run.info.run_id)
+                self._run_id = run.info.run_id
+                logger.info(f"Created the artifact store run {self._run_id}")
+
+        return self._run_id
+
+    @staticmethod
+    def _blob_directory(digest: str) -> str:
+        return digest[:2]
+
+    def contains(self, digest: str) -> bool:
+        """
+        Checks if a file is in the store.
+
+        Args:
+            digest (str): The SHA-256 hex digest of the file.
+
+        Returns:
+            bool: True if the file is stored.
+        """
+
+        blob_path = posixpath.join(self._blob_directory(digest), digest)
+        return any(
+            info.path == blob_path
+            for info in self.client.list_artifacts(
+                self.run_id, self._blob_directory(digest)
+            )
+        )
+
+    def put(self, local_path: str) -> dict:
+        """
+        Stores a local file, unless a file with the same content is already stored.
+
+        Args:
+            local_path (str): The path of the file.
+
+        Returns:
+            dict: The reference of the stored file: its `sha256` digest, `size`, original `name` and `uri`.
+        """
+
+        hasher = hashlib.sha256()
+        hash_file(hasher, local_path)
+        digest = hasher.hexdigest()
+
+        if self.contains(digest):
+            logger.info(f"Skipping the upload of {local_path}: already stored")
+        else:
+            # the file is uploaded from disk under the name of its digest, through a link to avoid a copy
+            link_directory = tempfile.mkdtemp(prefix="artifact_store_")
+            try:
+                link_path = os.path.join(link_directory, digest)
+                os.symlink(os.path.abspath(local_path), link_path)
+                self.client.log_artifact(
+                    self.run_id, link_path, self._blob_directory(digest)
+                )
+            finally:
+                shutil.rmtree(link_directory)
+            logger.info(f"Stored {local_path} as {digest}")
+
+        run = self.client.get_run(self.run_id)
+        return {
+            "sha256": digest,
+            "size": os.path.getsize(local_path),
+            "name": os.path.basename(local_path),
+            "uri": posixpath.join(
+                run.info.artifact_uri, self._blob_directory(digest), digest
+            ),
+        }
+
+    def log_artifact(self, local_path: str, artifact_path: str = None) -> dict:
+        """
+        Stores a local file and logs its reference in the active MLflow run, in place of the file itself.
+
+        Args:
+            local_path (str): The path of the file.
+            artifact_path (str): The directory of the reference in the artifacts of the run.
+
+        Returns:
+            dict: The reference of the stored file, see `put`.
+        """
+
+        reference = self.put(local_path)
+        reference_file = os.path.basename(local_path) + REFERENCE_SUFFIX
+        mlflow.log_dict(
+            reference,
+            posixpath.join(artifact_path, reference_file)
+            if artifact_path
+            else reference_file,
+        )
+        return reference
+
+    def download(self, reference: dict, dst_path: str) -> str:
+        """
+        Downloads a stored file.
+
+        Args:
+            reference (dict): The reference of the file, see `put`.
+            dst_path (str): The local directory where the file is downloaded, with its original name.
+
+        Returns:
+            str: The local path of the downloaded file.
+        """
+
+        download_directory = tempfile.mkdtemp(prefix="artifact_store_")
+        try:
+            blob_path = self.client.download_artifacts(
+                self.run_id,
+                posixpath.join(
+                    self._blob_directory(reference["sha256"]), reference["sha256"]
+                ),
+                download_directory,
+            )
+            local_path = os.path.join(dst_path, reference["name"])
+            os.makedirs(dst_path, exist_ok=True)
+            shutil.move(blob_path, local_path)
+        finally:
+            shutil.rmtree(download_directory)
+
+        return local_path
@@ -0,0 +1,374 @@
+"""Corpus-wide document embedding index for similar-paper search."""
+
+import json
+import logging
+import os
+
+import numpy as np
+import smart_open
+from gensim.models import KeyedVectors
+
+# pylint: disable=C0413
+from preparation.clean import get_bigram_from_vocabulary
+from preparation.convert import list_text_files, text_file_stem
+
+INDEX_BLOCK_SIZE = os.getenv("INDEX_BLOCK_SIZE", "65536")
+
+VECTORS_FNAME = "vectors.npy"
+IDS_FNAME = "ids.json"
+KEYED_VECTORS_FNAME = "keyed_vectors.kv"
+CENTROIDS_FNAME = "centroids.npy"
+LISTS_FNAME = "lists.npy"
+LIST_OFFSETS_FNAME = "list_offsets.npy"
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize_document(text: str, vocabulary: list) -> list:
+    """
+    Splits a cleaned document into tokens, joining the domain-specific n-grams found in the text.
+
+    Args:
+        text (str): The cleaned text of the document (see `combined_text_cleaning`).
+        vocabulary (list): A list of domain-specific keywords, as returned by `get_domain_keywords`.
+
+    Returns:
+        list: The tokens of the document.
+    """
+
+    return get_bigram_from_vocabulary(vocabulary, text).split()
+
+
+def embed_tokens(keyed_vectors: KeyedVectors, tokens: list) -> np.ndarray:
+    """
+    Computes a fixed-length embedding of a document as the mean of the unit word vectors of its tokens in the
+    vocabulary of the corpus model, normalized to unit length. The vocabulary of the corpus model is made of the
+    domain-specific keywords, so the embedding is the mean of the vectors of the keyword occurrences.
+
+    Args:
+        keyed_vectors (KeyedVectors): The word vectors of the corpus model.
+        tokens (list): The tokens of the document.
+
+    Returns:
+        np.ndarray: A float32 unit vector, all zeros if no token is in the vocabulary of the model.
+    """
+
+    indexes = [
+        index
+        for index in map(keyed_vectors.key_to_index.get, tokens)
+        if index is not None
+    ]
+
+    embedding = np.zeros(keyed_vectors.vector_size, dtype=np.float32)
+    if not indexes:
+        return embedding
+
+    keyed_vectors.fill_norms()
+    weights = 1.0 / keyed_vectors.norms[indexes]
+    embedding = weights @ keyed_vectors.vectors[indexes]
+
+    norm = np.linalg.norm(embedding)
+    if norm > 0:
+        embedding /= norm
+    return embedding.astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> tuple:
+    """Returns the k highest scores and their ids, best first."""
+
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[top], ids[top]
+    order = np.argsort(-scores, kind="stable")
+    return scores[order], ids[order]
+
+
+class DocumentIndex:
+    """
+    An exact nearest-neighbour index of the documents of the training corpus, stored as a contiguous float32 matrix
+    of unit embeddings plus a table of document ids.
+    """
+
+    vectors: np.ndarray
+    """vectors (np.ndarray): The (documents, dimensions) float32 matrix of unit document embeddings."""
+    ids: list
+    """ids (list): The document ids, in the same order as the rows of `vectors`."""
+
+    def __init__(self, vectors: np.ndarray, ids: list, keyed_vectors: KeyedVectors):
+        self.vectors = vectors
+        self.ids = ids
+        self.keyed_vectors = keyed_vectors
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def build(
+        cls,
+        keyed_vectors: KeyedVectors,
+        txt_input_directory: str,
+        vocabulary: list,
+    ):
+        """
+        Embeds every text file of a directory with the word vectors of the corpus model.
+
+        Args:
+            keyed_vectors (KeyedVectors): The word vectors of the corpus model.
+            txt_input_directory (str): The path to the directory containing the cleaned text files.
+            vocabulary (list): A list of domain-specific keywords, as returned by `get_domain_keywords`.
+
+        Returns:
+            DocumentIndex: The index of the documents, identified by their file name without extension.
+        """
+
+        files = list_text_files(txt_input_directory)
+        vectors = np.zeros((len(files), keyed_vectors.vector_size), dtype=np.float32)
+        ids = []
+        for row, file in enumerate(files):
+            with smart_open.open(file, "r", encoding="utf-8") as infile:
+                tokens = tokenize_document(infile.read(), vocabulary)
+            vectors[row] = embed_tokens(keyed_vectors, tokens)
+            ids.append(text_file_stem(file))
+
+        logger.info(f"Embedded {len(ids)} documents from {txt_input_directory}")
+        return cls(vectors, ids, keyed_vectors)
+
+    def save(self, path: str):
+        """
+        Saves the index into a directory: the embeddings as a .npy matrix, the ids as JSON and the word vectors.
+
+        Args:
+            path (str): The path to the directory where the index will be saved.
+        """
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        np.save(os.path.join(path, VECTORS_FNAME), np.ascontiguousarray(self.vectors))
+        with open(os.path.join(path, IDS_FNAME), "w", encoding="utf-8") as outfile:
+            json.dump(self.ids, outfile)
+        self.keyed_vectors.save(os.path.join(path, KEYED_VECTORS_FNAME))
+        self.logger.info(f"Saved index of {len(self.ids)} documents into: {path}")
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "r"):
+        """
+        Loads an index saved with `save`, memory-mapping the matrices by default.
+
+        Args:
+            path (str): The path to the directory of the index.
+            mmap_mode (str): The numpy memory-map mode, None to load the matrices in memory.
+
+        Returns:
+            DocumentIndex: The loaded index.
+        """
+
+        vectors = np.load(os.path.join(path, VECTORS_FNAME), mmap_mode=mmap_mode)
+        with open(os.path.join(path, IDS_FNAME), "r", encoding="utf-8") as infile:
+            ids = json.load(infile)
+        keyed_vectors = KeyedVectors.load(
+            os.path.join(path, KEYED_VECTORS_FNAME), mmap=mmap_mode
+        )
+        return cls(vectors, ids, keyed_vectors)
+
+    def embed(self, text: str, vocabulary: list) -> np.ndarray:
+        """
+        Embeds a cleaned document in the same space as the indexed documents.
+
+        Args:
+            text (str): The cleaned text of the document.
+            vocabulary (list): A list of domain-specific keywords, as returned by `get_domain_keywords`.
+
+        Returns:
+            np.ndarray: A float32 unit vector.
+        """
+
+        tokens = tokenize_document(text, vocabulary)
+        return embed_tokens(self.keyed_vectors, tokens)
+
+    def search(
+        self, query: np.ndarray, k: int = 10, block_size: int = int(INDEX_BLOCK_SIZE)
+    ) -> list:
+        """
+        Returns the k documents most similar to a query embedding, scanning the matrix in blocks of rows so that the
+        memory used by the scores does not grow with the size of the corpus.
+
+        Args:
+            query (np.ndarray): A unit query embedding.
+            k (int): The number of documents to return.
+            block_size (int): The number of rows multiplied at once.
+
+        Returns:
+            list: A list of (id, cosine similarity) tuples, most similar first.
+        """
+
+        scores, rows = self._search_rows(query, k, block_size, np.arange(len(self.ids)))
+        return [(self.ids[row], float(score)) for score, row in zip(scores, rows)]
+
+    def _search_rows(
+        self, query: np.ndarray, k: int, block_size: int, rows: np.ndarray
+    ) -> tuple:
+        """Returns the k best (scores, rows) among the given rows, which must be sorted."""
+
+        query = np.asarray(query, dtype=np.float32)
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for start in range(0, len(rows), block_size):
+            block_rows = rows[start : start + block_size]
+            if block_rows[-1] - block_rows[0] + 1 == len(block_rows):
+                block = self.vectors[block_rows[0] : block_rows[-1] + 1]
+            else:
+                block = self.vectors[block_rows]
+            scores = block @ query
+            best_scores, best_rows = _top_k(
+                np.concatenate([best_scores, scores]),
+                np.concatenate([best_rows, block_rows]),
+                k,
+            )
+        return best_scores, best_rows
+
+
+class IVFDocumentIndex(DocumentIndex):
+    """
+    An approximate nearest-neighbour index that partitions the documents into inverted lists around spherical
+    k-means centroids, and only scans the lists of the `n_probe` centroids closest to the query.
+    """
+
+    centroids: np.ndarray
+    """centroids (np.ndarray): The (lists, dimensions) float32 matrix of unit centroids."""
+    lists: np.ndarray
+    """lists (np.ndarray): The document rows sorted by inverted list."""
+    list_offsets: np.ndarray
+    """list_offsets (np.ndarray): The start of each inverted list in `lists`, plus the total length."""
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: list,
+        keyed_vectors: KeyedVectors,
+        centroids: np.ndarray = None,
+        lists: np.ndarray = None,
+        list_offsets: np.ndarray = None,
+    ):
+        super().__init__(vectors, ids, keyed_vectors)
+        self.centroids = centroids
+        self.lists = lists
+        self.list_offsets = list_offsets
+
+    @classmethod
+    def from_index(
+        cls, index: DocumentIndex, n_lists: int = None, n_iter: int = 10, seed: int = 0
+    ):
+        """
+        Partitions the documents of an exact index into inverted lists.
+
+        Args:
+            index (DocumentIndex): The exact index.
+            n_lists (int): The number of inverted lists, by default the square root of the number of documents.
+            n_iter (int): The number of k-means iterations.
+            seed (int): The seed of the random choice of the initial centroids.
+
+        Returns:
+            IVFDocumentIndex: The approximate index.
+        """
+
+        vectors = np.asarray(index.vectors)
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for centroid in range(n_lists):
+                members = vectors[assignments == centroid]
+                if len(members) > 0:
+                    centroids[centroid] = members.sum(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms > 0, norms, 1.0)
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+        lists = np.argsort(assignments, kind="stable")
+        list_offsets = np.searchsorted(assignments[lists], np.arange(n_lists + 1))
+
+        return cls(
+            index.vectors,
+            index.ids,
+            index.keyed_vectors,
+            centroids.astype(np.float32),
+            lists,
+            list_offsets,
+        )
+
+    def save(self, path: str):
+        super().save(path)
+        np.save(os.path.join(path, CENTROIDS_FNAME), self.centroids)
+        np.save(os.path.join(path, LISTS_FNAME), self.lists)
+        np.save(os.path.join(path, LIST_OFFSETS_FNAME), self.list_offsets)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "r"):
+        index = DocumentIndex.load(path, mmap_mode)
+        return cls(
+            index.vectors,
+            index.ids,
+            index.keyed_vectors,
+            np.load(os.path.join(path, CENTROIDS_FNAME)),
+            np.load(os.path.join(path, LISTS_FNAME)),
+            np.load(os.path.join(path, LIST_OFFSETS_FNAME)),
+        )
+
+    # pylint: disable=W0221
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        block_size: int = int(INDEX_BLOCK_SIZE),
+        n_probe: int = 4,
+    ) -> list:
+        """
+        Returns approximately the k documents most similar to a query embedding.
+
+        Args:
+            query (np.ndarray): A unit query embedding.
+            k (int): The number of documents to return.
+            block_size (int): The number of rows multiplied at once.
+            n_probe (int): The number of inverted lists to scan.
+
+        Returns:
+            list: A list of (id, cosine similarity) tuples, most similar first.
+        """
+
+        query = np.asarray(query, dtype=np.float32)
+        n_probe = min(n_probe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        rows = np.sort(
+            np.concatenate(
+                [
+                    self.lists[self.list_offsets[probe] : self.list_offsets[probe + 1]]
+                    for probe in probes
+                ]
+            )
+        )
+        if len(rows) == 0:
+            return []
+
+        scores, rows = self._search_rows(query, k, block_size, rows)
+        return [(self.ids[row], float(score)) for score, row in zip(scores, rows)]
+
+
+def load_document_index(path: str, mmap_mode: str = "r") -> DocumentIndex:
+    """
+    Loads an exact or approximate index saved in a directory.
+
+    Args:
+        path (str): The path to the directory of the index.
+        mmap_mode (str): The numpy memory-map mode, None to load the matrices in memory.
+
+    Returns:
+        DocumentIndex: The loaded index.
+    """
+
+    if os.path.exists(os.path.join(path, CENTROIDS_FNAME)):
+        return IVFDocumentIndex.load(path, mmap_mode)
+    return DocumentIndex.load(path, mmap_mode)
@@ -1,55 +1,240 @@
 """Training module."""
+import hashlib
+import inspect
+import json
 import logging
 import os
 import platform
+import random
+import shutil
 import sys
 import tempfile
+import time
+from pathlib import Path
+
 import requests
 
 import gensim
 import mlflow
+import mlflow.artifacts
 import mlflow.pyfunc
 import numpy as np
 import smart_open
 from gensim.models import KeyedVectors, Word2Vec
 from gensim.models.callbacks import CallbackAny2Vec
 from gensim.utils import RULE_KEEP
-from scipy.spatial import distance
 
 sys.path.insert(0, os.path.abspath("src"))
 
 # pylint: disable=C0413
-from preparation.clean import (
-    clean_stopwords_str,
-    get_bigram,
-    get_bigram_from_vocabulary,
-)
+from preparation.clean import get_bigram, tokenize_for_training
+
+# pylint: disable=C0413
+from preparation.cache import TokenizedCorpus, get_or_build_tokenized_corpus
+
+# pylint: disable=C0413
+from preparation.keywords import KeywordSet, KeywordSetCache
+from preparation.payload import decode_tokens
+
+# pylint: disable=C0413
+from preparation.convert import get_file_contents, list_text_files, text_file_stem
+
+# pylint: disable=C0413
+from preparation.screening import screen_document
 
 # pylint: disable=C0413
-from preparation.convert import get_file_contents
+from training.admission import get_cpu_budget
+from training.artifacts import ArtifactStore, hash_file
+
+# pylint: disable=C0413
+from training.vectors import (
+    EmbeddingStore,
+    keyword_similarity_matrix,
+    keyword_vectors,
+    vocabulary_subset,
+)
+
+MODEL_EXPORT_DTYPE = os.getenv("MODEL_EXPORT_DTYPE", "")
+MODEL_SHARED_VECTORS = os.getenv("MODEL_SHARED_VECTORS", "false")
+MLFLOW_ARTIFACT_DEDUP = os.getenv("MLFLOW_ARTIFACT_DEDUP", "true")
+TRAINING_PROBE_PAIRS = os.getenv("TRAINING_PROBE_PAIRS", "")
+PREPROCESSING_PROCESSES = os.getenv("PREPROCESSING_PROCESSES", "1")
+CORPUS_DECOMPRESSION_THREADS = os.getenv("CORPUS_DECOMPRESSION_THREADS", "1")
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true")
+CORPUS_CACHE_DIR = os.getenv(
+    "CORPUS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "corpus_cache")
+)
+
+EMBEDDINGS_ARTIFACT = "embeddings"
+
+TRAINING_REPLAY_RATIO = os.getenv("TRAINING_REPLAY_RATIO", "0.2")
+TRAINING_CHECKPOINT_DIR = os.getenv(
+    "TRAINING_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "word2vec_checkpoints")
+)
+
+MLFLOW_EXPERIMENT = "ppml_rr"
+FINGERPRINT_TAG = "fingerprint"
+MODEL_URI_TAG = "model_uri"
+PARENT_RUN_TAG = "parent_run_id"
+
+WORD2VEC_MODEL_ARTIFACT = "word2vec_model"
+WORD2VEC_MODEL_FNAME = "word2vec.model"
+DOCUMENTS_ARTIFACT = "documents.json"
+CHECKPOINT_STATE_FNAME = "state.json"
+
+WORD2VEC_PARAMS = {"vector_size": 1000, "window": 5, "min_count": 4, "epochs": 10}
 
 logger = logging.getLogger(__name__)
 
 
 class GensimWord2VecModel(mlflow.pyfunc.PythonModel):
-    """A wrapper class for the Gensim Word2Vec model to be used with MLflow."""
+    """
+    A wrapper class for the Gensim Word2Vec model to be used with MLflow.
+
+    A document is scored against the domain keywords of the model, or against the keywords given with the document,
+    so that one model serves the keyword sets of several teams. Each distinct keyword set is compiled once (see
+    `compile_keyword_set`) and kept in a bounded LRU cache of `KEYWORD_SET_CACHE_SIZE` keyword sets.
+    """
 
-    def __init__(self, word2vec_model, domain_keywords_path):
-        """Initialize the GensimWord2VecModel class."""
+    def __init__(self, word2vec_model, domain_keywords_path, shared: bool = False):
+        """
+        Initialize the GensimWord2VecModel class.
+
+        The corpus model can be the full Word2Vec model or an EmbeddingStore with only its normalized vectors. A
+        shared EmbeddingStore is not pickled with the model: it is logged as the `embeddings` artifact and memory-mapped
+        read-only by `load_context`, so that all the worker processes serving the model share the same pages.
+        """
         self.word2vec_model = word2vec_model
         self.domain_keywords_path = domain_keywords_path
+        self.shared = shared
         self.logger = logging.getLogger(__name__)
+        self._keyword_sets = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("shared"):
+            state["word2vec_model"] = None
+        # the compiled keyword sets are rebuilt on demand
+        state["_keyword_sets"] = None
+        return state
 
-    # pylint: disable=R0914
-    def predict(self, context, model_input: str) -> float:
-        """Predict the similarity score of a document with a domain-specific vocabulary."""
+    def compile_keyword_set(self, keywords: list) -> KeywordSet:
+        """
+        Compiles a keyword set for scoring with the corpus model: the n-gram substitutions of the tokenization, the
+        keywords in the vocabulary of the corpus model (`in_vocabulary`), and their float32 unit vectors (`vectors`).
+        The vectors of a quantized corpus model are not copied to float32 (`vectors` is None): `score` computes the
+        similarities on its stored rows.
+        """
+        keyword_set = KeywordSet(keywords)
+        keyword_set.in_vocabulary = vocabulary_subset(self.word2vec_model, keywords)
+        keyword_set.vectors = None
+        if not (
+            isinstance(self.word2vec_model, EmbeddingStore)
+            and self.word2vec_model.dtype != "float32"
+        ):
+            keyword_set.vectors = keyword_vectors(
+                self.word2vec_model, keyword_set.in_vocabulary
+            )
+        missing = sorted(set(keywords) - set(keyword_set.in_vocabulary))
+        if missing:
+            # the baseline scoring raised a KeyError on these keywords, they are now left out of the scores
+            self.logger.warning(
+                f"{len(missing)} keywords are not in the corpus model and are not scored: {missing}"
+            )
+        return keyword_set
+
+    def get_keyword_set(self, keywords: list = None) -> KeywordSet:
+        """
+        Returns the compiled keyword set of a keyword list, by default of the domain keywords of the model, from the
+        cache of keyword sets.
+        """
+        if getattr(self, "_keyword_sets", None) is None:
+            self._keyword_sets = KeywordSetCache(self.compile_keyword_set)
+        if keywords is None:
+            keywords = get_domain_keywords(self.domain_keywords_path)[0]
+        return self._keyword_sets.get(keywords)
+
+    def load_context(self, context):
+        """
+        Memory-map the shared embeddings artifact, if the model was logged with one, and warm up the model unless
+        MODEL_WARMUP is "false", so that each process serving the model pays its first-request costs when loading it.
+        """
+        if self.word2vec_model is None and EMBEDDINGS_ARTIFACT in context.artifacts:
+            self.word2vec_model = EmbeddingStore.load(
+                context.artifacts[EMBEDDINGS_ARTIFACT], mmap_mode="r"
+            )
+            self.logger.info(
+                f"Memory-mapped {len(self.word2vec_model)} shared vectors from: "
+                f"{context.artifacts[EMBEDDINGS_ARTIFACT]}"
+            )
+
+        if MODEL_WARMUP == "true":
+            try:
+                self.warm_up()
+            except Exception as exception:  # pylint: disable=W0718
+                # a failed warm-up only delays the first-request costs to the first request
+                self.logger.exception("Model warm-up failed", exc_info=exception)
+
+    def warm_up(self) -> float:
+        """
+        Scores a synthetic document made of the domain keywords, to read the keywords, initialize gensim and BLAS
+        and touch the pages of the corpus vectors before the first request.
+
+        Returns:
+            float: The warm-up time in seconds.
+        """
+        start = time.perf_counter()
         vocabulary = get_domain_keywords(self.domain_keywords_path)
-        text = get_bigram_from_vocabulary(vocabulary, model_input)
-        tokens = clean_stopwords_str(text)
-        text = get_bigram(tokens)
+        # every keyword is repeated to reach the minimum count of the document model
+        text = " ".join(vocabulary[0] * WORD2VEC_PARAMS["min_count"])
+        score = self.predict(None, text)
 
-        # train word2vec on the document to be analysed
-        (model, trained_word_count, raw_word_count) = train_word2vec(text, vocabulary)
+        elapsed = time.perf_counter() - start
+        self.logger.info(f"Model warmed up in {elapsed:.2f} seconds (score {score})")
+        return elapsed
+
+    def predict(self, context, model_input) -> float:
+        """
+        Predict the similarity score of a document with a domain-specific vocabulary.
+
+        The document is either its cleaned text, or its tokens encoded by `encode_tokens` by a caller that already
+        screened and tokenized it, e.g. the API server, so that only a compact int32 array crosses the process
+        boundary and the document is tokenized once.
+
+        The input can also be a dict with the document as `document` and the keywords to score it against as
+        `keywords`, instead of the domain keywords of the model.
+        """
+        keywords = None
+        if isinstance(model_input, dict):
+            keywords = model_input.get("keywords")
+            model_input = model_input["document"]
+        keyword_set = self.get_keyword_set(keywords)
+        vocabulary = keyword_set.vocabulary
+
+        if isinstance(model_input, np.ndarray):
+            tokens, unknown_tokens = decode_tokens(model_input, vocabulary[0])
+            self.logger.info(
+                f"Decoded {len(tokens)} keyword tokens ({unknown_tokens} other tokens)"
+            )
+            text = [tokens]
+        else:
+            # empty documents and documents without any domain keyword cannot train a single word
+            screening = screen_document(model_input, vocabulary[0])
+            if not screening["passed"]:
+                self.logger.info(
+                    f"Document rejected by screening: {screening['reason']}"
+                )
+                return 0.0
+
+            text = tokenize_for_training(
+                model_input, vocabulary, phrases=keyword_set.phrases
+            )
+
+        # train word2vec on the document to be analysed, with the threads granted by the CPU budget of the process
+        with get_cpu_budget().acquire() as workers:
+            (model, trained_word_count, raw_word_count) = train_word2vec(
+                text, vocabulary, workers=workers
+            )
 
         self.logger.info(f"Training on {raw_word_count} total raw words")
         self.logger.info(f"Effective words : {trained_word_count}")
@@ -57,26 +242,52 @@ class GensimWord2VecModel(mlflow.pyfunc.PythonModel):
         if trained_word_count == 0:
             return 0.0
 
+        return self.score(model, text, vocabulary, keyword_set)
+
+    def score(
+        self,
+        document_model: Word2Vec,
+        text: list,
+        vocabulary: list,
+        keyword_set: KeywordSet = None,
+    ) -> float:
+        """
+        Scores a document model trained on the tokens of a document against the corpus model: for each keyword of
+        the document, the best cosine similarity with the corpus vectors of the vocabulary, averaged. The vocabulary
+        is compiled with `get_keyword_set`, unless its compiled `keyword_set` is given.
+        """
+
+        if keyword_set is None:
+            keyword_set = self.get_keyword_set(vocabulary[0])
+
         # get the words that match both in the document and in the vocabulary
-        word_match_with_vocabulary = []
-        for word in text[0]:
-            for keyword in vocabulary[0]:
-                if word == keyword:
-                    word_match_with_vocabulary.append(word)
+        word_match_with_vocabulary = [
+            word for word in text[0] for _ in range(keyword_set.counts.get(word, 0))
+        ]
 
         self.logger.info(
             f"Matched word count from vocabulary: {len(word_match_with_vocabulary)}"
         )
         self.logger.info(f"Matched words in vocabulary: {word_match_with_vocabulary}")
 
-        matrix = np.full((len(vocabulary[0]), len(word_match_with_vocabulary)), 0.0)
+        document_vectors = np.array(
+            [
+                document_model.wv.get_vector(word, norm=True)
+                for word in word_match_with_vocabulary
+            ],
+            dtype=np.float32,
+        ).reshape(len(word_match_with_vocabulary), document_model.wv.vector_size)
 
-        for i, word_vocab in enumerate(vocabulary[0]):
-            for j, word_vocab_match in enumerate(word_match_with_vocabulary):
-                matrix[i][j] = 1 - distance.cosine(
-                    self.word2vec_model.wv.get_vector(word_vocab),
-                    model.wv.get_vector(word_vocab_match),
-                )
+        if not keyword_set.in_vocabulary:
+            self.logger.info("No keyword is in the corpus model")
+            return 0.0
+
+        if keyword_set.vectors is None:
+            matrix = keyword_similarity_matrix(
+                self.word2vec_model, keyword_set.in_vocabulary, document_vectors
+            )
+        else:
+            matrix = keyword_set.vectors @ document_vectors.T
 
         matrix_mean = np.mean(matrix, axis=0)
         matrix_max = np.max(matrix, axis=0)
@@ -84,27 +295,139 @@ class GensimWord2VecModel(mlflow.pyfunc.PythonModel):
         self.logger.info(f"Mean of the max with vocabulary {np.mean(matrix_max)}")
         self.logger.info(f"Mean with vabab vocabulary {np.mean(matrix_mean)}")
 
-        return np.mean(matrix_max)
+        return float(np.mean(matrix_max))
+
+
+def load_tokenized_corpus(
+    text_corpus: str, domain_keywords: str, cache_directory: str = CORPUS_CACHE_DIR
+) -> TokenizedCorpus:
+    """
+    Tokenizes a text corpus for training with `tokenize_for_training`, or loads it from the cache of tokenized
+    corpora. The cache entries are keyed by the corpus, the keywords and the source of the preprocessing, so a change
+    of any of them tokenizes the corpus again.
+
+    Args:
+        text_corpus (str): The path to the text corpus.
+        domain_keywords (str): The path to the file containing the domain-specific keywords.
+        cache_directory (str): The directory of the cache, None to tokenize without caching.
+
+    Returns:
+        TokenizedCorpus: The tokenized corpus.
+    """
+
+    vocabulary = get_domain_keywords(domain_keywords)
+
+    def tokenize():
+        return tokenize_for_training(
+            get_file_contents(text_corpus, int(CORPUS_DECOMPRESSION_THREADS)),
+            vocabulary,
+            int(PREPROCESSING_PROCESSES),
+        )
+
+    if cache_directory is None:
+        return TokenizedCorpus.build(tokenize())
+
+    hasher = hashlib.sha256()
+    hash_file(hasher, text_corpus)
+    hasher.update(b"\0")
+    hash_file(hasher, domain_keywords)
+    hasher.update(b"\0")
+    hash_file(hasher, inspect.getsourcefile(get_bigram))
+    hasher.update(inspect.getsource(tokenize_for_training).encode("utf-8"))
+
+    return get_or_build_tokenized_corpus(cache_directory, hasher.hexdigest(), tokenize)
 
 
 class Word2vecCallback(CallbackAny2Vec):
     """
-    A callback class for logging the training loss after each epoch of a Word2Vec model.
+    A callback class for logging the training telemetry after each epoch of a Word2Vec model: the loss of the epoch,
+    the wall time, the words per second, the effective utilization of the worker threads and, optionally, the
+    similarity of some probe word pairs. The metrics are logged as step metrics of the active MLflow run, if any.
+
+    Gensim reports the loss accumulated since the beginning of the `train` call, so the loss of an epoch is the
+    difference with the previous epoch. The utilization is the CPU time of the process during the epoch divided by the
+    wall time and the number of workers.
     """
 
-    def __init__(self):
+    def __init__(self, words_per_epoch: int = None, probe_pairs: list = None):
+        """
+        Initialize the Word2vecCallback class.
+
+        Args:
+            words_per_epoch (int): The number of words of the training sentences, to compute the words per second.
+            probe_pairs (list): The (word, word) pairs whose similarity is logged after each epoch.
+        """
         self.epoch = 0
+        self.words_per_epoch = words_per_epoch
+        self.probe_pairs = probe_pairs or []
+        self.history = []
+        self.previous_loss = 0.0
+        self.epoch_start = None
+        self.epoch_cpu_start = None
         self.logger = logging.getLogger(__name__)
 
+    def on_train_begin(self, model):
+        """
+        Resets the loss, as gensim resets it at the beginning of each `train` call.
+        """
+        self.previous_loss = 0.0
+
+    def on_epoch_begin(self, model):
+        """
+        Starts the wall and CPU clocks of the epoch.
+        """
+        self.epoch_start = time.perf_counter()
+        self.epoch_cpu_start = time.process_time()
+
     def on_epoch_end(self, model):
         """
-        Logs the training loss at the end of each epoch.
+        Logs the telemetry of the epoch.
         """
         loss = model.get_latest_training_loss()
-        self.logger.info(f"Loss after epoch {self.epoch} : {loss}")
+        metrics = {"epoch_loss": loss - self.previous_loss, "training_loss": loss}
+        self.previous_loss = loss
+
+        if self.epoch_start is not None:
+            wall_time = time.perf_counter() - self.epoch_start
+            cpu_time = time.process_time() - self.epoch_cpu_start
+            metrics["epoch_seconds"] = wall_time
+            if wall_time > 0:
+                metrics["worker_utilization"] = cpu_time / (wall_time * model.workers)
+                if self.words_per_epoch is not None:
+                    metrics["words_per_second"] = self.words_per_epoch / wall_time
+
+        for word1, word2 in self.probe_pairs:
+            if word1 in model.wv.key_to_index and word2 in model.wv.key_to_index:
+                metrics[f"probe.{word1}.{word2}"] = float(
+                    model.wv.similarity(word1, word2)
+                )
+
+        self.logger.info(f"Metrics after epoch {self.epoch} : {metrics}")
+        if mlflow.active_run() is not None:
+            mlflow.log_metrics(metrics, step=self.epoch)
+
+        self.history.append(metrics)
         self.epoch += 1
 
 
+def get_probe_pairs(probe_pairs: str = TRAINING_PROBE_PAIRS) -> list:
+    """
+    Parses a list of probe word pairs, in the format "word:word,word:word".
+
+    Args:
+        probe_pairs (str): The probe word pairs.
+
+    Returns:
+        list: The (word, word) pairs.
+    """
+
+    return [
+        tuple(pair.strip().split(":", 1))
+        for pair in probe_pairs.split(",")
+        if ":" in pair
+    ]
+
+
 def _rule(word, count, min_count):
     """
     A function to determine whether to keep a word in a Word2Vec vocabulary based on its frequency.
@@ -232,13 +555,16 @@ def save_word_embbeddings(word_vectors: KeyedVectors, word_vectors_file_path: st
         )
 
 
-def train_word2vec(sentences: list, vocabulary: list) -> tuple[Word2Vec, int, int]:
+def train_word2vec(
+    sentences: list, vocabulary: list, workers: int = 4
+) -> tuple[Word2Vec, int, int]:
     """
     Trains a Word2Vec model on a set of sentences and vocabulary and returns the trained model and training statistics.
 
     Args:
-        sentences (list): A list of sentences to train the Word2Vec model on.
+        sentences (list): A list of sentences, or a `TokenizedCorpus`, to train the Word2Vec model on.
         vocabulary (list): A list of domain-specific keywords to use as vocabulary for the Word2Vec model.
+        workers (int): The number of training threads.
 
     Returns:
         tuple: A tuple containing the trained Word2Vec model, the number of words trained on, and the total number
@@ -259,28 +585,150 @@ def train_word2vec(sentences: list, vocabulary: list) -> tuple[Word2Vec, int, in
     model = Word2Vec(
         callbacks=[Word2vecCallback()],
         compute_loss=True,
-        vector_size=1000,
-        window=5,
-        min_count=4,
-        workers=4,
+        vector_size=WORD2VEC_PARAMS["vector_size"],
+        window=WORD2VEC_PARAMS["window"],
+        min_count=WORD2VEC_PARAMS["min_count"],
+        workers=workers,
     )
 
     model.build_vocab(
         corpus_iterable=vocabulary, min_count=1, progress_per=1, trim_rule=_rule
     )
 
+    if isinstance(sentences, TokenizedCorpus):
+        words_per_epoch = sentences.total_words
+    else:
+        words_per_epoch = sum(len(sentence) for sentence in sentences)
+    callback = Word2vecCallback(
+        words_per_epoch=words_per_epoch, probe_pairs=get_probe_pairs()
+    )
+
     (trained_word_count, raw_word_count) = model.train(
         sentences,
         total_examples=model.corpus_count,
-        epochs=10,
+        epochs=WORD2VEC_PARAMS["epochs"],
         report_delay=1.0,
         compute_loss=True,
-        callbacks=[Word2vecCallback()],
+        callbacks=[callback],
     )
 
     return (model, trained_word_count, raw_word_count)
 
 
+def train_word2vec_incremental(
+    model: Word2Vec,
+    new_sentences: list,
+    replay_sentences: list,
+    vocabulary: list,
+    checkpoint_directory: str = None,
+    epochs: int = WORD2VEC_PARAMS["epochs"],
+) -> tuple[Word2Vec, int, int]:
+    """
+    Continues the training of a Word2Vec model on new sentences plus a replay sample of the sentences it was trained on.
+
+    The vocabulary is extended with `build_vocab(update=True)` with the domain-specific keywords that occur in the new
+    sentences only, as the vocabulary of a model trained from scratch is made of the keywords. The learning rate decays
+    linearly over the epochs as in a full training, and the model is checkpointed after each epoch.
+
+    Args:
+        model (Word2Vec): The model to continue training, modified in place.
+        new_sentences (list): The sentences of the new documents.
+        replay_sentences (list): The sentences of a sample of the documents the model was trained on.
+        vocabulary (list): A list of domain-specific keywords, as returned by `get_domain_keywords`.
+        checkpoint_directory (str): The directory of the checkpoints; if it contains a checkpoint, the model and the
+        epoch are restored from it and the given model is ignored. None to disable the checkpoints.
+        epochs (int): The number of epochs.
+
+    Returns:
+        tuple: A tuple containing the trained Word2Vec model, the number of words trained on, and the total number
+        of words.
+    """
+
+    state = {"epoch": 0, "trained_word_count": 0, "raw_word_count": 0}
+    state_path = None
+    if checkpoint_directory is not None:
+        state_path = os.path.join(checkpoint_directory, CHECKPOINT_STATE_FNAME)
+
+    if state_path is not None and os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+        model = load_word2vec_model(
+            os.path.join(checkpoint_directory, state["checkpoint"], WORD2VEC_MODEL_FNAME)
+        )
+        logger.info(f"Resuming the training after epoch {state['epoch']}")
+    else:
+        keywords = set(vocabulary[0])
+        new_keywords = sorted(
+            {
+                token
+                for sentence in new_sentences
+                for token in sentence
+                if token in keywords and token not in model.wv.key_to_index
+            }
+        )
+        if new_keywords:
+            model.build_vocab(
+                corpus_iterable=[new_keywords],
+                update=True,
+                min_count=1,
+                trim_rule=_rule,
+            )
+        logger.info(f"Added {len(new_keywords)} keywords to the vocabulary")
+
+    sentences = new_sentences + replay_sentences
+    callback = Word2vecCallback(
+        words_per_epoch=sum(len(sentence) for sentence in sentences),
+        probe_pairs=get_probe_pairs(),
+    )
+    callback.epoch = state["epoch"]
+
+    # train() overwrites the learning rates of the model with the ones of the epoch
+    state.setdefault("alpha", model.alpha)
+    state.setdefault("min_alpha", model.min_alpha)
+    step = (state["alpha"] - state["min_alpha"]) / epochs
+
+    for epoch in range(state["epoch"], epochs):
+        (trained_word_count, raw_word_count) = model.train(
+            sentences,
+            total_examples=len(sentences),
+            epochs=1,
+            start_alpha=state["alpha"] - step * epoch,
+            end_alpha=state["alpha"] - step * (epoch + 1),
+            report_delay=1.0,
+            compute_loss=True,
+            callbacks=[callback],
+        )
+        model.alpha = state["alpha"]
+        model.min_alpha = state["min_alpha"]
+        state["epoch"] = epoch + 1
+        state["trained_word_count"] += trained_word_count
+        state["raw_word_count"] += raw_word_count
+
+        if state_path is not None:
+            previous_checkpoint = state.get("checkpoint")
+            state["checkpoint"] = f"epoch-{epoch + 1:03d}"
+            os.makedirs(
+                os.path.join(checkpoint_directory, state["checkpoint"]), exist_ok=True
+            )
+            save_word2vec_model(
+                model,
+                os.path.join(
+                    checkpoint_directory, state["checkpoint"], WORD2VEC_MODEL_FNAME
+                ),
+            )
+            # the state file is replaced atomically, a crash leaves the previous checkpoint usable
+            with open(state_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(state, file)
+            os.replace(state_path + ".tmp", state_path)
+            if previous_checkpoint is not None:
+                shutil.rmtree(
+                    os.path.join(checkpoint_directory, previous_checkpoint),
+                    ignore_errors=True,
+                )
+
+    return (model, state["trained_word_count"], state["raw_word_count"])
+
+
 def evaluate_similarity(word_vectors: KeyedVectors, word1: str, word2: str) -> float:
     """
     Calculates the cosine similarity between two words in a set of word embeddings.
@@ -305,6 +753,60 @@ def evaluate_similarity(word_vectors: KeyedVectors, word1: str, word2: str) -> f
     return similarity
 
 
+def score_quantization_drift(
+    word2vec_model: Word2Vec,
+    domain_keywords_path: str,
+    documents: dict,
+    dtypes: tuple = ("float16", "int8"),
+) -> dict:
+    """
+    Measures how much exporting the corpus model as quantized vectors changes the similarity scores of some documents.
+
+    Each document model is trained once and scored against both the full model and the exported vectors, so the
+    differences only come from the export.
+
+    Args:
+        word2vec_model (Word2Vec): The full corpus model.
+        domain_keywords_path (str): The path to the file containing the domain-specific keywords.
+        documents (dict): The cleaned texts of the documents, by name.
+        dtypes (tuple): The export types to compare with the full model.
+
+    Returns:
+        dict: The scores of each document (`documents`), the maximum absolute drift per type (`max_drift`) and the
+        size of the exported vectors per type (`nbytes`).
+    """
+
+    vocabulary = get_domain_keywords(domain_keywords_path)
+    full_model = GensimWord2VecModel(word2vec_model, domain_keywords_path)
+    exported_models = {
+        dtype: GensimWord2VecModel(
+            EmbeddingStore.from_keyed_vectors(word2vec_model.wv, dtype),
+            domain_keywords_path,
+        )
+        for dtype in dtypes
+    }
+
+    report = {"documents": {}, "max_drift": dict.fromkeys(dtypes, 0.0), "nbytes": {}}
+    for name, text in documents.items():
+        tokens = tokenize_for_training(text, vocabulary)
+        (model, trained_word_count, _) = train_word2vec(tokens, vocabulary)
+        if trained_word_count == 0:
+            continue
+
+        scores = {"full": full_model.score(model, tokens, vocabulary)}
+        for dtype, exported_model in exported_models.items():
+            scores[dtype] = exported_model.score(model, tokens, vocabulary)
+            drift = abs(scores[dtype] - scores["full"])
+            report["max_drift"][dtype] = max(report["max_drift"][dtype], drift)
+        report["documents"][name] = scores
+
+    for dtype, exported_model in exported_models.items():
+        report["nbytes"][dtype] = exported_model.word2vec_model.nbytes
+
+    logger.info(f"Quantization drift: {report['max_drift']}")
+    return report
+
+
 def _is_mlflow_up():
     """
     Checks if MLflow is up and running.
@@ -333,7 +835,223 @@ def _is_mlflow_up():
         sys.exit(1)
 
 
-def train_and_track_experiment(model_uri: str, text_corpus: str, domain_keywords: str):
+def _log_file_artifacts(files: list):
+    """
+    Logs local files in the active MLflow run, through the content-addressed `ArtifactStore` unless
+    MLFLOW_ARTIFACT_DEDUP is "false", so that files identical to already logged ones are not uploaded again.
+
+    Args:
+        files (list): The (local path, artifact path) pairs of the files.
+    """
+
+    if MLFLOW_ARTIFACT_DEDUP.lower() == "true":
+        store = ArtifactStore(MLFLOW_EXPERIMENT)
+        for local_path, artifact_path in files:
+            store.log_artifact(local_path, artifact_path)
+    else:
+        for local_path, artifact_path in files:
+            mlflow.log_artifact(local_path, artifact_path)
+
+
+def code_version() -> str:
+    """
+    Computes the version of the code that determines the trained model: a hash of the sources of the preparation and
+    training modules, so that it is also available where the sources are mounted without their git repository.
+
+    Returns:
+        str: The SHA-256 hex digest of the sources.
+    """
+
+    hasher = hashlib.sha256()
+    source_directory = Path(__file__).resolve().parent.parent
+    for module in ("preparation", "training"):
+        for source_path in sorted((source_directory / module).glob("*.py")):
+            hasher.update(source_path.name.encode("utf-8"))
+            hash_file(hasher, str(source_path))
+    return hasher.hexdigest()
+
+
+def training_fingerprint(
+    text_corpus: str,
+    domain_keywords: str,
+    export_dtype: str = MODEL_EXPORT_DTYPE,
+    shared_vectors: bool = MODEL_SHARED_VECTORS.lower() == "true",
+) -> str:
+    """
+    Computes the fingerprint of a training: a hash of the corpus content, the keyword file, the hyperparameters, the
+    export options and the code version. Two trainings with the same fingerprint produce equivalent models.
+
+    Args:
+        text_corpus (str): The path to the text corpus.
+        domain_keywords (str): The path to the file containing the domain-specific keywords.
+        export_dtype (str): The export type of the word vectors, see `train_and_track_experiment`.
+        shared_vectors (bool): If the word vectors are logged as a shared artifact, see `train_and_track_experiment`.
+
+    Returns:
+        str: The SHA-256 hex digest of the training inputs.
+    """
+
+    hasher = hashlib.sha256()
+    hash_file(hasher, text_corpus)
+    hasher.update(b"\0")
+    hash_file(hasher, domain_keywords)
+    hasher.update(b"\0")
+
+    settings = {
+        "params": WORD2VEC_PARAMS,
+        "export_dtype": export_dtype,
+        "shared_vectors": shared_vectors,
+        "code_version": code_version(),
+        "gensim_version": gensim.__version__,
+    }
+    hasher.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def find_trained_model(
+    text_corpus: str,
+    domain_keywords: str,
+    export_dtype: str = MODEL_EXPORT_DTYPE,
+    shared_vectors: bool = MODEL_SHARED_VECTORS.lower() == "true",
+) -> dict:
+    """
+    Looks up a finished MLflow run trained on the same inputs, so that its model can be reused instead of retraining.
+
+    Args:
+        text_corpus (str): The path to the text corpus.
+        domain_keywords (str): The path to the file containing the domain-specific keywords.
+        export_dtype (str): The export type of the word vectors, see `train_and_track_experiment`.
+        shared_vectors (bool): If the word vectors are logged as a shared artifact, see `train_and_track_experiment`.
+
+    Returns:
+        dict: The `fingerprint` of the training and the `model_uri` of the most recent run with the same fingerprint,
+        None if there is none.
+    """
+
+    fingerprint = training_fingerprint(
+        text_corpus, domain_keywords, export_dtype, shared_vectors
+    )
+
+    _is_mlflow_up()
+    runs = mlflow.search_runs(
+        experiment_names=[MLFLOW_EXPERIMENT],
+        filter_string=f"tags.{FINGERPRINT_TAG} = '{fingerprint}' and attributes.status = 'FINISHED'",
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+        output_format="list",
+    )
+
+    model_uri = None
+    if runs and MODEL_URI_TAG in runs[0].data.tags:
+        model_uri = runs[0].data.tags[MODEL_URI_TAG]
+        logger.info(f"Found run {runs[0].info.run_id} with fingerprint {fingerprint}")
+    else:
+        logger.info(f"No run with fingerprint {fingerprint}")
+
+    return {"fingerprint": fingerprint, "model_uri": model_uri}
+
+
+def list_documents(txt_input_directory: str) -> dict:
+    """
+    Lists the text documents of a directory, including the subdirectories of a sharded conversion.
+
+    Args:
+        txt_input_directory (str): The path to the directory containing the text files.
+
+    Returns:
+        dict: The path of each document, by document name (the file name without extension).
+    """
+
+    return {
+        text_file_stem(path): str(path)
+        for path in list_text_files(txt_input_directory, recursive=True)
+    }
+
+
+def _log_trained_model(
+    model: Word2Vec,
+    model_uri: str,
+    domain_keywords: str,
+    export_dtype: str,
+    shared_vectors: bool,
+    documents: list = None,
+) -> str:
+    """
+    Logs a trained Word2Vec model in the active MLflow run: its parameters, the full model for incremental training, the
+    word embeddings, the list of documents it was trained on and the MLflow model used for serving.
+
+    Returns:
+        str: The path to the MLflow model artifact in object storage.
+    """
+
+    model_artifact_path = tempfile.mkdtemp(prefix="model_artifact_")
+    save_word2vec_model(model, os.path.join(model_artifact_path, WORD2VEC_MODEL_FNAME))
+    logger.info(f"Saving word2vec model into: {model_artifact_path}")
+
+    with tempfile.NamedTemporaryFile(
+        prefix="word_embbeddings_", delete=False
+    ) as tmp_file:
+        word_embbeddings_file_path = str(tmp_file.name)
+
+    save_word_embbeddings(model.wv, word_embbeddings_file_path)
+    logger.info(f"Saving word embbeddings into: {word_embbeddings_file_path}")
+
+    artifacts = None
+    if export_dtype or shared_vectors:
+        store = EmbeddingStore.from_keyed_vectors(model.wv, export_dtype or "float32")
+        mlflow_model = GensimWord2VecModel(
+            store, domain_keywords, shared=shared_vectors
+        )
+        mlflow.log_param("export_dtype", store.dtype)
+        mlflow.log_param("shared_vectors", shared_vectors)
+
+        if shared_vectors:
+            embeddings_path = tempfile.mkdtemp(prefix="embeddings_")
+            store.save(embeddings_path)
+            artifacts = {EMBEDDINGS_ARTIFACT: embeddings_path}
+    else:
+        mlflow_model = GensimWord2VecModel(model, domain_keywords)
+
+    mlflow.set_tag("python_version", platform.python_version())
+    mlflow.set_tag("gensim_version", gensim.__version__)
+    mlflow.set_tag("mlflow_version", mlflow.__version__)
+    mlflow.log_param("vector_size", model.vector_size)
+    mlflow.log_param("window", model.window)
+    mlflow.log_param("min_count", model.min_count)
+    mlflow.log_param("workers", model.workers)
+    mlflow.log_artifacts(model_artifact_path, WORD2VEC_MODEL_ARTIFACT)
+    _log_file_artifacts(
+        [
+            (domain_keywords, "domain_keywords"),
+            (word_embbeddings_file_path, "word_embbeddings/"),
+            (word_embbeddings_file_path, "model"),
+        ]
+    )
+    if documents is not None:
+        mlflow.log_dict(sorted(documents), DOCUMENTS_ARTIFACT)
+
+    mlflow.pyfunc.log_model(
+        python_model=mlflow_model,
+        artifact_path=model_uri,
+        code_path=["./src"],
+        artifacts=artifacts,
+    )
+
+    s3_full_path = mlflow.get_artifact_uri() + "/" + model_uri
+    mlflow.set_tag(MODEL_URI_TAG, s3_full_path)
+    logger.info(f"MLflow model object-storage path: {s3_full_path}")
+    return s3_full_path
+
+
+def train_and_track_experiment(
+    model_uri: str,
+    text_corpus: str,
+    domain_keywords: str,
+    export_dtype: str = MODEL_EXPORT_DTYPE,
+    shared_vectors: bool = MODEL_SHARED_VECTORS.lower() == "true",
+    fingerprint: str = None,
+    txt_input_directory: str = None,
+):
     """
     Trains a Word2Vec model on a text corpus using domain-specific keywords, and tracks the experiment with MLflow.
 
@@ -342,60 +1060,162 @@ def train_and_track_experiment(model_uri: str, text_corpus: str, domain_keywords
         text_corpus (str): The path to the text corpus to train the Word2Vec model on.
         domain_keywords (str): The path to the file containing the domain-specific keywords to use as vocabulary
         for the model.
+        export_dtype (str): If set to "float32", "float16" or "int8", the MLflow model only contains the normalized
+        word vectors stored with that type, instead of the full Word2Vec model.
+        shared_vectors (bool): If True, the normalized word vectors (float32 unless `export_dtype` is set) are logged
+        as a separate artifact that the serving workers memory-map and share, instead of being pickled in the model.
+        fingerprint (str): The fingerprint of the training, see `training_fingerprint`; computed if not given. It is
+        set as a tag of the run, so that `find_trained_model` can find the model of an unchanged training.
+        txt_input_directory (str): The directory of the text documents the corpus was created from; if given, their
+        names are logged so that `train_and_track_incremental` can continue the training on new documents only.
 
     Returns:
         str: The path to the trained model artifact in object storage.
     """
 
+    if fingerprint is None:
+        fingerprint = training_fingerprint(
+            text_corpus, domain_keywords, export_dtype, shared_vectors
+        )
+
     _is_mlflow_up()
-    mlflow.set_experiment("ppml_rr")
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
 
     with mlflow.start_run():
         vocabulary = get_domain_keywords(domain_keywords)
-        corpus = get_file_contents(text_corpus)
-        with_bigram_from_vocabulary = get_bigram_from_vocabulary(vocabulary, corpus)
-        without_stopwords = clean_stopwords_str(with_bigram_from_vocabulary)
-        text = get_bigram(without_stopwords)
+        text = load_tokenized_corpus(text_corpus, domain_keywords)
 
         (model, trained_word_count, raw_word_count) = train_word2vec(text, vocabulary)
 
-        with tempfile.NamedTemporaryFile(
-            prefix="model_artifact_", delete=False
-        ) as tmp_file:
-            model_artifact_file_path = str(tmp_file.name)
+        documents = None
+        if txt_input_directory is not None:
+            documents = list(list_documents(txt_input_directory))
 
-        with tempfile.NamedTemporaryFile(
-            prefix="word_embbeddings_", delete=False
-        ) as tmp_file:
-            word_embbeddings_file_path = str(tmp_file.name)
+        mlflow.set_tag(FINGERPRINT_TAG, fingerprint)
+        mlflow.log_param("trained_word_count", trained_word_count)
+        mlflow.log_param("raw_word_count", raw_word_count)
+        _log_file_artifacts([(text_corpus, "text_corpus")])
 
-        save_word2vec_model(model, model_artifact_file_path)
-        logger.info(f"Saving word2vec model into: {model_artifact_file_path}")
-        save_word_embbeddings(model.wv, word_embbeddings_file_path)
-        logger.info(f"Saving word embbeddings into: {word_embbeddings_file_path}")
+        return _log_trained_model(
+            model, model_uri, domain_keywords, export_dtype, shared_vectors, documents
+        )
 
-        mlflow_model = GensimWord2VecModel(model, domain_keywords)
 
-        mlflow.set_tag("python_version", platform.python_version())
-        mlflow.set_tag("gensim_version", gensim.__version__)
-        mlflow.set_tag("mlflow_version", mlflow.__version__)
-        mlflow.log_param("vector_size", model.vector_size)
-        mlflow.log_param("window", model.window)
-        mlflow.log_param("min_count", model.min_count)
-        mlflow.log_param("workers", model.workers)
+def train_and_track_incremental(
+    model_uri: str,
+    parent_run_id: str,
+    txt_input_directory: str,
+    domain_keywords: str,
+    replay_ratio: float = float(TRAINING_REPLAY_RATIO),
+    checkpoint_directory: str = TRAINING_CHECKPOINT_DIR,
+    export_dtype: str = MODEL_EXPORT_DTYPE,
+    shared_vectors: bool = MODEL_SHARED_VECTORS.lower() == "true",
+    fingerprint: str = None,
+):
+    """
+    Continues the training of the model of a previous run on the documents added since, and tracks the experiment with
+    MLflow.
+
+    The documents of `txt_input_directory` that the parent model was not trained on are the new documents; the
+    training continues on them plus a replay sample of the old documents, so that the model does not drift towards the
+    new papers only. Each epoch is checkpointed under `checkpoint_directory`, so that an interrupted run restarted
+    with the same arguments resumes from its last epoch.
+
+    Args:
+        model_uri (str): The path to store the trained model artifact in MLflow.
+        parent_run_id (str): The id of the MLflow run of the model to continue training, which must have logged the
+        names of its documents (see the `txt_input_directory` of `train_and_track_experiment`).
+        txt_input_directory (str): The path to the directory containing the text documents, old and new.
+        domain_keywords (str): The path to the file containing the domain-specific keywords.
+        replay_ratio (float): The number of old documents replayed, as a fraction of the number of new documents.
+        checkpoint_directory (str): The directory of the checkpoints, None to disable them.
+        export_dtype (str): The export type of the word vectors, see `train_and_track_experiment`.
+        shared_vectors (bool): If the word vectors are logged as a shared artifact, see `train_and_track_experiment`.
+        fingerprint (str): The fingerprint of the corpus the documents make up, see `training_fingerprint`. It is set as
+        a tag of the run, so that `find_trained_model` can find the model of an unchanged training.
+
+    Returns:
+        str: The path to the trained model artifact in object storage, the parent's one if there are no new documents.
+
+    Raises:
+        ValueError: If the parent run has no model URI tag, e.g. because it was logged before the tag existed.
+    """
+
+    _is_mlflow_up()
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+
+    parent_run = mlflow.get_run(parent_run_id)
+    parent_model_uri = parent_run.data.tags.get(MODEL_URI_TAG)
+    if parent_model_uri is None:
+        raise ValueError(
+            f"The parent run {parent_run_id} has no {MODEL_URI_TAG} tag, train a model from scratch instead"
+        )
+    parent_model_path = mlflow.artifacts.download_artifacts(
+        run_id=parent_run_id, artifact_path=WORD2VEC_MODEL_ARTIFACT
+    )
+    model = load_word2vec_model(os.path.join(parent_model_path, WORD2VEC_MODEL_FNAME))
+    parent_documents_path = mlflow.artifacts.download_artifacts(
+        run_id=parent_run_id, artifact_path=DOCUMENTS_ARTIFACT
+    )
+    with open(parent_documents_path, "r", encoding="utf-8") as file:
+        parent_documents = json.load(file)
+
+    documents = list_documents(txt_input_directory)
+    new_documents = sorted(set(documents) - set(parent_documents))
+    old_documents = sorted(set(documents) & set(parent_documents))
+    if not new_documents:
+        logger.info(f"No new documents since run {parent_run_id}")
+        return parent_model_uri
+
+    # the same sample is drawn when an interrupted run is resumed
+    replay_size = min(len(old_documents), round(replay_ratio * len(new_documents)))
+    replay_documents = random.Random(parent_run_id).sample(old_documents, replay_size)
+    logger.info(
+        f"Training on {len(new_documents)} new and {len(replay_documents)} replayed documents"
+    )
+
+    vocabulary = get_domain_keywords(domain_keywords)
+    sentences = {}
+    for name in new_documents + replay_documents:
+        text = get_file_contents(documents[name])
+        sentences[name] = tokenize_for_training(text, vocabulary)[0]
+
+    if checkpoint_directory is not None:
+        run_key = hashlib.sha256(
+            "\n".join([parent_run_id] + new_documents).encode("utf-8")
+        ).hexdigest()[:16]
+        checkpoint_directory = os.path.join(checkpoint_directory, run_key)
+
+    with mlflow.start_run():
+        (model, trained_word_count, raw_word_count) = train_word2vec_incremental(
+            model,
+            [sentences[name] for name in new_documents],
+            [sentences[name] for name in replay_documents],
+            vocabulary,
+            checkpoint_directory=checkpoint_directory,
+        )
+
+        mlflow.set_tag(PARENT_RUN_TAG, parent_run_id)
+        mlflow.set_tag("parent_model_uri", parent_model_uri)
+        if fingerprint is not None:
+            mlflow.set_tag(FINGERPRINT_TAG, fingerprint)
+        else:
+            logger.warning(
+                "The run has no fingerprint, find_trained_model will not find its model"
+            )
+        mlflow.log_param("incremental", True)
+        mlflow.log_param("new_documents", len(new_documents))
+        mlflow.log_param("replay_documents", len(replay_documents))
+        mlflow.log_param("replay_ratio", replay_ratio)
         mlflow.log_param("trained_word_count", trained_word_count)
         mlflow.log_param("raw_word_count", raw_word_count)
-        mlflow.log_artifact(domain_keywords, "domain_keywords")
-        mlflow.log_artifact(text_corpus, "text_corpus")
-        mlflow.log_artifact(word_embbeddings_file_path, "word_embbeddings/")
-        mlflow.log_artifact(word_embbeddings_file_path, "model")
-
-        mlflow.pyfunc.log_model(
-            python_model=mlflow_model,
-            artifact_path=model_uri,
-            code_path=["./src"],
+        mlflow.log_dict(new_documents, "new_documents.json")
+
+        return _log_trained_model(
+            model,
+            model_uri,
+            domain_keywords,
+            export_dtype,
+            shared_vectors,
+            list(parent_documents) + new_documents,
         )
-
-        s3_full_path = mlflow.get_artifact_uri() + "/" + model_uri
-        logger.info(f"MLflow model object-storage path: {s3_full_path}")
-        return s3_full_path
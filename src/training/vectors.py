@@ -0,0 +1,241 @@
+"""Vectors-only embedding store, optionally quantized, for serving."""
+
+import json
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+VECTORS_FNAME = "vectors.npy"
+SCALES_FNAME = "scales.npy"
+KEYS_FNAME = "keys.json"
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    The unit word vectors of a model without its training state (output weights, vocabulary counts), stored as
+    float32, float16 or int8 codes with a float32 scale per row.
+
+    Cosine similarities are computed directly on the stored rows: since the vectors are normalized, the similarity of
+    an int8 row with a unit vector is the dot product of the codes with the vector times the row scale.
+    """
+
+    index_to_key: list
+    """index_to_key (list): The words, in the same order as the rows of `vectors`."""
+    key_to_index: dict
+    """key_to_index (dict): The row of each word."""
+    vectors: np.ndarray
+    """vectors (np.ndarray): The (words, dimensions) matrix of unit vectors or int8 codes."""
+    scales: np.ndarray
+    """scales (np.ndarray): The float32 scale of each row of int8 codes, None for floating point vectors."""
+
+    def __init__(
+        self, index_to_key: list, vectors: np.ndarray, scales: np.ndarray = None
+    ):
+        self.index_to_key = index_to_key
+        self.key_to_index = {key: index for index, key in enumerate(index_to_key)}
+        self.vectors = vectors
+        self.scales = scales
+
+    @classmethod
+    def from_keyed_vectors(
+        cls, keyed_vectors, dtype: str = "float32", keys: Optional[list] = None
+    ):
+        """
+        Exports the normalized vectors of a model, optionally quantized.
+
+        Args:
+            keyed_vectors (KeyedVectors): The word vectors of the model.
+            dtype (str): One of "float32", "float16" or "int8".
+            keys (list): The words to export, by default the whole vocabulary of the model.
+
+        Returns:
+            EmbeddingStore: The exported store.
+
+        Raises:
+            ValueError: If `dtype` is not supported.
+        """
+
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unsupported dtype {dtype}, expected one of {EMBEDDING_DTYPES}"
+            )
+
+        if keys is None:
+            keys = list(keyed_vectors.index_to_key)
+        rows = [keyed_vectors.key_to_index[key] for key in keys]
+
+        vectors = np.asarray(keyed_vectors.vectors[rows], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+
+        scales = None
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            vectors = np.rint(vectors / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+        else:
+            vectors = vectors.astype(dtype)
+
+        logger.info(f"Exported {len(keys)} vectors as {dtype}: {vectors.nbytes} bytes")
+        return cls(keys, np.ascontiguousarray(vectors), scales)
+
+    @property
+    def vector_size(self) -> int:
+        """The dimensionality of the vectors."""
+        return self.vectors.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        """The storage type of the vectors."""
+        return str(self.vectors.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the stored vectors and scales in bytes."""
+        return self.vectors.nbytes + (
+            self.scales.nbytes if self.scales is not None else 0
+        )
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_to_index
+
+    def __len__(self) -> int:
+        return len(self.index_to_key)
+
+    def get_vector(self, key: str) -> np.ndarray:
+        """
+        Returns the float32 unit vector of a word.
+
+        Raises:
+            KeyError: If the word is not in the store.
+        """
+        row = self.key_to_index[key]
+        vector = self.vectors[row].astype(np.float32)
+        if self.scales is not None:
+            vector *= self.scales[row]
+        return vector
+
+    def similarity_matrix(self, keys: list, vectors: np.ndarray) -> np.ndarray:
+        """
+        Computes the cosine similarities between the stored vectors of some words and a set of unit vectors.
+
+        Args:
+            keys (list): The words, which must be in the store.
+            vectors (np.ndarray): A (vectors, dimensions) matrix of unit vectors.
+
+        Returns:
+            np.ndarray: The (words, vectors) matrix of cosine similarities.
+        """
+
+        rows = [self.key_to_index[key] for key in keys]
+        matrix = (
+            self.vectors[rows].astype(np.float32)
+            @ np.asarray(vectors, dtype=np.float32).T
+        )
+        if self.scales is not None:
+            matrix *= self.scales[rows][:, None]
+        return matrix
+
+    def save(self, path: str):
+        """
+        Saves the store into a directory: the vectors (and scales) as .npy matrices and the words as JSON.
+
+        Args:
+            path (str): The path to the directory where the store will be saved.
+        """
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        np.save(os.path.join(path, VECTORS_FNAME), self.vectors)
+        if self.scales is not None:
+            np.save(os.path.join(path, SCALES_FNAME), self.scales)
+        with open(os.path.join(path, KEYS_FNAME), "w", encoding="utf-8") as outfile:
+            json.dump(self.index_to_key, outfile)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None):
+        """
+        Loads a store saved with `save`.
+
+        Args:
+            path (str): The path to the directory of the store.
+            mmap_mode (str): The numpy memory-map mode, None to load the matrices in memory.
+
+        Returns:
+            EmbeddingStore: The loaded store.
+        """
+
+        vectors = np.load(os.path.join(path, VECTORS_FNAME), mmap_mode=mmap_mode)
+        scales = None
+        if os.path.exists(os.path.join(path, SCALES_FNAME)):
+            scales = np.load(os.path.join(path, SCALES_FNAME), mmap_mode=mmap_mode)
+        with open(os.path.join(path, KEYS_FNAME), "r", encoding="utf-8") as infile:
+            index_to_key = json.load(infile)
+        return cls(index_to_key, vectors, scales)
+
+
+def vocabulary_subset(source, keys: list) -> list:
+    """
+    Returns the words of a list that are in the vocabulary of a corpus model, in order.
+
+    Args:
+        source (Word2Vec | KeyedVectors | EmbeddingStore): The corpus model or its exported vectors.
+        keys (list): The words.
+
+    Returns:
+        list: The words of the vocabulary.
+    """
+
+    keyed_vectors = source.wv if hasattr(source, "wv") else source
+    return [key for key in keys if key in keyed_vectors]
+
+
+def keyword_vectors(source, keys: list) -> np.ndarray:
+    """
+    Returns the float32 unit vectors of some words in a corpus model, e.g. to compute the similarities of a keyword
+    set with many documents without looking up its vectors for each.
+
+    Args:
+        source (Word2Vec | KeyedVectors | EmbeddingStore): The corpus model or its exported vectors.
+        keys (list): The words, which must be in the vocabulary of the model.
+
+    Returns:
+        np.ndarray: The (words, dimensions) matrix of unit vectors.
+    """
+
+    if isinstance(source, EmbeddingStore):
+        return np.array(
+            [source.get_vector(key) for key in keys], dtype=np.float32
+        ).reshape(len(keys), source.vector_size)
+
+    keyed_vectors = source.wv if hasattr(source, "wv") else source
+    return np.array(
+        [keyed_vectors.get_vector(key, norm=True) for key in keys], dtype=np.float32
+    ).reshape(len(keys), keyed_vectors.vector_size)
+
+
+def keyword_similarity_matrix(source, keys: list, vectors: np.ndarray) -> np.ndarray:
+    """
+    Computes the cosine similarities between the vectors of some words in a corpus model and a set of unit vectors.
+
+    Args:
+        source (Word2Vec | KeyedVectors | EmbeddingStore): The corpus model or its exported vectors.
+        keys (list): The words, which must be in the vocabulary of the model.
+        vectors (np.ndarray): A (vectors, dimensions) matrix of unit vectors.
+
+    Returns:
+        np.ndarray: The (words, vectors) matrix of cosine similarities.
+    """
+
+    if isinstance(source, EmbeddingStore):
+        return source.similarity_matrix(keys, vectors)
+
+    return keyword_vectors(source, keys) @ np.asarray(vectors, dtype=np.float32).T
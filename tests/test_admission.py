@@ -0,0 +1,87 @@
+"""Test the admission control of the per-request training."""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training.admission import AdmissionRejected, CpuBudget, is_rejection
+
+
+class TestAdmission(unittest.TestCase):
+    """Test the admission control of the per-request training."""
+
+    def hold(self, budget: CpuBudget, release: threading.Event, granted: list):
+        """Starts a request holding its threads until `release` is set."""
+
+        def request():
+            with budget.acquire() as threads:
+                granted.append(threads)
+                release.wait(5)
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        return thread
+
+    def wait_for(self, condition):
+        deadline = time.perf_counter() + 5
+        while not condition() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_grants(self):
+        budget = CpuBudget(threads=6, max_threads=4, queue_size=0, timeout=1)
+        with budget.acquire() as first, budget.acquire() as second:
+            self.assertEqual((first, second), (4, 2))
+            self.assertEqual(budget.metrics()["threads_in_use"], 6)
+            with self.assertRaises(AdmissionRejected) as context:
+                with budget.acquire():
+                    pass
+            self.assertEqual(context.exception.reason, "queue_full")
+            self.assertTrue(context.exception.retryable)
+            result = context.exception.as_result()
+            self.assertTrue(is_rejection(result))
+            self.assertEqual(result["rejected"], "queue_full")
+        self.assertFalse(is_rejection(0.5))
+
+        with budget.acquire(threads=1) as threads:
+            self.assertEqual(threads, 1)
+        metrics = budget.metrics()
+        self.assertEqual(metrics["threads_in_use"], 0)
+        self.assertEqual((metrics["admitted"], metrics["rejected"]), (3, 1))
+
+    def test_queue(self):
+        budget = CpuBudget(threads=2, max_threads=2, queue_size=1, timeout=5)
+        release = threading.Event()
+        granted = []
+        running = self.hold(budget, release, granted)
+        self.wait_for(lambda: granted)
+
+        queued = self.hold(budget, release, granted)
+        self.wait_for(lambda: budget.metrics()["queue_depth"] == 1)
+        with self.assertRaises(AdmissionRejected):
+            with budget.acquire():
+                pass
+
+        release.set()
+        running.join()
+        queued.join()
+        metrics = budget.metrics()
+        self.assertEqual(granted, [2, 2])
+        self.assertEqual(metrics["max_queue_depth"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertGreater(metrics["wait_seconds_max"], 0.0)
+
+    def test_timeout(self):
+        budget = CpuBudget(threads=1, max_threads=1, queue_size=1, timeout=0.1)
+        with budget.acquire():
+            with self.assertRaises(AdmissionRejected) as context:
+                with budget.acquire():
+                    pass
+        self.assertEqual(context.exception.reason, "timeout")
+        self.assertEqual(budget.metrics()["timed_out"], 1)
+        self.assertEqual(budget.metrics()["queue_depth"], 0)
@@ -0,0 +1,68 @@
+"""Test the content-addressed store of MLflow artifacts."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import mlflow
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import ArtifactStore
+
+
+class TestArtifactStore(unittest.TestCase):
+    """Test the content-addressed store of MLflow artifacts against a local file-based MLflow store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tracking_uri = mlflow.get_tracking_uri()
+        mlflow.set_tracking_uri("file://" + os.path.join(self.tmp_dir.name, "mlruns"))
+        mlflow.set_experiment("artifact_store")
+
+        self.corpus_path = os.path.join(self.tmp_dir.name, "corpus.txt")
+        with open(self.corpus_path, "w", encoding="utf-8") as outfile:
+            outfile.write("causal inference with backdoor adjustment\n" * 1000)
+
+    def tearDown(self):
+        mlflow.set_tracking_uri(self.tracking_uri)
+        self.tmp_dir.cleanup()
+
+    def test_identical_files_are_stored_once(self):
+        store = ArtifactStore("artifact_store")
+        references = []
+        for _ in range(2):
+            with mlflow.start_run() as run:
+                references.append(store.log_artifact(self.corpus_path, "text_corpus"))
+                store.log_artifact(self.corpus_path, "model")
+
+            logged = mlflow.artifacts.download_artifacts(
+                run_id=run.info.run_id,
+                artifact_path="text_corpus/corpus.txt.ref.json",
+                dst_path=os.path.join(self.tmp_dir.name, run.info.run_id),
+            )
+            with open(logged, encoding="utf-8") as infile:
+                self.assertEqual(json.load(infile), references[-1])
+
+        self.assertEqual(references[0], references[1])
+        self.assertEqual(references[0]["size"], os.path.getsize(self.corpus_path))
+
+        blobs = store.client.list_artifacts(store.run_id, references[0]["sha256"][:2])
+        self.assertEqual(len(blobs), 1)
+
+        # a new store finds the files stored by the previous one
+        self.assertTrue(ArtifactStore("artifact_store").contains(references[0]["sha256"]))
+
+    def test_download(self):
+        store = ArtifactStore("artifact_store")
+        reference = store.put(self.corpus_path)
+
+        local_path = store.download(
+            reference, os.path.join(self.tmp_dir.name, "download")
+        )
+        self.assertEqual(os.path.basename(local_path), "corpus.txt")
+        with open(local_path, "rb") as infile, open(self.corpus_path, "rb") as expected:
+            self.assertEqual(infile.read(), expected.read())
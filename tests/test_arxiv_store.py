@@ -0,0 +1,177 @@
+""" Test the incremental arXiv harvesting against a local stub of the arXiv API. """
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.arxiv_client import ArxivClient, arxiv_date
+from ingestion.store import ArticleStore
+
+ENTRY = """
+  <entry>
+    <id>http://arxiv.org/abs/{article_id}v{version}</id>
+    <updated>{updated}</updated>
+    <published>{published}</published>
+    <title>Article {article_id}</title>
+    <link title="pdf" href="http://arxiv.org/pdf/{article_id}v{version}" rel="related" type="application/pdf"/>
+  </entry>"""
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">{entries}
+</feed>"""
+
+
+class StubArxivHandler(BaseHTTPRequestHandler):
+    """Serves the stub entries sorted by last update date, filtered by the `lastUpdatedDate` range of the query."""
+
+    entries = []
+    requests = []
+
+    def do_GET(self):  # pylint: disable=C0103
+        params = parse_qs(urlparse(self.path).query)
+        start = int(params["start"][0])
+        max_results = int(params["max_results"][0])
+        self.requests.append((start, max_results))
+
+        since = re.search(r"lastUpdatedDate:\[(\d+) TO", params["search_query"][0])
+        entries = sorted(
+            (
+                e
+                for e in self.entries
+                if not since or arxiv_date(e["updated"]) >= since[1]
+            ),
+            key=lambda e: e["updated"],
+            reverse=params["sortOrder"][0] == "descending",
+        )
+        body = FEED.format(
+            entries="".join(
+                ENTRY.format(**e) for e in entries[start : start + max_results]
+            )
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=W0221
+        pass
+
+
+def make_entry(number: int, version: int = 1, updated: int = None) -> dict:
+    """Returns a stub entry published on day `number` of January 2023 and updated on day `updated`."""
+
+    return {
+        "article_id": f"2301.{number:05d}",
+        "version": version,
+        "published": f"2023-01-{number:02d}T00:00:00Z",
+        "updated": f"2023-01-{updated or number:02d}T00:00:00Z",
+    }
+
+
+class TestArxivStore(unittest.TestCase):
+    """Test the incremental arXiv harvesting."""
+
+    def setUp(self):
+        StubArxivHandler.entries = [make_entry(n) for n in range(1, 8)]
+        StubArxivHandler.requests = []
+        self.server = HTTPServer(("127.0.0.1", 0), StubArxivHandler)
+        self.api_url = f"http://127.0.0.1:{self.server.server_port}/api/query"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ArticleStore(os.path.join(self.tmp_dir.name, "articles.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def harvest(self, max_results: int = 1000) -> ArxivClient:
+        """Runs one incremental harvest against the stub."""
+
+        client = ArxivClient(max_connection=2, max_results=max_results)
+        client.query_incremental(
+            "abs:causal", self.store, page_size=3, page_delay=0, api_url=self.api_url
+        )
+        return client
+
+    def test_first_harvest_pages_through_all_entries(self):
+        client = self.harvest()
+        self.assertEqual(len(client.urls), 7)
+        self.assertEqual(self.store.count(), 7)
+        self.assertEqual(
+            client.urls[0], "https://arxiv.org/pdf/2301.00001v1.pdf"
+        )
+        self.assertEqual([r[0] for r in StubArxivHandler.requests], [0, 3, 6])
+        self.assertEqual(
+            self.store.get_watermark("abs:causal"), "2023-01-07T00:00:00Z"
+        )
+
+    def test_second_harvest_requests_only_newer_entries(self):
+        self.harvest()
+        StubArxivHandler.requests = []
+
+        client = self.harvest()
+        self.assertEqual(client.urls, [])
+        self.assertEqual(len(StubArxivHandler.requests), 1)
+
+        StubArxivHandler.entries.append(make_entry(8))
+        StubArxivHandler.entries.remove(make_entry(2))
+        StubArxivHandler.entries.append(make_entry(2, version=2, updated=9))
+        StubArxivHandler.requests = []
+
+        client = self.harvest()
+        self.assertEqual(
+            sorted(client.urls),
+            [
+                "https://arxiv.org/pdf/2301.00002v2.pdf",
+                "https://arxiv.org/pdf/2301.00008v1.pdf",
+            ],
+        )
+        # the entry updated at the watermark is requested again, so the first page is full
+        self.assertEqual(len(StubArxivHandler.requests), 2)
+        self.assertEqual(self.store.count(), 8)
+
+    def test_truncated_harvest_advances_the_watermark(self):
+        self.harvest()
+        StubArxivHandler.entries.extend(make_entry(n) for n in range(8, 13))
+        # a new article updated at the same time as the last harvested one
+        StubArxivHandler.entries.append(
+            dict(make_entry(7), article_id="2301.00099", published="2023-01-07")
+        )
+
+        client = self.harvest(max_results=3)
+        self.assertEqual(
+            sorted(client.urls),
+            [
+                "https://arxiv.org/pdf/2301.00008v1.pdf",
+                "https://arxiv.org/pdf/2301.00099v1.pdf",
+            ],
+        )
+        self.assertEqual(StubArxivHandler.requests[-1], (0, 3))
+        self.assertEqual(self.store.get_watermark("abs:causal"), "2023-01-08T00:00:00Z")
+
+        # the next harvest resumes after the part harvested
+        client = self.harvest(max_results=3)
+        self.assertEqual(
+            sorted(client.urls),
+            [
+                "https://arxiv.org/pdf/2301.00009v1.pdf",
+                "https://arxiv.org/pdf/2301.00010v1.pdf",
+            ],
+        )
+        client = self.harvest()
+        self.assertEqual(len(client.urls), 2)
+        self.assertEqual(self.store.get_watermark("abs:causal"), "2023-01-12T00:00:00Z")
+        self.assertEqual(self.store.count(), 13)
@@ -0,0 +1,102 @@
+"""Test the bulk offline scoring of PDF files."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from serving import batch
+from serving.batch import list_pdf_files, score_pdf_files
+from training.admission import available_cpus, get_cpu_budget, set_cpu_budget
+
+MODEL_PATH = os.path.join("tests", "data", "models", "small.model")
+KEYWORDS_PATH = "resources/keywords/keywords.txt"
+
+
+class TestBatchScoring(unittest.TestCase):
+    """Test the bulk offline scoring of PDF files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, "scores.jsonl")
+        self.pdf_files = [
+            "resources/benchmark/valid/2103.01035.pdf",
+            "resources/benchmark/invalid/blank.pdf",
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_output(self) -> list:
+        """Reads the JSONL output."""
+
+        with open(self.output_path, "r", encoding="utf-8") as infile:
+            return [json.loads(line) for line in infile]
+
+    def test_list_pdf_files_from_manifest(self):
+        manifest_path = os.path.join(self.tmp_dir.name, "manifest.txt")
+        with open(manifest_path, "w", encoding="utf-8") as outfile:
+            outfile.write("\n".join(self.pdf_files) + "\n\n")
+        self.assertEqual(list_pdf_files(manifest_path), self.pdf_files)
+        self.assertIn(self.pdf_files[1], list_pdf_files("resources/benchmark"))
+
+    def test_score_and_resume(self):
+        summary = score_pdf_files(
+            self.pdf_files[1:],
+            MODEL_PATH,
+            self.output_path,
+            domain_keywords=KEYWORDS_PATH,
+            processes=1,
+        )
+        self.assertEqual(summary["documents"], 1)
+        self.assertEqual(self.read_output()[0]["score"], 0.0)
+
+        # a line left incomplete by an interrupted run is scored again
+        with open(self.output_path, "a", encoding="utf-8") as outfile:
+            outfile.write('{"path": "resources/bench')
+
+        summary = score_pdf_files(
+            self.pdf_files,
+            MODEL_PATH,
+            self.output_path,
+            domain_keywords=KEYWORDS_PATH,
+            processes=2,
+        )
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["documents"], 1)
+        self.assertEqual(summary["failed"], 0)
+        self.assertGreater(summary["pages_per_second"], 0)
+
+        results = self.read_output()
+        self.assertEqual([result["path"] for result in results], self.pdf_files[::-1])
+        self.assertGreater(results[1]["score"], 0.0)
+        self.assertEqual(results[1]["pages"], 13)
+        self.assertGreater(results[1]["scoring_seconds"], 0.0)
+
+    def test_model_loading_error_stops_the_run(self):
+        for domain_keywords in [None, os.path.join(self.tmp_dir.name, "missing.txt")]:
+            with self.assertRaises(RuntimeError) as context:
+                score_pdf_files(
+                    self.pdf_files,
+                    MODEL_PATH,
+                    self.output_path,
+                    domain_keywords=domain_keywords,
+                    processes=2,
+                )
+            self.assertIn("could not be loaded", str(context.exception))
+            self.assertEqual(self.read_output(), [])
+
+    def test_workers_split_the_cpu_budget(self):
+        threads = get_cpu_budget().threads
+        try:
+            # pylint: disable=W0212
+            batch._init_worker(MODEL_PATH, KEYWORDS_PATH, available_cpus() * 2)
+            self.assertEqual(get_cpu_budget().threads, 1)
+            self.assertEqual(get_cpu_budget().max_threads, 1)
+        finally:
+            set_cpu_budget(threads)
+            batch._model = None  # pylint: disable=W0212
@@ -0,0 +1,83 @@
+"""Test the compressed storage of the text files and of the corpus."""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.convert import (
+    BLOCK_INDEX_SUFFIX,
+    create_text_corpus_from_shards,
+    get_file_contents,
+    list_text_files,
+    text_file_stem,
+)
+
+
+class TestCompression(unittest.TestCase):
+    """Test the compressed storage of the text files and of the corpus."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.txt_dir = os.path.join(self.tmp_dir.name, "txt") + "/"
+        os.makedirs(self.txt_dir)
+        self.corpus_dir = os.path.join(self.tmp_dir.name, "corpus") + "/"
+
+        pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+        pdf_file.to_text()
+        self.content = pdf_file.content
+        pdf_file.save(self.txt_dir, compression=".gz")
+        pdf_file.filename = "plain"
+        pdf_file.save(self.txt_dir, compression="")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compressed_text_files(self):
+        files = list_text_files(self.txt_dir)
+        self.assertEqual(
+            [file.name for file in files], ["2103.01035.txt.gz", "plain.txt"]
+        )
+        self.assertEqual(
+            [text_file_stem(file) for file in files], ["2103.01035", "plain"]
+        )
+        self.assertLess(os.path.getsize(files[0]), os.path.getsize(files[1]) / 2)
+        self.assertEqual(get_file_contents(files[0]), get_file_contents(files[1]))
+
+    def check_block_compressed_corpus(self, extension: str):
+        fname = "corpus.txt" + extension
+        create_text_corpus_from_shards(
+            self.corpus_dir, fname, [self.txt_dir], block_size=4096
+        )
+        corpus_path = self.corpus_dir + fname
+        self.assertTrue(os.path.exists(corpus_path + BLOCK_INDEX_SUFFIX))
+
+        expected = (self.content + self.content).rstrip()
+        self.assertEqual(get_file_contents(corpus_path), expected)
+        self.assertEqual(get_file_contents(corpus_path, threads=4), expected)
+
+    def test_block_compressed_corpus(self):
+        self.check_block_compressed_corpus(".gz")
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("zstandard"), "zstandard is not installed"
+    )
+    def test_zstd_block_compressed_corpus(self):
+        self.check_block_compressed_corpus(".zst")
+
+    def test_outdated_block_index_is_ignored(self):
+        create_text_corpus_from_shards(
+            self.corpus_dir, "corpus.txt.gz", [self.txt_dir], block_size=4096
+        )
+        create_text_corpus_from_shards(
+            self.corpus_dir, "corpus.txt.gz", [self.txt_dir], block_size=0
+        )
+        self.assertEqual(
+            get_file_contents(self.corpus_dir + "corpus.txt.gz", threads=4),
+            (self.content + self.content).rstrip(),
+        )
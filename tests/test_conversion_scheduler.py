@@ -0,0 +1,103 @@
+""" Test the scheduled conversion of a directory of PDF files. """
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion import download
+from ingestion.download import convert_pdf_to_text_scheduled
+
+
+def hang_on_one_file(pdf_file_path, txt_output_directory):
+    """Converts a PDF file, hanging past the timeout on `hung.pdf` like a conversion stuck in native code."""
+
+    if os.path.basename(pdf_file_path) == "hung.pdf":
+        signal.signal(signal.SIGALRM, signal.SIG_IGN)
+        time.sleep(60)
+    download.Pdf(pdf_file_path).to_text()
+
+
+class TestConversionScheduler(unittest.TestCase):
+    """Test the scheduled conversion of a directory of PDF files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_dir = os.path.join(self.tmp_dir.name, "pdf") + "/"
+        self.txt_dir = os.path.join(self.tmp_dir.name, "txt") + "/"
+        self.quarantine_dir = os.path.join(self.tmp_dir.name, "quarantine") + "/"
+
+        shutil.copytree("resources/benchmark/invalid", self.pdf_dir)
+        self.pdfs = sorted(Path(self.pdf_dir).glob("*.pdf"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_largest_files_first(self):
+        report = convert_pdf_to_text_scheduled(
+            self.pdf_dir,
+            self.txt_dir,
+            quarantine_directory=self.quarantine_dir,
+            report_path=os.path.join(self.tmp_dir.name, "report.json"),
+            processes=2,
+            max_tasks_per_child=1,
+        )
+
+        sizes = [file_report["size"] for file_report in report["files"]]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertEqual(report["converted"], len(self.pdfs))
+        self.assertEqual(len(list(Path(self.txt_dir).glob("*.txt"))), len(self.pdfs))
+        self.assertFalse(os.path.exists(self.quarantine_dir))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "report.json")))
+
+    def test_timeout_moves_files_to_quarantine(self):
+        report = convert_pdf_to_text_scheduled(
+            self.pdf_dir,
+            self.txt_dir,
+            quarantine_directory=self.quarantine_dir,
+            processes=2,
+            timeout=1e-6,
+        )
+
+        self.assertEqual(report["timeout"], len(self.pdfs))
+        self.assertEqual(list(Path(self.pdf_dir).glob("*.pdf")), [])
+        self.assertEqual(
+            len(list(Path(self.quarantine_dir).glob("*.pdf"))), len(self.pdfs)
+        )
+
+    def test_hung_conversion_quarantines_only_the_running_file(self):
+        shutil.copy(
+            "resources/benchmark/valid/2103.01035.pdf",
+            os.path.join(self.pdf_dir, "hung.pdf"),
+        )
+        # the workers are forked with the patched conversion
+        with mock.patch.object(
+            download, "convert_pdf_to_text", hang_on_one_file
+        ), mock.patch.object(download, "CONVERSION_GRACE", "0.5"):
+            report = convert_pdf_to_text_scheduled(
+                self.pdf_dir,
+                self.txt_dir,
+                quarantine_directory=self.quarantine_dir,
+                processes=1,
+                timeout=5,
+            )
+
+        self.assertEqual(report["lost"], 1)
+        self.assertEqual(report["converted"], len(self.pdfs))
+        statuses = {
+            Path(file_report["file"]).name: file_report["status"]
+            for file_report in report["files"]
+        }
+        self.assertEqual(statuses["hung.pdf"], "lost")
+        self.assertEqual(
+            [path.name for path in Path(self.quarantine_dir).glob("*.pdf")],
+            ["hung.pdf"],
+        )
+        self.assertEqual(len(list(Path(self.pdf_dir).glob("*.pdf"))), len(self.pdfs))
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 """ Test the similarity of words. """
+import io
 import os
 import unittest
 import logging
@@ -74,3 +75,31 @@ this review is, in part, a critique on the paucity of user testing"
         assert "explanation" in pdf_file.content
         assert "multiagent" in pdf_file.content
         assert "superpixels" in pdf_file.content
+
+    def test_pdf_to_text_from_memory(self):
+        """Test the conversion of a PDF held in memory."""
+        pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+        pdf_file.to_text()
+
+        with open("resources/benchmark/valid/2103.01035.pdf", "rb") as filehandle:
+            content = filehandle.read()
+
+        for source in [
+            content,
+            bytearray(content),
+            memoryview(content),
+            io.BytesIO(content),
+        ]:
+            pdf_memory = Pdf(source, filename="2103.01035")
+            pdf_memory.to_text()
+            self.assertTrue(pdf_memory.is_valid)
+            self.assertEqual(pdf_memory.hash, pdf_file.hash)
+            self.assertEqual(pdf_memory.content, pdf_file.content)
+            self.assertEqual(pdf_memory.number_of_pages, pdf_file.number_of_pages)
+
+    def test_pdf_to_text_invalid(self):
+        """Test the conversion of a buffer that is not a PDF."""
+        pdf_file = Pdf(b"not a pdf", filename="invalid")
+        pdf_file.to_text()
+        self.assertFalse(pdf_file.is_valid)
+        self.assertEqual(pdf_file.content, "")
@@ -0,0 +1,64 @@
+"""Test the cache of tokenized corpora."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from gensim.models import Word2Vec
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from preparation.cache import TokenizedCorpus, get_or_build_tokenized_corpus
+
+
+class TestCorpusCache(unittest.TestCase):
+    """Test the cache of tokenized corpora."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        words = [f"word{index}" for index in range(30)] + ["causal_inference"]
+        self.documents = [list(rng.choice(words, size=size)) for size in (50, 0, 120)]
+        self.calls = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def tokenize(self) -> list:
+        self.calls += 1
+        return self.documents
+
+    def test_round_trip(self):
+        corpus = TokenizedCorpus.build(self.documents)
+        self.assertEqual(list(corpus), self.documents)
+        self.assertEqual(corpus.tokens.dtype, np.int32)
+        self.assertEqual(corpus.total_words, 170)
+
+        corpus.save(self.tmp_dir.name)
+        loaded = TokenizedCorpus.load(self.tmp_dir.name)
+        self.assertIsInstance(loaded.tokens, np.memmap)
+        self.assertEqual(list(loaded), self.documents)
+
+    def test_preprocessing_runs_once_per_key(self):
+        for _ in range(2):
+            corpus = get_or_build_tokenized_corpus(
+                self.tmp_dir.name, "corpus-key", self.tokenize
+            )
+            self.assertEqual(list(corpus), self.documents)
+        self.assertEqual(self.calls, 1)
+
+        get_or_build_tokenized_corpus(self.tmp_dir.name, "other-key", self.tokenize)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["corpus-key", "other-key"])
+
+    def test_train_from_the_cache(self):
+        corpus = get_or_build_tokenized_corpus(
+            self.tmp_dir.name, "corpus-key", self.tokenize
+        )
+        model = Word2Vec(vector_size=10, min_count=1, workers=1)
+        model.build_vocab(corpus)
+        model.train(corpus, total_examples=len(corpus), epochs=2)
+        self.assertIn("causal_inference", model.wv.key_to_index)
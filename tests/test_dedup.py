@@ -0,0 +1,93 @@
+"""Test the near-duplicate detection of text documents."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from preparation.convert import create_text_corpus_from_shards, get_file_contents
+from preparation.dedup import MinHashIndex, deduplicate_text_files
+
+
+def write_text(path: str, text: str):
+    """Writes a text file."""
+
+    with open(path, "w", encoding="utf-8") as outfile:
+        outfile.write(text)
+
+
+class TestDeduplication(unittest.TestCase):
+    """Test the near-duplicate detection of text documents."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        words = [f"word{i}" for i in range(2000)]
+        self.texts = [" ".join(rng.choice(words, size=1000)) for _ in range(3)]
+
+        # the second version of the first document changes a few words
+        revised = self.texts[0].split()
+        for position in range(0, len(revised), 200):
+            revised[position] = "revised"
+        self.revised = " ".join(revised)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_similarity_estimate(self):
+        index = MinHashIndex()
+        signature = index.signature(self.texts[0])
+        self.assertEqual(signature.dtype, np.uint32)
+        self.assertEqual(len(signature), index.num_perm)
+
+        index.add("doc0", signature)
+        index.add("doc1", index.signature(self.texts[1]))
+        self.assertEqual(index.query(signature, threshold=1.0), [("doc0", 1.0)])
+
+        similar = index.query(index.signature(self.revised))
+        self.assertEqual([document_id for document_id, _ in similar], ["doc0"])
+        self.assertGreater(similar[0][1], 0.8)
+        self.assertEqual(index.query(index.signature(self.texts[2])), [])
+
+    def test_incremental_deduplication(self):
+        shard_dirs = [os.path.join(self.tmp_dir.name, f"shard{i}") for i in range(2)]
+        for shard_dir in shard_dirs:
+            os.makedirs(shard_dir)
+        signatures_dir = os.path.join(self.tmp_dir.name, "signatures")
+
+        write_text(os.path.join(shard_dirs[0], "2103.01035v1.txt"), self.texts[0])
+        write_text(os.path.join(shard_dirs[0], "2103.01036v1.txt"), self.texts[1])
+        self.assertEqual(deduplicate_text_files(shard_dirs, signatures_dir), [])
+
+        duplicate = os.path.join(shard_dirs[1], "2103.01035v2.txt")
+        write_text(duplicate, self.revised)
+        write_text(os.path.join(shard_dirs[1], "2103.01037v1.txt"), self.texts[2])
+        self.assertEqual(
+            deduplicate_text_files(shard_dirs, signatures_dir), [duplicate]
+        )
+        self.assertEqual(len(MinHashIndex.load(signatures_dir)), 4)
+
+        # the duplicate is kept when the original is not among the files
+        self.assertEqual(deduplicate_text_files(shard_dirs[1:], signatures_dir), [])
+
+        corpus_dir = os.path.join(self.tmp_dir.name, "corpus") + "/"
+        create_text_corpus_from_shards(
+            corpus_dir, "corpus.txt", shard_dirs, excluded_files=[duplicate]
+        )
+        self.assertNotIn("revised", get_file_contents(corpus_dir + "corpus.txt"))
+
+    def test_empty_files_are_not_duplicates(self):
+        signatures_dir = os.path.join(self.tmp_dir.name, "signatures")
+        write_text(os.path.join(self.tmp_dir.name, "2103.01035v1.txt"), self.texts[0])
+        for name in ["2103.01036v1", "2103.01037v1"]:
+            write_text(os.path.join(self.tmp_dir.name, f"{name}.txt"), " \n")
+
+        with self.assertLogs("preparation.dedup", level="WARNING"):
+            duplicates = deduplicate_text_files([self.tmp_dir.name], signatures_dir)
+        self.assertEqual(duplicates, [])
+        self.assertEqual(MinHashIndex.load(signatures_dir).ids, ["2103.01035v1"])
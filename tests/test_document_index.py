@@ -0,0 +1,88 @@
+""" Test the corpus-wide document embedding index. """
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import (
+    DocumentIndex,
+    IVFDocumentIndex,
+    get_domain_keywords,
+    load_document_index,
+    load_word2vec_model,
+)
+
+
+class TestDocumentIndex(unittest.TestCase):
+    """Test the corpus-wide document embedding index."""
+
+    def setUp(self):
+        self.model = load_word2vec_model(
+            os.path.join("tests", "data", "models", "small.model")
+        )
+        self.vocabulary = get_domain_keywords("resources/keywords/keywords.txt")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.txt_dir = os.path.join(self.tmp_dir.name, "txt")
+        os.makedirs(self.txt_dir)
+        words = self.model.wv.index_to_key
+        rng = np.random.default_rng(0)
+        for document in range(40):
+            tokens = rng.choice(words, size=200)
+            with open(
+                os.path.join(self.txt_dir, f"doc{document:02d}.txt"), "w", encoding="utf-8"
+            ) as outfile:
+                outfile.write(" ".join(tokens))
+
+        self.index = DocumentIndex.build(self.model.wv, self.txt_dir, self.vocabulary)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_document_is_its_own_nearest_neighbour(self):
+        self.assertEqual(self.index.vectors.shape, (40, self.model.wv.vector_size))
+        self.assertEqual(self.index.vectors.dtype, np.float32)
+
+        with open(os.path.join(self.txt_dir, "doc07.txt"), encoding="utf-8") as infile:
+            embedding = self.index.embed(infile.read(), self.vocabulary)
+
+        results = self.index.search(embedding, k=5)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0][0], "doc07")
+        self.assertAlmostEqual(results[0][1], 1.0, places=4)
+
+    def test_blocked_search_matches_brute_force(self):
+        query = self.index.vectors[3]
+        expected = np.argsort(-(self.index.vectors @ query), kind="stable")[:10]
+
+        results = self.index.search(query, k=10, block_size=7)
+        self.assertEqual([doc for doc, _ in results], [f"doc{row:02d}" for row in expected])
+
+    def test_save_and_load_with_mmap(self):
+        path = os.path.join(self.tmp_dir.name, "index")
+        self.index.save(path)
+
+        loaded = load_document_index(path)
+        self.assertIsInstance(loaded.vectors, np.memmap)
+        self.assertEqual(loaded.ids, self.index.ids)
+        self.assertEqual(
+            loaded.search(self.index.vectors[0], k=3),
+            self.index.search(self.index.vectors[0], k=3),
+        )
+
+    def test_approximate_index_with_all_lists_is_exact(self):
+        ivf = IVFDocumentIndex.from_index(self.index, n_lists=4)
+        query = self.index.vectors[11]
+        self.assertEqual(
+            ivf.search(query, k=5, n_probe=4), self.index.search(query, k=5)
+        )
+        self.assertEqual(ivf.search(query, k=1, n_probe=1)[0][0], "doc11")
+
+        path = os.path.join(self.tmp_dir.name, "ivf")
+        ivf.save(path)
+        self.assertIsInstance(load_document_index(path), IVFDocumentIndex)
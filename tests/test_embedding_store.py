@@ -0,0 +1,85 @@
+"""Test the vectors-only and quantized exports of the corpus model."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning
+from training import (
+    EmbeddingStore,
+    GensimWord2VecModel,
+    load_word2vec_model,
+    score_quantization_drift,
+)
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    """Test the vectors-only and quantized exports of the corpus model."""
+
+    def setUp(self):
+        self.model = load_word2vec_model(
+            os.path.join("tests", "data", "models", "small.model")
+        )
+        self.keys = self.model.wv.index_to_key[:50]
+        self.unit_vectors = np.array(
+            [self.model.wv.get_vector(key, norm=True) for key in self.keys]
+        )
+
+    def test_quantized_similarities(self):
+        expected = self.unit_vectors @ self.unit_vectors.T
+        for dtype, places in [("float32", 5), ("float16", 2), ("int8", 2)]:
+            store = EmbeddingStore.from_keyed_vectors(self.model.wv, dtype)
+            self.assertEqual(store.dtype, dtype)
+            matrix = store.similarity_matrix(self.keys, self.unit_vectors)
+            np.testing.assert_array_almost_equal(matrix, expected, decimal=places)
+
+        full = EmbeddingStore.from_keyed_vectors(self.model.wv, "float32")
+        quantized = EmbeddingStore.from_keyed_vectors(self.model.wv, "int8")
+        self.assertLess(quantized.nbytes, full.nbytes / 3)
+
+    def test_save_and_load(self):
+        store = EmbeddingStore.from_keyed_vectors(self.model.wv, "int8")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store.save(tmp_dir)
+            loaded = EmbeddingStore.load(tmp_dir, mmap_mode="r")
+            self.assertEqual(loaded.index_to_key, store.index_to_key)
+            np.testing.assert_array_equal(
+                loaded.get_vector(self.keys[0]), store.get_vector(self.keys[0])
+            )
+
+    def test_score_drift_on_benchmark(self):
+        pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+        pdf_file.to_text()
+        report = score_quantization_drift(
+            self.model,
+            "resources/keywords/keywords.txt",
+            {"2103.01035": combined_text_cleaning(pdf_file.content)},
+        )
+        self.assertIn("2103.01035", report["documents"])
+        self.assertLess(report["max_drift"]["float16"], 0.005)
+        self.assertLess(report["max_drift"]["int8"], 0.01)
+
+    def test_score_on_quantized_vectors(self):
+        keywords = self.keys[:10]
+        for dtype in ["float32", "int8"]:
+            model = GensimWord2VecModel(
+                EmbeddingStore.from_keyed_vectors(self.model.wv, dtype),
+                "resources/keywords/keywords.txt",
+            )
+            keyword_set = model.get_keyword_set(keywords)
+            # the int8 keyword vectors are not dequantized
+            self.assertEqual(keyword_set.vectors is None, dtype == "int8")
+
+            # the corpus model scores the keywords against themselves
+            score = model.score(self.model, [keywords], [keywords], keyword_set)
+            expected = np.mean(
+                np.max(self.unit_vectors[:10] @ self.unit_vectors[:10].T, axis=0)
+            )
+            self.assertAlmostEqual(score, float(expected), places=2)
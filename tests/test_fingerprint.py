@@ -0,0 +1,56 @@
+"""Test the fingerprint of the training inputs."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import WORD2VEC_PARAMS, training_fingerprint
+
+
+class TestFingerprint(unittest.TestCase):
+    """Test the fingerprint of the training inputs."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.text_corpus = os.path.join(self.tmp_dir.name, "corpus.txt")
+        with open(self.text_corpus, "w", encoding="utf-8") as outfile:
+            outfile.write("causal inference with backdoor adjustment\n")
+        self.domain_keywords = os.path.join(self.tmp_dir.name, "keywords.txt")
+        shutil.copy("resources/keywords/keywords.txt", self.domain_keywords)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def fingerprint(self, **kwargs) -> str:
+        return training_fingerprint(self.text_corpus, self.domain_keywords, **kwargs)
+
+    def test_same_inputs_same_fingerprint(self):
+        self.assertEqual(self.fingerprint(), self.fingerprint())
+
+    def test_changed_inputs_change_the_fingerprint(self):
+        fingerprint = self.fingerprint()
+
+        self.assertNotEqual(self.fingerprint(export_dtype="int8"), fingerprint)
+
+        with open(self.domain_keywords, "a", encoding="utf-8") as outfile:
+            outfile.write("instrumental_variable\n")
+        keywords_fingerprint = self.fingerprint()
+        self.assertNotEqual(keywords_fingerprint, fingerprint)
+
+        with open(self.text_corpus, "a", encoding="utf-8") as outfile:
+            outfile.write("a new article\n")
+        self.assertNotEqual(self.fingerprint(), keywords_fingerprint)
+
+    def test_hyperparameters_change_the_fingerprint(self):
+        fingerprint = self.fingerprint()
+        epochs = WORD2VEC_PARAMS["epochs"]
+        try:
+            WORD2VEC_PARAMS["epochs"] = epochs + 1
+            self.assertNotEqual(self.fingerprint(), fingerprint)
+        finally:
+            WORD2VEC_PARAMS["epochs"] = epochs
@@ -0,0 +1,141 @@
+"""Test the hot-swap of the served model."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning
+from serving.hotswap import ModelMarker, ModelSlot
+from serving.inference import encode_document
+from training import GensimWord2VecModel, get_domain_keywords, load_word2vec_model
+
+KEYWORDS_PATH = "resources/keywords/keywords.txt"
+
+
+class TestHotSwap(unittest.TestCase):
+    """Test the hot-swap of the served model."""
+
+    def wait_for(self, condition):
+        deadline = time.perf_counter() + 5
+        while not condition() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_swap_drains_the_old_model(self):
+        slot = ModelSlot("model-1", "v1", drain_timeout=5)
+        started, release = threading.Event(), threading.Event()
+        used = []
+
+        def request():
+            with slot.use() as model:
+                started.set()
+                release.wait(5)
+                used.append(model)
+
+        running = threading.Thread(target=request)
+        running.start()
+        started.wait(5)
+
+        warmed = []
+        self.assertTrue(
+            slot.start_swap(lambda version: f"model-{version[1:]}", "v2", warmed.append)
+        )
+        self.wait_for(lambda: slot.status()["state"] == "draining")
+        self.assertEqual(warmed, ["model-2"])
+        self.assertEqual(slot.version, "v2")
+        with slot.use() as model:
+            self.assertEqual(model, "model-2")
+        self.assertFalse(slot.start_swap(lambda version: None, "v3"))
+
+        release.set()
+        running.join()
+        self.wait_for(lambda: slot.status()["state"] == "completed")
+        self.assertEqual(used, ["model-1"])
+        status = slot.status()
+        self.assertTrue(status["drained"])
+        self.assertEqual((status["previous"], status["in_flight"]), ("v1", 0))
+
+    def test_failed_swap_keeps_the_model(self):
+        slot = ModelSlot("model-1", "v1")
+
+        def load(version):
+            raise FileNotFoundError(version)
+
+        status = slot.swap(load, "v2")
+        self.assertEqual(status["state"], "failed")
+        self.assertIn("FileNotFoundError", status["error"])
+        self.assertEqual(slot.version, "v1")
+        with slot.use() as model:
+            self.assertEqual(model, "model-1")
+        self.assertFalse(slot.start_swap(load, "v1"))
+
+    def test_swap_to_other_domain_keywords(self):
+        vocabulary = get_domain_keywords(KEYWORDS_PATH)
+        word2vec_model = load_word2vec_model(
+            os.path.join("tests", "data", "models", "small.model")
+        )
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as keywords_file:
+            keywords_file.write("\n".join(vocabulary[0][::2]))
+            keywords_file.flush()
+            slot = ModelSlot(GensimWord2VecModel(word2vec_model, KEYWORDS_PATH), "v1")
+
+            pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+            pdf_file.to_text()
+            # the API server encodes the documents with its own domain keywords
+            payload = encode_document(
+                combined_text_cleaning(pdf_file.content), vocabulary
+            )
+            model_input = {"document": payload, "keywords": vocabulary[0]}
+            with slot.use() as model:
+                score = model.predict(None, model_input)
+
+            slot.swap(
+                lambda version: GensimWord2VecModel(word2vec_model, keywords_file.name),
+                "v2",
+            )
+            with slot.use() as model:
+                with self.assertRaises(ValueError):
+                    model.predict(None, payload)
+                self.assertEqual(model.predict(None, model_input), score)
+
+    def test_slots_swap_to_the_marker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            marker = ModelMarker("ppml_rr:v1", directory)
+            self.assertIsNone(marker.read())
+            loads = []
+
+            def load(version):
+                loads.append(version)
+                if version == "broken":
+                    raise FileNotFoundError(version)
+                return f"model-{version}"
+
+            # the runner workers of a service
+            slots = [ModelSlot("model-v1", "v1") for _ in range(2)]
+            for slot in slots:
+                slot.watch(lambda: marker.read() or "v1", load, interval=0.01)
+
+            marker.write("v2")
+            self.wait_for(
+                lambda: all(slot.status()["state"] == "completed" for slot in slots)
+            )
+            for slot in slots:
+                with slot.use() as model:
+                    self.assertEqual(model, "model-v2")
+
+            # a failed version is not loaded again at each poll
+            marker.write("broken")
+            self.wait_for(
+                lambda: all(slot.status()["state"] == "failed" for slot in slots)
+            )
+            time.sleep(0.1)
+            self.assertEqual(loads.count("broken"), 2)
+            self.assertEqual([slot.version for slot in slots], ["v2", "v2"])
+            self.assertIsNone(ModelMarker("ppml_rr:v2", directory).read())
@@ -0,0 +1,78 @@
+"""Test the incremental training of the corpus model."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import get_domain_keywords, load_word2vec_model, train_word2vec_incremental
+
+
+class TestIncrementalTraining(unittest.TestCase):
+    """Test the incremental training of the corpus model."""
+
+    def setUp(self):
+        self.model = load_word2vec_model(
+            os.path.join("tests", "data", "models", "small.model")
+        )
+        self.vocabulary = get_domain_keywords("resources/keywords/keywords.txt")
+        self.new_keyword = "causal_discovery_benchmark"
+        self.vocabulary[0].append(self.new_keyword)
+
+        words = self.model.wv.index_to_key[:50]
+        self.new_sentences = [words + [self.new_keyword, "not_a_keyword"] * 5]
+        self.replay_sentences = [words[::-1]]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_vocabulary_is_extended_with_new_keywords_only(self):
+        vocabulary_size = len(self.model.wv)
+        (model, trained_word_count, _) = train_word2vec_incremental(
+            self.model,
+            self.new_sentences,
+            self.replay_sentences,
+            self.vocabulary,
+            epochs=2,
+        )
+
+        self.assertEqual(len(model.wv), vocabulary_size + 1)
+        self.assertIn(self.new_keyword, model.wv.key_to_index)
+        self.assertNotIn("not_a_keyword", model.wv.key_to_index)
+        self.assertGreater(trained_word_count, 0)
+
+    def test_resume_from_checkpoint(self):
+        checkpoint_directory = os.path.join(self.tmp_dir.name, "checkpoints")
+        train_word2vec_incremental(
+            self.model,
+            self.new_sentences,
+            self.replay_sentences,
+            self.vocabulary,
+            checkpoint_directory=checkpoint_directory,
+            epochs=1,
+        )
+
+        # an interrupted run of 3 epochs restarted with the same checkpoints trains the 2 remaining epochs only
+        (model, _, _) = train_word2vec_incremental(
+            None,
+            self.new_sentences,
+            self.replay_sentences,
+            self.vocabulary,
+            checkpoint_directory=checkpoint_directory,
+            epochs=3,
+        )
+
+        with open(
+            os.path.join(checkpoint_directory, "state.json"), encoding="utf-8"
+        ) as infile:
+            state = json.load(infile)
+        self.assertEqual(state["epoch"], 3)
+        self.assertEqual(
+            sorted(os.listdir(checkpoint_directory)), ["epoch-003", "state.json"]
+        )
+        self.assertIn(self.new_keyword, model.wv.key_to_index)
@@ -0,0 +1,83 @@
+"""Test the keyword sets selectable per document."""
+
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning, get_bigram_from_vocabulary
+from preparation.keywords import KeywordSetCache
+from serving.inference import read_keyword_set
+from training import GensimWord2VecModel, get_domain_keywords, load_word2vec_model
+
+KEYWORDS_PATH = "resources/keywords/keywords.txt"
+
+
+class TestKeywordSets(unittest.TestCase):
+    """Test the keyword sets selectable per document."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vocabulary = get_domain_keywords(KEYWORDS_PATH)
+        pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+        pdf_file.to_text()
+        cls.text = combined_text_cleaning(pdf_file.content)
+
+    def test_compiled_phrases(self):
+        expected = self.text
+        for word in self.vocabulary[0]:
+            expected = re.sub(re.sub("_", " ", word), word, expected)
+        self.assertEqual(
+            get_bigram_from_vocabulary(self.vocabulary, self.text), expected
+        )
+
+    def test_cache(self):
+        cache = KeywordSetCache(maxsize=2)
+        keywords = self.vocabulary[0]
+        keyword_set = cache.get(keywords)
+        self.assertIs(cache.get(list(keywords)), keyword_set)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.get(keywords[:10])
+        cache.get(keywords)
+        cache.get(keywords[10:])
+        self.assertEqual(len(cache), 2)
+        self.assertIn(keywords, cache)
+        self.assertNotIn(keywords[:10], cache)
+
+    def test_read_keyword_set(self):
+        self.assertEqual(read_keyword_set("keywords"), self.vocabulary)
+        for name in ("../keywords", "missing"):
+            with self.assertRaises(ValueError):
+                read_keyword_set(name)
+
+    def test_score_with_keyword_set(self):
+        model = GensimWord2VecModel(
+            load_word2vec_model(os.path.join("tests", "data", "models", "small.model")),
+            KEYWORDS_PATH,
+        )
+        score = model.predict(None, self.text)
+        self.assertEqual(
+            model.predict(
+                None, {"document": self.text, "keywords": self.vocabulary[0]}
+            ),
+            score,
+        )
+
+        # the keywords missing from the corpus model are left out of the comparison
+        keywords = self.vocabulary[0] + ["not_a_corpus_keyword"]
+        keyword_set = model.get_keyword_set(keywords)
+        self.assertEqual(keyword_set.in_vocabulary, self.vocabulary[0])
+        self.assertEqual(keyword_set.vectors.shape[0], len(self.vocabulary[0]))
+        self.assertGreater(
+            model.predict(None, {"document": self.text, "keywords": keywords}), 0.0
+        )
+
+        self.assertIs(
+            model.get_keyword_set(), model.get_keyword_set(self.vocabulary[0])
+        )
+        self.assertEqual(len(model._keyword_sets), 2)  # pylint: disable=W0212
@@ -0,0 +1,50 @@
+"""Test the multiprocess preprocessing of the corpus."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from preparation.clean import (
+    clean_stopwords_str,
+    get_bigram_from_vocabulary,
+    split_text,
+    substitute_and_clean_in_parallel,
+)
+from preparation.convert import get_file_contents
+from training import get_domain_keywords, tokenize_for_training
+
+
+class TestParallelPreprocessing(unittest.TestCase):
+    """Test the multiprocess preprocessing of the corpus."""
+
+    def setUp(self):
+        self.vocabulary = get_domain_keywords("resources/keywords/keywords.txt")
+        self.text = get_file_contents(
+            "resources/corpus/article-from-2021-08-01-to-2022-08-31-first-10-corpus.txt.bz2"
+        )
+
+    def test_split_points_do_not_span_ngrams(self):
+        text = "causal inference " * 100
+        chunks = split_text(text, [["causal_inference"]], 7)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+        for chunk in chunks:
+            self.assertTrue(chunk.lstrip().startswith("causal inference"))
+
+    def test_same_tokens_as_sequential(self):
+        expected = clean_stopwords_str(
+            get_bigram_from_vocabulary(self.vocabulary, self.text)
+        )
+        self.assertEqual(
+            substitute_and_clean_in_parallel(self.vocabulary, self.text, 3), expected
+        )
+
+    def test_tokenize_for_training(self):
+        self.assertEqual(
+            tokenize_for_training(self.text, self.vocabulary, processes=2),
+            tokenize_for_training(self.text, self.vocabulary),
+        )
@@ -0,0 +1,111 @@
+"""Test the PDF text extraction backends and their fallback chain."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import (
+    PDF_BACKEND_CLASSES,
+    Pdf,
+    PdfBackend,
+    PdfBackendError,
+    PymupdfBackend,
+    get_pdf_backends,
+)
+
+PDF_FILE_PATH = "resources/benchmark/valid/2103.01035.pdf"
+
+
+class FailingBackend(PdfBackend):
+    """A backend that cannot parse any file."""
+
+    name = "failing"
+
+    def iter_pages(self, buffer):
+        raise PdfBackendError("cannot parse")
+
+
+class TruncatedBackend(PdfBackend):
+    """A backend that fails after the first two pages."""
+
+    name = "truncated"
+
+    def iter_pages(self, buffer):
+        yield "page 1"
+        yield "page 2"
+        raise PdfBackendError("cannot parse page 3")
+
+
+class TestPdfBackends(unittest.TestCase):
+    """Test the PDF text extraction backends."""
+
+    def setUp(self):
+        PDF_BACKEND_CLASSES[FailingBackend.name] = FailingBackend
+        PDF_BACKEND_CLASSES[TruncatedBackend.name] = TruncatedBackend
+
+    def tearDown(self):
+        del PDF_BACKEND_CLASSES[FailingBackend.name]
+        del PDF_BACKEND_CLASSES[TruncatedBackend.name]
+
+    def test_default_backend_is_pypdf(self):
+        pdf_file = Pdf(PDF_FILE_PATH)
+        pdf_file.to_text()
+        self.assertTrue(pdf_file.is_valid)
+        self.assertEqual(pdf_file.backend, "pypdf")
+
+    def test_backend_interface(self):
+        with self.assertRaises(TypeError):
+            PdfBackend()  # pylint: disable=E0110
+
+    def test_backend_chain(self):
+        self.assertEqual(
+            [backend.name for backend in get_pdf_backends(" failing, pypdf ")],
+            ["failing", "pypdf"],
+        )
+        with self.assertRaises(ValueError):
+            get_pdf_backends("unknown")
+
+    def test_fallback_to_next_backend(self):
+        expected = Pdf(PDF_FILE_PATH)
+        expected.to_text(backends=["pypdf"])
+
+        pdf_file = Pdf(PDF_FILE_PATH)
+        pdf_file.to_text(backends="failing,pypdf")
+        self.assertTrue(pdf_file.is_valid)
+        self.assertEqual(pdf_file.backend, "pypdf")
+        self.assertEqual(pdf_file.content, expected.content)
+
+        pdf_file.to_text(backends="failing")
+        self.assertFalse(pdf_file.is_valid)
+        self.assertIsNone(pdf_file.backend)
+        self.assertEqual(pdf_file.content, "")
+
+    def test_backend_failing_mid_document(self):
+        pdf_file = Pdf(PDF_FILE_PATH)
+        with self.assertLogs("ingestion.pdf", level="ERROR"):
+            pages = list(pdf_file.iter_pages(backends="failing,truncated,pypdf"))
+        self.assertEqual(pages, ["page 1", "page 2"])
+        self.assertTrue(pdf_file.is_valid)
+        self.assertTrue(pdf_file.partial)
+        self.assertEqual(pdf_file.backend, "truncated")
+
+        self.assertEqual(len(list(pdf_file.iter_pages(backends="pypdf"))), 13)
+        self.assertFalse(pdf_file.partial)
+
+    @unittest.skipUnless(PymupdfBackend().is_available(), "pymupdf is not installed")
+    def test_pymupdf_backend(self):
+        pdf_file = Pdf(PDF_FILE_PATH)
+        pdf_file.to_text(backends="pymupdf")
+        self.assertTrue(pdf_file.is_valid)
+        self.assertEqual(pdf_file.number_of_pages, 13)
+        self.assertIn("superpixels", pdf_file.content)
+
+        for content in (b"not a pdf", b"%PDF-1.4\n corrupt", b""):
+            pdf_file = Pdf(content, filename="invalid")
+            pdf_file.to_text(backends="pymupdf")
+            self.assertFalse(pdf_file.is_valid)
+            with self.assertRaises(PdfBackendError):
+                PymupdfBackend().extract_pages(content)
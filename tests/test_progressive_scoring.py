@@ -0,0 +1,89 @@
+"""Test the progressive page-wise scoring of documents."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from serving.progressive import score_progressively
+from training import get_domain_keywords
+
+PDF_FILE_PATH = "resources/benchmark/valid/2103.01035.pdf"
+
+
+class TestProgressiveScoring(unittest.TestCase):
+    """Test the progressive page-wise scoring of documents."""
+
+    def setUp(self):
+        self.vocabulary = get_domain_keywords("resources/keywords/keywords.txt")
+        pdf_file = Pdf(PDF_FILE_PATH)
+        self.pages = list(pdf_file.iter_pages())
+        self.extracted = []
+
+    def iter_pages(self):
+        """Yields the pages, recording the ones extracted."""
+
+        for page in self.pages:
+            self.extracted.append(page)
+            yield page
+
+    def score(self, scores: list) -> dict:
+        """Scores the document with a predict function returning the given scores in turn."""
+
+        scores = iter(scores)
+        return score_progressively(
+            self.iter_pages(),
+            self.vocabulary,
+            lambda payload: next(scores),
+            initial_pages=2,
+            threshold=0.85,
+            tolerance=0.02,
+        )
+
+    def test_iter_pages(self):
+        pdf_file = Pdf(PDF_FILE_PATH)
+        pdf_file.to_text()
+        self.assertEqual("".join(self.pages), pdf_file.content)
+        self.assertEqual(len(self.pages), pdf_file.number_of_pages)
+
+        invalid = Pdf(b"not a pdf", filename="invalid")
+        self.assertEqual(list(invalid.iter_pages()), [])
+        self.assertFalse(invalid.is_valid)
+
+    def test_stable_score_exits_early(self):
+        result = self.score([0.80, 0.81])
+        self.assertTrue(result["early_exit"])
+        self.assertEqual(result["exit_reason"], "stable")
+        self.assertEqual(result["pages"], 4)
+        # one more page is extracted to find out whether pages are left
+        self.assertEqual(len(self.extracted), 5)
+        self.assertEqual(result["value"], 0.81)
+
+    def test_clear_decision_exits_early(self):
+        result = self.score([0.95, 0.99])
+        self.assertEqual(result["exit_reason"], "above_threshold")
+        result = self.score([0.30, 0.50])
+        self.assertEqual(result["exit_reason"], "below_threshold")
+
+    def test_unstable_score_uses_all_pages(self):
+        result = self.score([0.80, 0.90, 0.80, 0.90])
+        self.assertFalse(result["early_exit"])
+        self.assertEqual(
+            [increment["pages"] for increment in result["increments"]],
+            [2, 4, 8, len(self.pages)],
+        )
+        self.assertEqual(result["pages"], len(self.pages))
+
+    def test_exit_on_the_last_page_is_not_early(self):
+        result = self.score([0.80, 0.90, 0.80, 0.81])
+        self.assertEqual(result["exit_reason"], "stable")
+        self.assertFalse(result["early_exit"])
+        self.assertEqual(result["pages"], len(self.pages))
+
+        self.pages = self.pages[:4]
+        result = self.score([0.80, 0.81])
+        self.assertEqual(result["exit_reason"], "stable")
+        self.assertFalse(result["early_exit"])
@@ -0,0 +1,56 @@
+""" Test the pre-screening of documents against the benchmark PDFs. """
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning
+from preparation.screening import screen_document
+from training import get_domain_keywords
+
+
+def screen_pdf(pdf_file_path: str, keywords: list) -> dict:
+    """Screens a PDF file with the default thresholds."""
+
+    pdf_file = Pdf(pdf_file_path)
+    pdf_file.to_text()
+    text = combined_text_cleaning(pdf_file.content)
+    return screen_document(text, keywords, pdf_file.number_of_pages)
+
+
+class TestScreening(unittest.TestCase):
+    """Test the pre-screening of documents."""
+
+    def setUp(self):
+        self.keywords = get_domain_keywords("resources/keywords/keywords.txt")[0]
+
+    def test_keyword_hits(self):
+        result = screen_document(
+            "causal inference backdoor adjustment " * 20, self.keywords
+        )
+        self.assertTrue(result["passed"])
+        self.assertEqual(result["tokens"], 80)
+        self.assertGreaterEqual(result["keyword_hits"], 40)
+
+    def test_thresholds(self):
+        text = "causal inference backdoor adjustment " * 20
+        result = screen_document(text, self.keywords, 1, min_keyword_hits=1000)
+        self.assertEqual(result["reason"], "too_few_keyword_hits")
+        result = screen_document(text, self.keywords, 10)
+        self.assertEqual(result["reason"], "low_text_density")
+        result = screen_document(text, self.keywords, 1, min_pages=2)
+        self.assertEqual(result["reason"], "too_few_pages")
+
+    def test_benchmark_valid_documents_pass(self):
+        for pdf_file_path in Path("resources/benchmark/valid").glob("*.pdf"):
+            result = screen_pdf(str(pdf_file_path), self.keywords)
+            self.assertTrue(result["passed"], f"{pdf_file_path}: {result}")
+
+    def test_benchmark_blank_document_is_rejected(self):
+        result = screen_pdf("resources/benchmark/invalid/blank.pdf", self.keywords)
+        self.assertFalse(result["passed"])
+        self.assertEqual(result["reason"], "low_text_density")
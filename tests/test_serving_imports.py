@@ -0,0 +1,63 @@
+"""Test the import time and the dependencies of the serving inference path."""
+
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = (
+    "arxiv",
+    "cleantext",
+    "gensim",
+    "mlflow",
+    "parfive",
+    "pypdf",
+    "requests",
+    "scipy",
+    "smart_open",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def import_time(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        dict: The cumulative import time in microseconds of every module imported.
+    """
+
+    env = dict(os.environ, PYTHONPATH=os.path.abspath("src"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+class TestServingImports(unittest.TestCase):
+    """Test that the serving inference path defers the heavy imports."""
+
+    def test_no_heavy_imports(self):
+        timings = import_time("serving.inference")
+        logger.info(f"serving.inference imported in {timings['serving.inference']} us")
+
+        imported = {name.split(".")[0] for name in timings}
+        self.assertEqual(imported & set(HEAVY_MODULES), set())
+
+    def test_lazy_package_attributes(self):
+        timings = import_time("ingestion.store, preparation.screening")
+        self.assertNotIn("ingestion.arxiv_client", timings)
+        self.assertNotIn("preparation.clean", timings)
@@ -0,0 +1,71 @@
+"""Test the sharding of the article list and the assembly of the corpus from the shard outputs."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.download import shard_article_list
+from preparation.convert import create_text_corpus_from_shards
+
+
+class TestSharding(unittest.TestCase):
+    """Test the sharding of the article list and the assembly of the corpus."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_shards_cover_the_article_list(self):
+        urls_file_path = (
+            "resources/articles_list/article-from-2021-08-01-to-2022-08-31-first-10.txt"
+        )
+        shard_paths = shard_article_list(urls_file_path, self.tmp_dir.name, 4)
+
+        with open(urls_file_path, encoding="utf-8") as infile:
+            urls = infile.read().splitlines()
+        sharded_urls = []
+        for shard_path in shard_paths:
+            with open(shard_path, encoding="utf-8") as infile:
+                shard_urls = infile.read().splitlines()
+            self.assertIn(len(shard_urls), (len(urls) // 4, len(urls) // 4 + 1))
+            sharded_urls.extend(shard_urls)
+
+        self.assertEqual(len(shard_paths), 4)
+        self.assertEqual(sorted(sharded_urls), sorted(urls))
+
+    def test_no_empty_shards(self):
+        self.assertEqual(
+            len(
+                shard_article_list(
+                    "resources/articles_list/article-from-2021-08-01-to-2022-08-31-first-10.txt",
+                    self.tmp_dir.name,
+                    100,
+                )
+            ),
+            10,
+        )
+
+    def test_corpus_from_shards(self):
+        shard_directories = []
+        for shard in (1, 0):
+            shard_directory = os.path.join(self.tmp_dir.name, f"shard-{shard:04d}")
+            os.makedirs(shard_directory)
+            with open(
+                os.path.join(shard_directory, "article.txt"), "w", encoding="utf-8"
+            ) as outfile:
+                outfile.write(f"shard {shard}\n")
+            shard_directories.append(shard_directory)
+
+        corpus_directory = os.path.join(self.tmp_dir.name, "corpus") + "/"
+        create_text_corpus_from_shards(
+            corpus_directory, "corpus.txt", shard_directories
+        )
+
+        with open(corpus_directory + "corpus.txt", encoding="utf-8") as infile:
+            self.assertEqual(infile.read(), "shard 0\nshard 1\n")
@@ -0,0 +1,72 @@
+"""Test the loading of the corpus vectors from a shared, read-only artifact."""
+
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import EmbeddingStore, GensimWord2VecModel, load_word2vec_model
+
+
+def checksum_shared_vectors(path: str) -> float:
+    """Loads the shared vectors in a worker process and sums them."""
+
+    model = GensimWord2VecModel(None, "resources/keywords/keywords.txt", shared=True)
+    model.load_context(SimpleNamespace(artifacts={"embeddings": path}))
+    return float(np.asarray(model.word2vec_model.vectors, dtype=np.float64).sum())
+
+
+class TestSharedModel(unittest.TestCase):
+    """Test the loading of the corpus vectors from a shared, read-only artifact."""
+
+    def setUp(self):
+        self.model = load_word2vec_model(
+            os.path.join("tests", "data", "models", "small.model")
+        )
+        self.store = EmbeddingStore.from_keyed_vectors(self.model.wv)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store.save(self.tmp_dir.name)
+        self.context = SimpleNamespace(artifacts={"embeddings": self.tmp_dir.name})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_shared_vectors_are_not_pickled(self):
+        shared = GensimWord2VecModel(
+            self.store, "resources/keywords/keywords.txt", shared=True
+        )
+        private = GensimWord2VecModel(self.store, "resources/keywords/keywords.txt")
+
+        pickled = pickle.dumps(shared)
+        self.assertLess(len(pickled), self.store.nbytes / 100)
+        self.assertGreater(len(pickle.dumps(private)), self.store.nbytes)
+
+        unpickled = pickle.loads(pickled)
+        self.assertIsNone(unpickled.word2vec_model)
+        unpickled.load_context(self.context)
+
+        vectors = unpickled.word2vec_model.vectors
+        self.assertIsInstance(vectors, np.memmap)
+        self.assertFalse(vectors.flags.writeable)
+
+        keys = self.store.index_to_key[:10]
+        unit_vectors = np.array([self.store.get_vector(key) for key in keys])
+        np.testing.assert_array_equal(
+            unpickled.word2vec_model.similarity_matrix(keys, unit_vectors),
+            self.store.similarity_matrix(keys, unit_vectors),
+        )
+
+    def test_worker_processes_attach_to_the_same_vectors(self):
+        expected = float(np.asarray(self.store.vectors, dtype=np.float64).sum())
+        with mp.Pool(2) as pool:
+            checksums = pool.map(checksum_shared_vectors, [self.tmp_dir.name] * 2)
+        for checksum in checksums:
+            self.assertAlmostEqual(checksum, expected, places=3)
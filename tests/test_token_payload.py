@@ -0,0 +1,55 @@
+"""Test the compact token payload sent by the API server to the model."""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from ingestion.pdf import Pdf
+from preparation.clean import combined_text_cleaning
+from preparation.payload import decode_tokens, encode_tokens
+from serving.inference import encode_document
+from training import GensimWord2VecModel, get_domain_keywords, load_word2vec_model
+
+KEYWORDS_PATH = "resources/keywords/keywords.txt"
+
+
+class TestTokenPayload(unittest.TestCase):
+    """Test the compact token payload sent by the API server to the model."""
+
+    def setUp(self):
+        self.vocabulary = get_domain_keywords(KEYWORDS_PATH)
+        pdf_file = Pdf("resources/benchmark/valid/2103.01035.pdf")
+        pdf_file.to_text()
+        self.text = combined_text_cleaning(pdf_file.content)
+
+    def test_round_trip(self):
+        keywords = self.vocabulary[0]
+        tokens = ["causal", "unknown", keywords[3], "unknown", keywords[0]]
+        payload = encode_tokens(tokens, keywords)
+        self.assertEqual(payload.dtype, np.int32)
+        self.assertEqual(
+            decode_tokens(payload, keywords),
+            ([token for token in tokens if token in keywords], 2),
+        )
+
+        with self.assertRaises(ValueError):
+            decode_tokens(payload, keywords[1:])
+
+        for invalid_id in (-1, len(keywords)):
+            invalid = np.append(payload, np.int32(invalid_id))
+            with self.assertRaises(ValueError):
+                decode_tokens(invalid, keywords)
+
+    def test_same_score_as_text(self):
+        model = GensimWord2VecModel(
+            load_word2vec_model(os.path.join("tests", "data", "models", "small.model")),
+            KEYWORDS_PATH,
+        )
+        payload = encode_document(self.text, self.vocabulary)
+        self.assertLess(payload.nbytes, len(self.text.encode("utf-8")) / 4)
+        self.assertEqual(model.predict(None, payload), model.predict(None, self.text))
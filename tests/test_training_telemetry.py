@@ -0,0 +1,66 @@
+"""Test the per-epoch training telemetry of the Word2Vec callback."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import mlflow
+import numpy as np
+from gensim.models import Word2Vec
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from training import Word2vecCallback, get_probe_pairs
+
+
+class TestTrainingTelemetry(unittest.TestCase):
+    """Test the per-epoch training telemetry of the Word2Vec callback."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tracking_uri = mlflow.get_tracking_uri()
+        mlflow.set_tracking_uri("file://" + os.path.join(self.tmp_dir.name, "mlruns"))
+        mlflow.set_experiment("training_telemetry")
+
+        rng = np.random.default_rng(0)
+        words = [f"word{index}" for index in range(50)]
+        self.sentences = [list(rng.choice(words, size=100)) for _ in range(20)]
+
+    def tearDown(self):
+        mlflow.set_tracking_uri(self.tracking_uri)
+        self.tmp_dir.cleanup()
+
+    def test_epoch_metrics(self):
+        callback = Word2vecCallback(
+            words_per_epoch=2000, probe_pairs=get_probe_pairs("word1:word2,word1:none")
+        )
+        model = Word2Vec(vector_size=10, min_count=1, workers=2, compute_loss=True)
+        model.build_vocab(self.sentences)
+
+        with mlflow.start_run() as run:
+            model.train(
+                self.sentences,
+                total_examples=len(self.sentences),
+                epochs=3,
+                compute_loss=True,
+                callbacks=[callback],
+            )
+
+        self.assertEqual(len(callback.history), 3)
+        self.assertAlmostEqual(
+            sum(metrics["epoch_loss"] for metrics in callback.history),
+            model.get_latest_training_loss(),
+            places=2,
+        )
+        for metrics in callback.history:
+            self.assertGreater(metrics["words_per_second"], 0)
+            self.assertGreaterEqual(metrics["worker_utilization"], 0)
+            self.assertIn("probe.word1.word2", metrics)
+            self.assertNotIn("probe.word1.none", metrics)
+
+        history = mlflow.tracking.MlflowClient().get_metric_history(
+            run.info.run_id, "epoch_loss"
+        )
+        self.assertEqual([metric.step for metric in history], [0, 1, 2])
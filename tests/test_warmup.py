@@ -0,0 +1,79 @@
+"""Test the warm-up of the serving path and of the model."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath("src"))
+
+# pylint: disable=C0413
+from serving.warmup import WarmUp, warm_up_document
+from training import GensimWord2VecModel, get_domain_keywords, load_word2vec_model
+
+PDF_FILE_PATH = "resources/benchmark/valid/2103.01035.pdf"
+KEYWORDS_PATH = "resources/keywords/keywords.txt"
+
+
+async def run_warm_up(warm_up: WarmUp) -> dict:
+    """Starts a warm-up and waits for its end, as successive readiness checks would."""
+
+    warm_up.start()
+    status = warm_up.status()
+    while not warm_up.is_ready and warm_up.state != "failed":
+        await asyncio.sleep(0.01)
+    return status
+
+
+class TestWarmUp(unittest.TestCase):
+    """Test the warm-up of the serving path and of the model."""
+
+    def test_warm_up_document(self):
+        scored = []
+
+        async def predict(tokens: str) -> float:
+            scored.append(tokens)
+            return 1.0
+
+        keywords = get_domain_keywords(KEYWORDS_PATH)[0]
+        warm_up = WarmUp(lambda: warm_up_document(PDF_FILE_PATH, keywords, predict))
+        self.assertFalse(warm_up.is_ready)
+
+        status = asyncio.run(run_warm_up(warm_up))
+        self.assertEqual(status["state"], "running")
+        self.assertTrue(warm_up.is_ready)
+        self.assertEqual(
+            set(warm_up.stages),
+            {"conversion", "cleaning", "screening", "tokenization", "scoring"},
+        )
+        self.assertGreater(warm_up.seconds, 0.0)
+        self.assertEqual(len(scored), 1)
+        self.assertEqual(scored[0].dtype, np.int32)
+
+    def test_failed_warm_up_is_retried(self):
+        attempts = []
+
+        async def flaky_warm_up() -> dict:
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("runner not ready")
+            return {}
+
+        warm_up = WarmUp(flaky_warm_up)
+        asyncio.run(run_warm_up(warm_up))
+        self.assertEqual(warm_up.state, "failed")
+        self.assertIn("runner not ready", warm_up.status()["error"])
+
+        asyncio.run(run_warm_up(warm_up))
+        self.assertTrue(warm_up.is_ready)
+        self.assertIsNone(warm_up.error)
+        self.assertEqual(len(attempts), 2)
+
+    def test_model_warm_up(self):
+        model = GensimWord2VecModel(
+            load_word2vec_model(os.path.join("tests", "data", "models", "small.model")),
+            KEYWORDS_PATH,
+        )
+        self.assertGreater(model.warm_up(), 0.0)